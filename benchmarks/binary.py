@@ -0,0 +1,73 @@
+"""
+Round-tripping test suites through the binary format and through XML.
+
+Run with: python -m benchmarks.binary
+"""
+
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from collections.abc import Callable
+from pathlib import Path
+
+from junit_xml import TestCase, TestSuite, binary, to_xml_report_file
+
+SUITES = 20
+CASES = 5_000
+
+
+def build_test_suites() -> list[TestSuite]:
+    test_suites: list[TestSuite] = []
+    for s in range(SUITES):
+        cases: list[TestCase] = []
+        for i in range(CASES):
+            case = TestCase(
+                f"test_{i}", classname=f"bench.module{i % 50}", elapsed_sec=0.001
+            )
+            if i % 20 == 0:
+                case.add_failure_info("assert 1 == 2", "Traceback ...\n" * 200)
+            cases.append(case)
+        test_suites.append(TestSuite(f"suite{s}", cases, hostname="localhost"))
+    return test_suites
+
+
+def measure(func: Callable[[], object]) -> float:
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    assert best is not None
+    return best
+
+
+def main() -> None:
+    test_suites = build_test_suites()
+    with tempfile.TemporaryDirectory() as tmp:
+        binary_path = Path(tmp) / "report.bin"
+        xml_path = Path(tmp) / "report.xml"
+
+        def dump_binary() -> None:
+            with binary_path.open("wb") as f:
+                binary.dump(test_suites, f)
+
+        def dump_xml() -> None:
+            with xml_path.open("w", encoding="utf-8") as f:
+                to_xml_report_file(f, test_suites, prettyprint=False, encoding="utf-8")
+
+        results = {
+            "binary dump": measure(dump_binary),
+            "binary load (mmap)": measure(lambda: binary.load(binary_path)),
+            "xml write": measure(dump_xml),
+            "xml parse (ElementTree)": measure(lambda: ET.parse(xml_path)),  # noqa: S314
+        }
+        sizes = {"binary": binary_path.stat().st_size, "xml": xml_path.stat().st_size}
+    for name, elapsed in results.items():
+        print(f"{name:<24} {elapsed * 1000:8.1f} ms")
+    for name, size in sizes.items():
+        print(f"{name + ' size':<24} {size / 1024 / 1024:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
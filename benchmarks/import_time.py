@@ -0,0 +1,68 @@
+"""
+Time of `import junit_xml`, measured with python -X importtime.
+
+Run with: python -m benchmarks.import_time [--budget-ms MS]
+
+With a budget it fails when the best of the runs takes longer, or when one
+of the modules which are only loaded on demand has been imported, so CI can
+check that importing the package stays cheap.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+RUNS = 10
+
+# only loaded when pretty-printing with minidom, building an ElementTree or
+# writing through the spooling report writers
+LAZY_MODULES = ["tempfile", "xml.dom.minidom", "xml.etree.ElementTree"]
+
+
+def import_times(env: dict[str, str]) -> dict[str, int]:
+    """Return the cumulative import time in us of every imported module."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", "import junit_xml"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time of import junit_xml.")
+    parser.add_argument("--budget-ms", type=float, help="fail above this time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pycache:
+        # the bytecode is cached like in an installed package
+        env = {**os.environ, "PYTHONPYCACHEPREFIX": pycache}
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        import_times(env)
+        runs = [import_times(env) for _ in range(RUNS)]
+
+    best = min(times["junit_xml"] for times in runs) / 1000
+    print(f"import junit_xml {best:8.1f} ms")
+    loaded = [name for name in LAZY_MODULES if name in runs[0]]
+    for name in loaded:
+        print(f"eagerly imported: {name}")
+    if args.budget_ms is None:
+        return
+    if best > args.budget_ms:
+        print(f"over the budget of {args.budget_ms} ms")
+    if best > args.budget_ms or loaded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
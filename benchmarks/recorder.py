@@ -0,0 +1,74 @@
+"""
+Per-event overhead of recording test results.
+
+Compares building TestCase objects for a TestSuite with the Recorder and
+the ThreadSafeRecorder, run with: python -m benchmarks.recorder
+"""
+
+import time
+from collections.abc import Callable
+
+from junit_xml import TestCase, TestSuite
+from junit_xml.recorder import Outcome, Recorder, ThreadSafeRecorder
+
+EVENTS = 200_000
+
+
+def bench_test_cases(events: int) -> None:
+    suite = TestSuite("suite")
+    for i in range(events):
+        case = TestCase(f"test{i}", classname="bench.module", elapsed_sec=0.001)
+        if i % 10 == 0:
+            case.add_failure_info("failed", "output")
+        suite.test_cases.append(case)
+
+
+def bench_recorder(events: int, recorder: Recorder | ThreadSafeRecorder) -> None:
+    case_finished = recorder.case_finished
+    for i in range(events):
+        if i % 10 == 0:
+            case_finished(
+                "suite",
+                f"test{i}",
+                "bench.module",
+                0.001,
+                Outcome.FAILURE,
+                "failed",
+                "output",
+            )
+        else:
+            case_finished("suite", f"test{i}", "bench.module", 0.001)
+
+
+def bench_name(events: int) -> None:
+    # the f-string of the name alone, subtracted from the results
+    for i in range(events):
+        f"test{i}"
+
+
+def measure(func: Callable[[], None]) -> int:
+    best = None
+    for _ in range(5):
+        start = time.perf_counter_ns()
+        func()
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    assert best is not None
+    return best
+
+
+def main() -> None:
+    baseline = measure(lambda: bench_name(EVENTS))
+    results = {
+        "TestCase + TestSuite": measure(lambda: bench_test_cases(EVENTS)),
+        "Recorder": measure(lambda: bench_recorder(EVENTS, Recorder())),
+        "ThreadSafeRecorder": measure(
+            lambda: bench_recorder(EVENTS, ThreadSafeRecorder())
+        ),
+    }
+    for name, elapsed in results.items():
+        print(f"{name:<22} {(elapsed - baseline) / EVENTS:8.0f} ns/event")
+
+
+if __name__ == "__main__":
+    main()
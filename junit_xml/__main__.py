@@ -0,0 +1,5 @@
+import sys
+
+from junit_xml.cli import main
+
+sys.exit(main())
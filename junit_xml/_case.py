@@ -0,0 +1,411 @@
+"""Test cases and the attributes and children of their XML elements."""
+
+import copyreg
+from collections.abc import Callable, Collection
+from datetime import timedelta
+from typing import Any, NotRequired, TypeAlias, TypedDict
+
+from junit_xml._output import OutputSource, decode
+from junit_xml._timestamps import CaseTimestamp, Timestamp, format_timestamp
+
+
+class ResultInfo(TypedDict):
+    message: str | None
+    output: OutputSource | None
+    type: str | None
+
+
+class SkippedInfo(TypedDict):
+    message: str | None
+    output: OutputSource | None
+    # the type attribute of a parsed skipped element, always written "skipped"
+    type: NotRequired[str | None]
+
+
+_XmlChild: TypeAlias = tuple[str, dict[str, str], OutputSource | None]
+
+
+class TestCase:
+    """A JUnit test case with a result and possibly some stdout or stderr."""
+
+    # the template the test case was made by, see CaseTemplate
+    template: "CaseTemplate | None" = None
+
+    def __init__(
+        self,
+        name: str,
+        classname: str | None = None,
+        elapsed_sec: float | None = None,
+        stdout: OutputSource | None = None,
+        stderr: OutputSource | None = None,
+        assertions: int | None = None,
+        timestamp: CaseTimestamp | None = None,
+        status: str | None = None,
+        category: str | None = None,
+        file: str | None = None,
+        line: str | None = None,
+        log: str | None = None,
+        url: str | None = None,
+        allow_multiple_subelements: bool = False,
+    ) -> None:
+        self.name = name
+        self.assertions = assertions
+        self.elapsed_sec = elapsed_sec
+        self.timestamp = timestamp
+        self.classname = classname
+        self.status = status
+        self.category = category
+        self.file = file
+        self.line = line
+        self.log = log
+        self.url = url
+        self.stdout = stdout
+        self.stderr = stderr
+
+        self.is_enabled = True
+        self.errors: list[ResultInfo] = []
+        self.failures: list[ResultInfo] = []
+        self.skipped: list[SkippedInfo] = []
+        self.allow_multiple_subelements = allow_multiple_subelements
+
+    def add_error_info(
+        self,
+        message: str | None = None,
+        output: OutputSource | None = None,
+        error_type: str | None = None,
+    ) -> None:
+        """Add an error message, output, or both to the test case."""
+        error: ResultInfo = {"message": message, "output": output, "type": error_type}
+        if self.allow_multiple_subelements:
+            if message or output:
+                self.errors.append(error)
+        elif not len(self.errors):
+            self.errors.append(error)
+        else:
+            if message:
+                self.errors[0]["message"] = message
+            if output:
+                self.errors[0]["output"] = output
+            if error_type:
+                self.errors[0]["type"] = error_type
+
+    def add_failure_info(
+        self,
+        message: str | None = None,
+        output: OutputSource | None = None,
+        failure_type: str | None = None,
+    ) -> None:
+        """Add a failure message, output, or both to the test case."""
+        failure: ResultInfo = {
+            "message": message,
+            "output": output,
+            "type": failure_type,
+        }
+        if self.allow_multiple_subelements:
+            if message or output:
+                self.failures.append(failure)
+        elif not len(self.failures):
+            self.failures.append(failure)
+        else:
+            if message:
+                self.failures[0]["message"] = message
+            if output:
+                self.failures[0]["output"] = output
+            if failure_type:
+                self.failures[0]["type"] = failure_type
+
+    def add_skipped_info(
+        self, message: str | None = None, output: OutputSource | None = None
+    ) -> None:
+        """Add a skipped message, output, or both to the test case."""
+        skipped: SkippedInfo = {"message": message, "output": output}
+        if self.allow_multiple_subelements:
+            if message or output:
+                self.skipped.append(skipped)
+        elif not len(self.skipped):
+            self.skipped.append(skipped)
+        else:
+            if message:
+                self.skipped[0]["message"] = message
+            if output:
+                self.skipped[0]["output"] = output
+
+    def is_failure(self) -> bool:
+        """Return true if this test case is a failure."""
+        return sum(1 for f in self.failures if f["message"] or f["output"]) > 0
+
+    def is_error(self) -> bool:
+        """Return true if this test case is an error."""
+        return sum(1 for e in self.errors if e["message"] or e["output"]) > 0
+
+    def is_skipped(self) -> bool:
+        """Return true if this test case has been skipped."""
+        return len(self.skipped) > 0
+
+
+class CaseTemplate:
+    """
+    Shared fields of test cases, e.g. of the cases of a parametrized test.
+
+    The test cases made by case() store their name, time, timestamp and
+    outputs, the other fields are looked up in the template until they are
+    set on a test case, which doesn't change the template or the other
+    cases:
+
+        template = CaseTemplate(classname="tests.test_api", file="test_api.py")
+        cases = [template.case(f"test_get[{i}]", elapsed_sec=t) for i, t in ...]
+        cases[0].url = "https://ci.example/1"
+
+    The cases are instances of a subclass of TestCase which holds the fields
+    of the template, so they take a fraction of the memory of independent
+    test cases. The writers escape the attribute values of a template once.
+    They are pickled with their template, which is rebuilt from its fields
+    once per pickle.
+    """
+
+    def __init__(
+        self,
+        classname: str | None = None,
+        assertions: int | None = None,
+        status: str | None = None,
+        category: str | None = None,
+        file: str | None = None,
+        line: str | None = None,
+        log: str | None = None,
+        url: str | None = None,
+        allow_multiple_subelements: bool = False,
+    ) -> None:
+        fields = {
+            "classname": classname,
+            "assertions": assertions,
+            "status": status,
+            "category": category,
+            "file": file,
+            "line": line,
+            "log": log,
+            "url": url,
+            "allow_multiple_subelements": allow_multiple_subelements,
+        }
+        self.fields = fields
+        self.case_class: type[TestCase] = type(
+            "TestCase",
+            (TestCase,),
+            {
+                **fields,
+                "elapsed_sec": None,
+                "timestamp": None,
+                "stdout": None,
+                "stderr": None,
+                "is_enabled": True,
+                "template": self,
+                "__module__": __name__,
+                "__reduce__": _reduce_template_case,
+            },
+        )
+        # the attributes of the testcase element written for the fields
+        attributes = case_attributes(self.case(""))
+        del attributes["name"]
+        self.attributes = attributes
+
+    @classmethod
+    def from_case(cls, case: TestCase) -> "CaseTemplate":
+        """Return a template of the shared fields of a test case."""
+        return cls(
+            classname=case.classname,
+            assertions=case.assertions,
+            status=case.status,
+            category=case.category,
+            file=case.file,
+            line=case.line,
+            log=case.log,
+            url=case.url,
+            allow_multiple_subelements=case.allow_multiple_subelements,
+        )
+
+    def case(
+        self,
+        name: str,
+        elapsed_sec: float | None = None,
+        stdout: OutputSource | None = None,
+        stderr: OutputSource | None = None,
+        timestamp: CaseTimestamp | None = None,
+    ) -> TestCase:
+        """Return a new test case with the fields of the template."""
+        case = self.case_class.__new__(self.case_class)
+        case.name = name
+        if elapsed_sec is not None:
+            case.elapsed_sec = elapsed_sec
+        if stdout is not None:
+            case.stdout = stdout
+        if stderr is not None:
+            case.stderr = stderr
+        if timestamp is not None:
+            case.timestamp = timestamp
+        case.errors = []
+        case.failures = []
+        case.skipped = []
+        return case
+
+
+def _reduce_template(
+    template: CaseTemplate,
+) -> tuple[type[CaseTemplate], tuple[Any, ...]]:
+    # by the fields, in the order of the arguments, the subclass is made anew
+    return (CaseTemplate, tuple(template.fields.values()))
+
+
+copyreg.pickle(CaseTemplate, _reduce_template)
+
+
+def _template_case(template: CaseTemplate, state: dict[str, Any]) -> TestCase:
+    """Return a test case of the template with the pickled state."""
+    case = template.case_class.__new__(template.case_class)
+    case.__dict__.update(state)
+    return case
+
+
+def _reduce_template_case(
+    case: TestCase,
+) -> tuple[Callable[..., TestCase], tuple[Any, ...]]:
+    # the subclass of the template can't be pickled by its name
+    return (_template_case, (case.template, case.__dict__))
+
+
+def case_attributes(case: "TestCase", base: Timestamp | None = None) -> dict[str, str]:
+    """
+    Return the attributes of the testcase element.
+
+    A relative timestamp of the test case is added to base, the timestamp
+    of its suite.
+    """
+    test_case_attributes: dict[str, str] = {}
+    test_case_attributes["name"] = decode(case.name)
+    if case.assertions:
+        # Number of assertions in the test case
+        test_case_attributes["assertions"] = f"{case.assertions:d}"
+    if case.elapsed_sec:
+        test_case_attributes["time"] = f"{case.elapsed_sec:f}"
+    if case.timestamp or isinstance(case.timestamp, timedelta):
+        test_case_attributes["timestamp"] = format_timestamp(case.timestamp, base)
+    if case.classname:
+        test_case_attributes["classname"] = decode(case.classname)
+    if case.status:
+        test_case_attributes["status"] = decode(case.status)
+    if case.category:
+        test_case_attributes["class"] = decode(case.category)
+    if case.file:
+        test_case_attributes["file"] = decode(case.file)
+    if case.line:
+        test_case_attributes["line"] = decode(case.line)
+    if case.log:
+        test_case_attributes["log"] = decode(case.log)
+    if case.url:
+        test_case_attributes["url"] = decode(case.url)
+    return test_case_attributes
+
+
+# the optional attributes of the testcase element in document order, with the
+# attribute of TestCase they are written from and how its value is formatted,
+# the timestamp is formatted with the timestamp of the suite
+_CASE_FIELDS: dict[str, tuple[str, Callable[[Any], str]]] = {
+    "assertions": ("assertions", "{:d}".format),
+    "time": ("elapsed_sec", "{:f}".format),
+    "timestamp": ("timestamp", format_timestamp),
+    "classname": ("classname", decode),
+    "status": ("status", decode),
+    "class": ("category", decode),
+    "file": ("file", decode),
+    "line": ("line", decode),
+    "log": ("log", decode),
+    "url": ("url", decode),
+}
+
+CASE_FIELDS = frozenset(["name", *_CASE_FIELDS])
+
+
+def case_attributes_plan(
+    fields: Collection[str],
+) -> Callable[["TestCase", Timestamp | None], dict[str, str]]:
+    """
+    Return a function of the testcase attributes restricted to fields.
+
+    The fields are looked up once, the returned function only visits the
+    attributes which are written. The name is always written.
+    """
+    unknown = set(fields) - CASE_FIELDS
+    if unknown:
+        error_message = f"unknown testcase attributes: {', '.join(sorted(unknown))}"
+        raise ValueError(error_message)
+    plan = [
+        (name, attribute, format_value)
+        for name, (attribute, format_value) in _CASE_FIELDS.items()
+        if name in fields
+    ]
+    # the fields before and after the timestamp, which needs the base
+    names = [name for name, _, _ in plan]
+    split = names.index("timestamp") if "timestamp" in names else len(plan)
+    head = tuple(plan[:split])
+    tail = tuple(plan[split + 1 :])
+    with_timestamp = split < len(plan)
+
+    def planned_case_attributes(
+        case: "TestCase", base: Timestamp | None = None
+    ) -> dict[str, str]:
+        test_case_attributes = {"name": decode(case.name)}
+        for name, attribute, format_value in head:
+            value = getattr(case, attribute)
+            if value:
+                test_case_attributes[name] = format_value(value)
+        if with_timestamp:
+            timestamp = case.timestamp
+            if timestamp or isinstance(timestamp, timedelta):
+                test_case_attributes["timestamp"] = format_timestamp(timestamp, base)
+        for name, attribute, format_value in tail:
+            value = getattr(case, attribute)
+            if value:
+                test_case_attributes[name] = format_value(value)
+        return test_case_attributes
+
+    return planned_case_attributes
+
+
+def case_children(case: "TestCase") -> list[_XmlChild]:
+    """Return the (tag, attributes, output) of the child elements."""
+    children: list[_XmlChild] = []
+
+    # failures
+    for failure in case.failures:
+        if failure["output"] or failure["message"]:
+            attrs = {"type": "failure"}
+            if failure["message"]:
+                attrs["message"] = decode(failure["message"])
+            if failure["type"]:
+                attrs["type"] = decode(failure["type"])
+            children.append(("failure", attrs, failure["output"]))
+
+    # errors
+    for error in case.errors:
+        if error["message"] or error["output"]:
+            attrs = {"type": "error"}
+            if error["message"]:
+                attrs["message"] = decode(error["message"])
+            if error["type"]:
+                attrs["type"] = decode(error["type"])
+            children.append(("error", attrs, error["output"]))
+
+    # skippeds
+    for skipped in case.skipped:
+        attrs = {"type": "skipped"}
+        if skipped["message"]:
+            attrs["message"] = decode(skipped["message"])
+        children.append(("skipped", attrs, skipped["output"]))
+
+    # test stdout
+    if case.stdout:
+        children.append(("system-out", {}, case.stdout))
+
+    # test stderr
+    if case.stderr:
+        children.append(("system-err", {}, case.stderr))
+
+    return children
@@ -0,0 +1,166 @@
+"""Text of the outputs of test suites and test cases, plain or lazy."""
+
+import codecs
+import os
+from collections.abc import Callable, Iterable, Iterator
+from functools import partial
+from typing import Protocol, TypeAlias, runtime_checkable
+
+
+def decode(var: str | bytes | int) -> str:
+    """If not already unicode, decode it, bytes as UTF-8."""
+    if isinstance(var, bytes):
+        return var.decode("utf-8", "replace")
+    return str(var)
+
+
+@runtime_checkable
+class _SupportsRead(Protocol):
+    def read(self, size: int, /) -> str | bytes: ...
+
+
+OutputSource: TypeAlias = (
+    str
+    | bytes
+    | os.PathLike[str]
+    | _SupportsRead
+    | Callable[[], Iterable[str] | Iterable[bytes]]
+)
+"""
+Text of a stdout, stderr or failure/error/skipped output.
+
+Besides a plain string it can be bytes, or a lazy source which is only read
+while the report is written: a path to a file, a file object or a callable
+returning an iterable of chunks. Bytes are UTF-8, they are decoded in chunks
+with the error policy of the writer, see iter_output(). EncodedOutput
+decodes another encoding.
+"""
+
+CHUNK_SIZE = 64 * 1024
+
+ERROR_POLICIES = ("replace", "backslashreplace", "ignore")
+"""
+Error policies for invalid bytes of the outputs, the codec error handlers
+which replace them with U+FFFD, with backslash escapes like \\xff, or drop them.
+Any registered error handler is accepted, "strict" raises UnicodeDecodeError.
+"""
+
+
+class Hasher(Protocol):
+    """Incremental hash of a written document, like the hashes of hashlib."""
+
+    def update(self, data: bytes, /) -> None: ...
+
+
+def check_errors(errors: str) -> str:
+    """Return the error policy errors, raise ValueError if it is unknown."""
+    try:
+        codecs.lookup_error(errors)
+    except LookupError:
+        error_message = f"unknown error policy {errors!r}, e.g. {ERROR_POLICIES}"
+        raise ValueError(error_message) from None
+    return errors
+
+
+def _read_chunks(read: Callable[[int], str | bytes]) -> Iterator[str | bytes]:
+    while chunk := read(CHUNK_SIZE):
+        yield chunk
+
+
+def _bytes_chunks(data: bytes) -> Iterator[bytes]:
+    for start in range(0, len(data), CHUNK_SIZE):
+        yield data[start : start + CHUNK_SIZE]
+
+
+def _decode_chunks(
+    chunks: Iterable[str | bytes], encoding: str, errors: str
+) -> Iterator[str]:
+    """
+    Yield chunks of text, the bytes decoded incrementally.
+
+    A character split between two chunks is decoded once both are read.
+    """
+    decoder = None
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(encoding)(errors)
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    if decoder is not None:
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
+
+
+def iter_output(output: OutputSource, errors: str = "replace") -> Iterator[str]:
+    """
+    Yield the text of an output in chunks, reading lazy sources on demand.
+
+    Bytes are decoded as UTF-8 chunk by chunk, invalid ones are handled by
+    errors, one of ERROR_POLICIES.
+    """
+    if isinstance(output, str):
+        yield output
+    elif isinstance(output, bytes):
+        yield from _decode_chunks(_bytes_chunks(output), "utf-8", errors)
+    elif callable(output):
+        # before the protocol check, which is slow, for the lazy outputs of
+        # decoded records
+        yield from _decode_chunks(output(), "utf-8", errors)
+    elif isinstance(output, _SupportsRead):
+        yield from _decode_chunks(_read_chunks(output.read), "utf-8", errors)
+    else:
+        with open(output, encoding="utf-8", errors=errors) as f:  # noqa: PTH123
+            yield from iter(partial(f.read, CHUNK_SIZE), "")
+
+
+def read_output(output: OutputSource, errors: str = "replace") -> str:
+    """Read the whole text of an output into memory."""
+    return "".join(iter_output(output, errors))
+
+
+class EncodedOutput:
+    """
+    Output in another encoding than UTF-8, decoded in chunks while written.
+
+    The source is bytes or a lazy source of bytes: a path to a file, a file
+    object opened in binary mode or a callable returning an iterable of
+    bytes chunks. Invalid bytes are handled by errors, one of ERROR_POLICIES.
+    """
+
+    __slots__ = ("encoding", "errors", "source")
+
+    def __init__(
+        self,
+        source: bytes
+        | os.PathLike[str]
+        | _SupportsRead
+        | Callable[[], Iterable[bytes]],
+        encoding: str,
+        errors: str = "replace",
+    ) -> None:
+        codecs.lookup(encoding)
+        self.source = source
+        self.encoding = encoding
+        self.errors = check_errors(errors)
+
+    def __call__(self) -> Iterator[str]:
+        """Yield the decoded text in chunks."""
+        source = self.source
+        if isinstance(source, bytes):
+            chunks = _bytes_chunks(source)
+        elif callable(source):
+            chunks = source()
+        elif isinstance(source, _SupportsRead):
+            chunks = _read_chunks(source.read)
+        else:
+            with open(source, "rb") as f:  # noqa: PTH123
+                yield from _decode_chunks(
+                    _read_chunks(f.read), self.encoding, self.errors
+                )
+            return
+        yield from _decode_chunks(chunks, self.encoding, self.errors)
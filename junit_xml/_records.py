@@ -0,0 +1,388 @@
+"""
+Compact binary records of test suites and test cases.
+
+A stream of records is a sequence of frames, a frame is a one byte type and
+a four byte little-endian payload length followed by the payload. Repeated
+strings like suite names, class names and failure types are sent once in a
+string frame and referred to by their index afterwards, texts like names,
+messages and outputs are inlined with a length prefix.
+"""
+
+import codecs
+import math
+import mmap
+import struct
+from collections.abc import Iterator
+
+from junit_xml._case import TestCase
+from junit_xml._output import (
+    CHUNK_SIZE,
+    OutputSource,
+    check_errors,
+    decode,
+    iter_output,
+)
+from junit_xml._suite import TestSuite
+from junit_xml._timestamps import CaseTimestamp, Timestamp, format_timestamp
+
+FRAME = struct.Struct("<BI")
+STRING = 1
+SUITE = 2
+CASE = 3
+END = 4
+
+_UINT32 = struct.Struct("<I")
+# string refs: name, hostname, id, package, file, log, url, text timestamp
+# then integer timestamp and the number of properties
+_SUITE_HEADER = struct.Struct("<8IqH")
+# string refs: suite, classname, status, category, file, line, log, url,
+# text timestamp, then elapsed_sec, assertions, integer timestamp, flags
+# and the numbers of failures, errors and skipped
+_CASE_HEADER = struct.Struct("<9IdqqB3H")
+_ENABLED = 0x01
+_MULTIPLE_SUBELEMENTS = 0x02
+# length of an absent text, index 0 of the string table is an absent string
+_NONE = 0xFFFFFFFF
+
+
+def _timestamp_text(
+    timestamp: CaseTimestamp | None, base: Timestamp | None = None
+) -> str | None:
+    """Return the text of a timestamp which isn't stored as an integer."""
+    if timestamp is None or isinstance(timestamp, int):
+        return None
+    return format_timestamp(timestamp, base)
+
+
+class RecordEncoder:
+    """
+    Encodes suites and test cases into frames appended to a buffer.
+
+    Invalid bytes of the outputs are handled by the error policy errors.
+    """
+
+    def __init__(self, errors: str = "replace") -> None:
+        self.errors = check_errors(errors)
+        self._ids: dict[str, int] = {}
+
+    def _ref(self, value: str | int | None, strings: bytearray) -> int:
+        """Return the index of a string, emit a string frame if it is new."""
+        if value is None or value == "":
+            return 0
+        value = decode(value)
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self._ids) + 1
+            data = value.encode("utf-8")
+            strings += FRAME.pack(STRING, len(data))
+            strings += data
+        return index
+
+    def _text(self, value: OutputSource | None, payload: bytearray) -> None:
+        """Append a length-prefixed text, lazy outputs are read in chunks."""
+        if value is None:
+            payload += _UINT32.pack(_NONE)
+            return
+        offset = len(payload)
+        payload += _UINT32.pack(0)
+        for chunk in iter_output(value, self.errors):
+            payload += chunk.encode("utf-8", "surrogatepass")
+        _UINT32.pack_into(payload, offset, len(payload) - offset - _UINT32.size)
+
+    @staticmethod
+    def _frame(frame_type: int, payload: bytearray, out: bytearray) -> None:
+        out += FRAME.pack(frame_type, len(payload))
+        out += payload
+
+    def encode_suite(
+        self, suite: TestSuite, out: bytearray, strings: bytearray | None = None
+    ) -> None:
+        """
+        Append the frames of a suite without its test cases.
+
+        The string frames go to strings if given, which must then be written
+        before out.
+        """
+        if strings is None:
+            strings = out
+        properties = suite.properties or {}
+        timestamp = suite.timestamp
+        payload = bytearray(
+            _SUITE_HEADER.pack(
+                self._ref(suite.name, strings),
+                self._ref(suite.hostname, strings),
+                self._ref(suite.id, strings),
+                self._ref(suite.package, strings),
+                self._ref(suite.file, strings),
+                self._ref(suite.log, strings),
+                self._ref(suite.url, strings),
+                self._ref(_timestamp_text(timestamp), strings),
+                timestamp if isinstance(timestamp, int) else 0,
+                len(properties),
+            )
+        )
+        for name, value in properties.items():
+            self._text(name, payload)
+            self._text(value, payload)
+        self._text(suite.stdout, payload)
+        self._text(suite.stderr, payload)
+        self._frame(SUITE, payload, out)
+
+    def encode_case(
+        self,
+        suite_name: str,
+        case: TestCase,
+        out: bytearray,
+        strings: bytearray | None = None,
+        base: Timestamp | None = None,
+    ) -> None:
+        """
+        Append the frames of a test case of the named suite.
+
+        A relative timestamp of the test case is stored added to base, the
+        timestamp of the suite.
+        """
+        if strings is None:
+            strings = out
+        flags = (_ENABLED if case.is_enabled else 0) | (
+            _MULTIPLE_SUBELEMENTS if case.allow_multiple_subelements else 0
+        )
+        timestamp = case.timestamp
+        payload = bytearray(
+            _CASE_HEADER.pack(
+                self._ref(suite_name, strings),
+                self._ref(case.classname, strings),
+                self._ref(case.status, strings),
+                self._ref(case.category, strings),
+                self._ref(case.file, strings),
+                self._ref(case.line, strings),
+                self._ref(case.log, strings),
+                self._ref(case.url, strings),
+                self._ref(_timestamp_text(timestamp, base), strings),
+                math.nan if case.elapsed_sec is None else case.elapsed_sec,
+                -1 if case.assertions is None else case.assertions,
+                timestamp if isinstance(timestamp, int) else 0,
+                flags,
+                len(case.failures),
+                len(case.errors),
+                len(case.skipped),
+            )
+        )
+        self._text(case.name, payload)
+        for info in (*case.failures, *case.errors):
+            payload += _UINT32.pack(self._ref(info["type"], strings))
+            self._text(info["message"], payload)
+            self._text(info["output"], payload)
+        for skipped in case.skipped:
+            self._text(skipped["message"], payload)
+            self._text(skipped["output"], payload)
+        self._text(case.stdout, payload)
+        self._text(case.stderr, payload)
+        self._frame(CASE, payload, out)
+
+    @staticmethod
+    def encode_end(out: bytearray) -> None:
+        """Append the frame which ends the stream."""
+        out += FRAME.pack(END, 0)
+
+
+class MappedText:
+    """
+    Output text left in the buffer it was decoded from.
+
+    It is a lazy output of a test case, decoded in chunks only while the
+    report is written, so an output in a memory-mapped file is never copied
+    as a whole.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: memoryview) -> None:
+        self.data = data
+
+    def __call__(self) -> Iterator[str]:
+        """Yield the decoded text in chunks."""
+        decoder = codecs.getincrementaldecoder("utf-8")("surrogatepass")
+        data = self.data
+        for start in range(0, len(data), CHUNK_SIZE):
+            yield decoder.decode(data[start : start + CHUNK_SIZE])
+        yield decoder.decode(b"", final=True)
+
+    def __bool__(self) -> bool:
+        """Return whether there is any text."""
+        return len(self.data) > 0
+
+
+class RecordDecoder:
+    """
+    Decodes frames back into suites and test cases.
+
+    Frames are read with struct.unpack_from() straight from the buffer, which
+    can be a memoryview, only the strings themselves are copied. With
+    lazy_outputs the outputs aren't copied either, they are MappedText views
+    of the buffer.
+    """
+
+    def __init__(self, lazy_outputs: bool = False) -> None:
+        self._strings: list[str | None] = [None]
+        self.lazy_outputs = lazy_outputs
+        self.ended = False
+
+    @staticmethod
+    def _text(buffer: memoryview, offset: int) -> tuple[str | None, int]:
+        (length,) = _UINT32.unpack_from(buffer, offset)
+        offset += _UINT32.size
+        if length == _NONE:
+            return None, offset
+        end = offset + length
+        return str(buffer[offset:end], "utf-8", "surrogatepass"), end
+
+    def _output(
+        self, buffer: memoryview, offset: int
+    ) -> tuple[OutputSource | None, int]:
+        if not self.lazy_outputs:
+            return self._text(buffer, offset)
+        (length,) = _UINT32.unpack_from(buffer, offset)
+        offset += _UINT32.size
+        if length == _NONE:
+            return None, offset
+        end = offset + length
+        return MappedText(buffer[offset:end]), end
+
+    def iter_records(
+        self, data: bytes | bytearray | memoryview | mmap.mmap
+    ) -> Iterator[TestSuite | tuple[str, TestCase]]:
+        """
+        Yield the records of a buffer holding whole frames.
+
+        A suite is yielded as a TestSuite without test cases, a test case as
+        a tuple of the suite name and the TestCase.
+        """
+        # not released at the end, lazy outputs keep views of it
+        buffer = memoryview(data)
+        offset = 0
+        size = len(buffer)
+        while offset < size:
+            frame_type, length = FRAME.unpack_from(buffer, offset)
+            offset += FRAME.size
+            end = offset + length
+            if frame_type == STRING:
+                self._strings.append(str(buffer[offset:end], "utf-8"))
+            elif frame_type == SUITE:
+                yield self._decode_suite(buffer, offset)
+            elif frame_type == CASE:
+                yield self._decode_case(buffer, offset)
+            elif frame_type == END:
+                self.ended = True
+            else:
+                error_message = f"unknown record type {frame_type}"
+                raise ValueError(error_message)
+            offset = end
+
+    def _decode_suite(self, buffer: memoryview, offset: int) -> TestSuite:
+        strings = self._strings
+        header: tuple[int, ...] = _SUITE_HEADER.unpack_from(buffer, offset)
+        (
+            name,
+            hostname,
+            id_,
+            package,
+            file,
+            log,
+            url,
+            timestamp_text,
+            timestamp,
+            n_properties,
+        ) = header
+        offset += _SUITE_HEADER.size
+        properties: dict[str, str] = {}
+        for _ in range(n_properties):
+            key, offset = self._text(buffer, offset)
+            value, offset = self._text(buffer, offset)
+            properties[key or ""] = value or ""
+        stdout, offset = self._output(buffer, offset)
+        stderr, offset = self._output(buffer, offset)
+        return TestSuite(
+            strings[name] or "",
+            hostname=strings[hostname],
+            id=strings[id_],
+            package=strings[package],
+            timestamp=strings[timestamp_text] or timestamp or None,
+            properties=properties or None,
+            file=strings[file],
+            log=strings[log],
+            url=strings[url],
+            stdout=stdout,
+            stderr=stderr,
+        )
+
+    def _decode_case(self, buffer: memoryview, offset: int) -> tuple[str, TestCase]:
+        strings = self._strings
+        header: tuple[
+            int,
+            int,
+            int,
+            int,
+            int,
+            int,
+            int,
+            int,
+            int,
+            float,
+            int,
+            int,
+            int,
+            int,
+            int,
+            int,
+        ] = _CASE_HEADER.unpack_from(buffer, offset)
+        (
+            suite,
+            classname,
+            status,
+            category,
+            file,
+            line,
+            log,
+            url,
+            timestamp_text,
+            elapsed_sec,
+            assertions,
+            timestamp,
+            flags,
+            n_failures,
+            n_errors,
+            n_skipped,
+        ) = header
+        offset += _CASE_HEADER.size
+        name, offset = self._text(buffer, offset)
+        case = TestCase(
+            name or "",
+            classname=strings[classname],
+            elapsed_sec=None if math.isnan(elapsed_sec) else elapsed_sec,
+            assertions=None if assertions < 0 else assertions,
+            timestamp=strings[timestamp_text] or timestamp or None,
+            status=strings[status],
+            category=strings[category],
+            file=strings[file],
+            line=strings[line],
+            log=strings[log],
+            url=strings[url],
+            allow_multiple_subelements=bool(flags & _MULTIPLE_SUBELEMENTS),
+        )
+        case.is_enabled = bool(flags & _ENABLED)
+        for infos, count in ((case.failures, n_failures), (case.errors, n_errors)):
+            for _ in range(count):
+                (info_type,) = _UINT32.unpack_from(buffer, offset)
+                message, offset = self._text(buffer, offset + _UINT32.size)
+                output, offset = self._output(buffer, offset)
+                infos.append(
+                    {"message": message, "output": output, "type": strings[info_type]}
+                )
+        for _ in range(n_skipped):
+            message, offset = self._text(buffer, offset)
+            output, offset = self._output(buffer, offset)
+            case.skipped.append({"message": message, "output": output})
+        case.stdout, offset = self._output(buffer, offset)
+        case.stderr, offset = self._output(buffer, offset)
+        return strings[suite] or "", case
@@ -0,0 +1,74 @@
+"""Removal of the characters which are not allowed in XML documents."""
+
+import sys
+from functools import cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import re
+
+_ILLEGAL_UNICHRS = [
+    (0x00, 0x08),
+    (0x0B, 0x1F),
+    (0x7F, 0x84),
+    (0x86, 0x9F),
+    (0xD800, 0xDFFF),
+    (0xFDD0, 0xFDDF),
+    (0xFFFE, 0xFFFF),
+    (0x1FFFE, 0x1FFFF),
+    (0x2FFFE, 0x2FFFF),
+    (0x3FFFE, 0x3FFFF),
+    (0x4FFFE, 0x4FFFF),
+    (0x5FFFE, 0x5FFFF),
+    (0x6FFFE, 0x6FFFF),
+    (0x7FFFE, 0x7FFFF),
+    (0x8FFFE, 0x8FFFF),
+    (0x9FFFE, 0x9FFFF),
+    (0xAFFFE, 0xAFFFF),
+    (0xBFFFE, 0xBFFFF),
+    (0xCFFFE, 0xCFFFF),
+    (0xDFFFE, 0xDFFFF),
+    (0xEFFFE, 0xEFFFF),
+    (0xFFFFE, 0xFFFFF),
+    (0x10FFFE, 0x10FFFF),
+]
+
+
+@cache
+def illegal_xml_re() -> "re.Pattern[str]":
+    """Compile the pattern on first use, not when the package is imported."""
+    import re  # noqa: PLC0415
+
+    return re.compile(
+        "[{}]".format(
+            "".join(
+                f"{chr(low)}-{chr(high)}"
+                for (low, high) in _ILLEGAL_UNICHRS
+                if low < sys.maxunicode
+            )
+        )
+    )
+
+
+def has_illegal_xml_chars(string_to_check: str) -> bool:
+    """Return whether the string has characters which are illegal in XML."""
+    # ASCII text without control characters other than tab and newline is
+    # checked without the pattern, which is slow on long strings
+    if (
+        string_to_check.isascii()
+        and string_to_check.replace("\n", "").replace("\t", "").isprintable()
+    ):
+        return False
+    return illegal_xml_re().search(string_to_check) is not None
+
+
+def clean_illegal_xml_chars(string_to_clean: str) -> str:
+    """
+    Remove any illegal unicode characters from the given XML string.
+
+    The pattern is compiled once, the function is called for every chunk
+    of a streamed document.
+
+    @see: http://stackoverflow.com/questions/1707890/fast-way-to-filter-illegal-xml-unicode-chars-in-python
+    """
+    return illegal_xml_re().sub("", string_to_clean)
@@ -0,0 +1,1064 @@
+"""Test suites and their serialization into a JUnit XML document."""
+
+import codecs
+import copy
+import itertools
+import math
+import threading
+import time
+import warnings
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from functools import cache
+from heapq import merge
+from typing import TYPE_CHECKING, Generic, Literal, Protocol, TextIO, TypeVar
+
+from junit_xml._case import CaseTemplate, TestCase, case_attributes, case_children
+from junit_xml._output import (
+    CHUNK_SIZE,
+    Hasher,
+    OutputSource,
+    check_errors,
+    decode,
+    iter_output,
+    read_output,
+)
+from junit_xml._sanitize import clean_illegal_xml_chars
+from junit_xml._timestamps import Timestamp, format_timestamp
+from junit_xml.budget import TRUNCATED_PROPERTY
+from junit_xml.dialects import Dialect, get_dialect
+from junit_xml.statistics import SuiteStatistics, SuiteSummary
+
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
+
+    from junit_xml.budget import Budget
+    from junit_xml.redaction import Redactor
+    from junit_xml.validator import ReportValidator
+
+_T = TypeVar("_T")
+
+
+class _ThreadBuffers(Generic[_T]):
+    """
+    Per-thread lists of items, appended to without taking a lock.
+
+    Every item gets a global sequence number, so draining the buffers
+    gives the items in the order they were appended by all the threads.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._buffers: list[list[tuple[int, _T]]] = []
+        self._sequence = itertools.count()
+
+    def append(self, item: _T) -> None:
+        try:
+            buffer: list[tuple[int, _T]] = self._local.buffer
+        except AttributeError:
+            buffer = self._local.buffer = []
+            with self._lock:
+                self._buffers.append(buffer)
+        buffer.append((next(self._sequence), item))
+
+    def drain(self) -> list[_T]:
+        """Remove and return the appended items in order."""
+        with self._lock:
+            drained: list[list[tuple[int, _T]]] = []
+            for buffer in self._buffers:
+                # items appended while draining stay for the next drain
+                size = len(buffer)
+                drained.append(buffer[:size])
+                del buffer[:size]
+        return [item for _, item in merge(*drained, key=lambda entry: entry[0])]
+
+
+_THREAD_BUFFERS_LOCK = threading.Lock()
+
+
+class CaseStore(Protocol):
+    """
+    Storage of the test cases added to a suite, instead of its test_cases.
+
+    It keeps the running totals of the cases it holds in counters, which
+    are not counted again when the report is written. Can be added to from
+    many threads at once.
+    """
+
+    counters: "SuiteCounters"
+
+    def add(self, test_case: TestCase) -> None:
+        """Store a test case."""
+        ...
+
+    def __iter__(self) -> Iterator[TestCase]:
+        """Yield the stored test cases in the order they were added."""
+        ...
+
+    def __len__(self) -> int:
+        """Return the number of stored test cases."""
+        ...
+
+
+def case_order_key(case: "TestCase") -> tuple[str, str]:
+    """Return the key test cases are sorted by, classname and name."""
+    return (decode(case.classname or ""), decode(case.name))
+
+
+def suite_order_key(suite: "TestSuite") -> tuple[str, ...]:
+    """Return the key test suites are sorted by in a canonical document."""
+    return tuple(
+        decode(value or "")
+        for value in (suite.name, suite.package, suite.id, suite.hostname)
+    )
+
+
+class TestSuite:
+    """
+    Suite of test cases.
+
+    Can handle unicode strings or binary strings if their encoding is provided.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        test_cases: "list[TestCase] | None" = None,
+        hostname: str | None = None,
+        id: int | str | None = None,  # noqa: A002
+        package: str | None = None,
+        timestamp: Timestamp | None = None,
+        properties: dict[str, str] | None = None,
+        file: str | None = None,
+        log: str | None = None,
+        url: str | None = None,
+        stdout: OutputSource | None = None,
+        stderr: OutputSource | None = None,
+        test_case_order: Literal["insertion", "classname"] = "insertion",
+        statistics: bool = False,
+        slowest: int = 10,
+    ) -> None:
+        self.name = name
+        if not test_cases:
+            test_cases = []
+        try:
+            iter(test_cases)
+        except TypeError as e:
+            error_message = "test_cases must be a list of test cases"
+            raise TypeError(error_message) from e
+        self.test_cases = test_cases
+        self.timestamp = timestamp
+        self.hostname = hostname
+        self.id = id
+        self.package = package
+        self.file = file
+        self.log = log
+        self.url = url
+        self.stdout = stdout
+        self.stderr = stderr
+        self.properties = properties
+        self.test_case_order = test_case_order
+        # written as properties, see junit_xml.statistics
+        self.statistics = statistics
+        self.slowest = slowest
+        self._thread_buffers: _ThreadBuffers[TestCase] | None = None
+        # where add_test_case() puts the cases if set, e.g. by SpillingTestSuite
+        self.case_store: CaseStore | None = None
+
+    def add_test_case(self, test_case: "TestCase") -> None:
+        """
+        Add a test case to the suite, can be called from many threads at once.
+
+        Every thread appends to its own buffer, the buffers are merged into
+        test_cases by merge_test_cases() when the report is built. A suite
+        with a case_store adds the test case to the store instead.
+        """
+        if self.case_store is not None:
+            self.case_store.add(test_case)
+            return
+        thread_buffers = self._thread_buffers
+        if thread_buffers is None:
+            with _THREAD_BUFFERS_LOCK:
+                if self._thread_buffers is None:
+                    self._thread_buffers = _ThreadBuffers()
+                thread_buffers = self._thread_buffers
+        thread_buffers.append(test_case)
+
+    def merge_test_cases(self) -> None:
+        """
+        Merge the test cases added from the threads into test_cases.
+
+        The cases are kept in insertion order or sorted by classname and name,
+        as set by test_case_order.
+        """
+        if self._thread_buffers is not None:
+            self.test_cases.extend(self._thread_buffers.drain())
+        if self.test_case_order == "classname":
+            self.test_cases.sort(key=case_order_key)
+
+    def iter_test_cases(self) -> Iterator["TestCase"]:
+        """Yield the test cases, those of test_cases then the stored ones."""
+        yield from self.test_cases
+        if self.case_store is not None:
+            yield from self.case_store
+
+    def has_test_cases(self) -> bool:
+        """Return whether the suite has any test case."""
+        return bool(self.test_cases or self.case_store)
+
+    def summary(self) -> SuiteSummary:
+        """
+        Return the statistics of the test cases, see junit_xml.statistics.
+
+        They are collected in a single pass over the test cases, the stored
+        ones aren't read again if their statistics have been collected.
+        """
+        self.merge_test_cases()
+        counters = SuiteCounters(SuiteStatistics(self.slowest))
+        for case in self.test_cases:
+            counters.add(case)
+        store = self.case_store
+        if store is not None:
+            if store.counters.statistics is not None:
+                counters.add_counters(store.counters)
+            else:
+                for case in store:
+                    counters.add(case)
+        return counters.summary()
+
+    def build_xml_doc(self) -> "ET.Element":
+        """
+        Build the XML document for the JUnit test suite.
+
+        Produces clean unicode strings and decodes non-unicode
+        with the help of encoding.
+        @param encoding: Used to decode encoded strings.
+        @return: XML document with unicode string elements
+        """
+        import xml.etree.ElementTree as ET  # noqa: PLC0415
+
+        self.merge_test_cases()
+
+        # build the test suite element
+        counters = count_suite(self)
+        xml_element = ET.Element("testsuite", counters.attributes(self))
+
+        # add any properties
+        properties = suite_properties(self, counters)
+        if properties:
+            props_element = ET.SubElement(xml_element, "properties")
+            for k, v in properties:
+                attrs = {"name": k, "value": v}
+                ET.SubElement(props_element, "property", attrs)
+
+        # add test suite stdout
+        if self.stdout:
+            stdout_element = ET.SubElement(xml_element, "system-out")
+            stdout_element.text = read_output(self.stdout)
+
+        # add test suite stderr
+        if self.stderr:
+            stderr_element = ET.SubElement(xml_element, "system-err")
+            stderr_element.text = read_output(self.stderr)
+
+        # test cases
+        for case in self.iter_test_cases():
+            test_case_element = ET.SubElement(
+                xml_element, "testcase", case_attributes(case, self.timestamp)
+            )
+            for tag, attrs, output in case_children(case):
+                child_element = ET.SubElement(test_case_element, tag, attrs)
+                if output:
+                    child_element.text = read_output(output)
+
+        return xml_element
+
+    @staticmethod
+    def to_xml_string(
+        test_suites: "list[TestSuite]",
+        prettyprint: bool = True,
+        encoding: str | None = None,
+    ) -> str:
+        """
+        Return the string representation of the JUnit XML document.
+
+        @param encoding: The encoding of the input.
+        @return: unicode string
+        """
+        warnings.warn(
+            "Testsuite.to_xml_string is deprecated. "
+            "It will be removed in version 2.0.0. "
+            "Use function to_xml_report_string",
+            DeprecationWarning,
+        )
+        return to_xml_report_string(test_suites, prettyprint, encoding)
+
+    @staticmethod
+    def to_file(
+        file_descriptor: TextIO,
+        test_suites: "list[TestSuite]",
+        prettyprint: bool = True,
+        encoding: str | None = None,
+    ) -> None:
+        """Write the JUnit XML document to a file."""
+        warnings.warn(
+            "Testsuite.to_file is deprecated. "
+            "It will be removed in version 2.0.0. "
+            "Use function to_xml_report_file",
+            DeprecationWarning,
+        )
+        to_xml_report_file(file_descriptor, test_suites, prettyprint, encoding)
+
+
+def to_xml_report_string(
+    test_suites: list[TestSuite],
+    prettyprint: bool = True,
+    encoding: str | None = None,
+    dialect: str | Dialect | None = None,
+    canonical: bool = False,
+    errors: str = "replace",
+    redactor: "Redactor | None" = None,
+) -> str:
+    """
+    Return the string representation of the JUnit XML document.
+
+    @param encoding: The encoding of the input.
+    @param dialect: Fields written for a CI system, see junit_xml.dialects.
+    @param canonical: Write the canonical form, see XmlStreamWriter.
+    @param errors: Error policy for invalid bytes of the outputs, one of
+        junit_xml._output.ERROR_POLICIES.
+    @param redactor: Replaces secrets, see junit_xml.redaction.
+    @return: unicode string
+    """
+    try:
+        iter(test_suites)
+    except TypeError as e:
+        error_message = "test_suites must be a list of test suites"
+        raise TypeError(error_message) from e
+
+    if canonical:
+        # minidom isn't involved, it would only add another formatting
+        writer = XmlStreamWriter(
+            prettyprint,
+            encoding,
+            dialect,
+            canonical=True,
+            errors=errors,
+            redactor=redactor,
+        )
+        return "".join(writer.iter_report(test_suites))
+
+    # the compact document, prettyprint is done by minidom below
+    writer = XmlStreamWriter(
+        prettyprint=False,
+        encoding=encoding,
+        dialect=dialect,
+        errors=errors,
+        redactor=redactor,
+    )
+    xml_string = "".join(writer.iter_report(test_suites))
+    # is unicode now
+
+    if prettyprint:
+        import xml.dom.minidom  # noqa: PLC0415
+
+        # minidom.parseString() works just on correctly encoded binary strings
+        xml_string = xml_string.encode(encoding or "utf-8")
+        xml_string = xml.dom.minidom.parseString(xml_string)
+        # toprettyxml() produces unicode if no encoding is being passed
+        # or binary string with an encoding
+        xml_string = xml_string.toprettyxml(encoding=encoding)
+        if not isinstance(xml_string, str):
+            xml_string = xml_string.decode(encoding or "utf-8")
+        # is unicode now
+    return xml_string
+
+
+def to_xml_report_file(
+    file_descriptor: TextIO,
+    test_suites: list[TestSuite],
+    prettyprint: bool = True,
+    encoding: str | None = None,
+    validate: bool = False,
+    dialect: str | Dialect | None = None,
+    canonical: bool = False,
+    hasher: Hasher | None = None,
+    errors: str = "replace",
+    redactor: "Redactor | None" = None,
+    budget: "Budget | None" = None,
+) -> bool:
+    """
+    Write the JUnit XML document to a file.
+
+    The document is streamed to the file, lazy outputs of the test cases
+    are read in chunks while they are being written. Outputs in bytes are
+    decoded chunk by chunk too, with the error policy errors for invalid
+    bytes, see OutputSource. With validate, the
+    chunks are checked by junit_xml.validator as they are written, and a
+    ValueError listing the problems is raised once the document is written.
+    It's a debugging aid, writing takes about 1.5 times as long with it.
+    The fields written for a CI system are chosen by dialect, see
+    junit_xml.dialects.
+
+    With canonical the document is written in its canonical form, see
+    XmlStreamWriter, so the same results give the same bytes. A hasher,
+    e.g. hashlib.sha256(), is updated with the encoded document while it
+    is written, its digest identifies the content of the report.
+
+    A redactor replaces secrets in the values and texts of the document,
+    outputs included, while it is written, see junit_xml.redaction.
+
+    With a budget, the document is cut short once the budget runs out or is
+    cancelled, see junit_xml.budget. The test cases are spooled then, like
+    by XmlReportWriter, to write the totals of what was written. Copying
+    the spool to the file can't be cut short anymore, its estimated time
+    is kept from the budget while spooling.
+
+    @return: whether the document is complete, False if it was cut short
+    """
+    try:
+        iter(test_suites)
+    except TypeError as e:
+        error_message = "test_suites must be a list of test suites"
+        raise TypeError(error_message) from e
+
+    writer = XmlStreamWriter(
+        prettyprint, encoding, dialect, canonical, errors, redactor
+    )
+    write = file_descriptor.write
+    if validate or hasher:
+        output = ReportOutput(write, writer, validate, hasher)
+        write = output.write
+    else:
+        output = None
+    if budget is None:
+        for chunk in writer.iter_report(test_suites):
+            write(chunk)
+        complete = True
+    else:
+        complete = _write_budgeted_report(write, writer, test_suites, budget)
+    if output is not None:
+        output.close()
+    return complete
+
+
+def _write_budgeted_report(
+    write: Callable[[str], object],
+    writer: "XmlStreamWriter",
+    test_suites: "Iterable[TestSuite]",
+    budget: "Budget",
+) -> bool:
+    """Write a document until the budget runs out, return whether it's complete."""
+    import tempfile  # noqa: PLC0415
+
+    test_suites = list(test_suites)
+    canonical = writer.canonical
+    if canonical:
+        test_suites.sort(key=suite_order_key)
+    # the suites with their counters and the length of their spooled cases
+    written: list[tuple[TestSuite, SuiteCounters, int]] = []
+    reason = None
+    # the time writing the spool took, reading it and writing the file takes
+    # about twice as long, that is kept from the budget
+    spool_time = 0.0
+    with tempfile.SpooledTemporaryFile(
+        max_size=1024 * 1024, mode="w+", encoding="utf-8"
+    ) as spool:
+        for suite in test_suites:
+            # checked before every suite and every test case
+            reason = budget.exceeded(2 * spool_time)
+            if reason is not None:
+                break
+            suite.merge_test_cases()
+            counters = suite_counters(suite)
+            cases = suite.iter_test_cases()
+            if canonical:
+                cases = iter(sorted(cases, key=case_order_key))
+            length = 0
+            for case in cases:
+                reason = budget.exceeded(2 * spool_time)
+                if reason is not None:
+                    break
+                counters.add(case)
+                for chunk in writer.iter_case(case, 2, suite.timestamp):
+                    start = time.perf_counter()
+                    spool.write(chunk)
+                    spool_time += time.perf_counter() - start
+                    length += len(chunk)
+            written.append((suite, counters, length))
+            if reason is not None:
+                break
+        if reason is not None:
+            # the marker goes to the last suite written, the first suite is
+            # written without test cases if the budget ran out before it
+            if not written:
+                first = test_suites[0]
+                first.merge_test_cases()
+                written.append((first, suite_counters(first), 0))
+            suite, counters, length = written[-1]
+            part = copy.copy(suite)
+            part.properties = {**(suite.properties or {}), TRUNCATED_PROPERTY: reason}
+            written[-1] = (part, counters, length)
+
+        suites_attributes = [
+            counters.attributes(suite, canonical) for suite, counters, _ in written
+        ]
+        root_attributes = root_element_attributes(suites_attributes, canonical)
+        write(writer.declaration())
+        if not written:
+            write(writer.root_start_tag(root_attributes) + writer.empty_end)
+            return True
+        write(writer.root_start_tag(root_attributes) + ">" + writer.newline)
+        spool.seek(0)
+        for (suite, counters, spooled), attributes in zip(
+            written, suites_attributes, strict=True
+        ):
+            start = writer.suite_start_tag(attributes, 1)
+            children = writer.has_suite_children(suite, counters)
+            if not (children or spooled):
+                write(start + writer.empty_end)
+                continue
+            write(start + ">" + writer.newline)
+            if children:
+                for chunk in writer.iter_suite_children(suite, 1, counters):
+                    write(chunk)
+            remaining = spooled
+            while remaining:
+                chunk = spool.read(min(remaining, CHUNK_SIZE))
+                write(chunk)
+                remaining -= len(chunk)
+            write(writer.end_tag("testsuite", 1))
+        write(writer.end_tag("testsuites", 0))
+    return reason is None
+
+
+def _report_validator() -> "ReportValidator":
+    """Return a new validator, its module is imported on first use."""
+    from junit_xml.validator import ReportValidator  # noqa: PLC0415
+
+    return ReportValidator()
+
+
+class ReportOutput:
+    """
+    Write function of a document which validates and hashes it on the way.
+
+    The chunks are validated by junit_xml.validator if validate is set, and
+    hashed with the hasher encoded like the document.
+    """
+
+    __slots__ = ("_encoding", "_file_write", "_hasher", "_validator")
+
+    def __init__(
+        self,
+        write: Callable[[str], object],
+        writer: "XmlStreamWriter",
+        validate: bool,
+        hasher: Hasher | None,
+    ) -> None:
+        self._file_write = write
+        self._hasher = hasher
+        self._encoding = writer.charref_encoding or "utf-8"
+        self._validator = _report_validator() if validate else None
+
+    def write(self, chunk: str) -> None:
+        """Write a chunk of the document."""
+        self._file_write(chunk)
+        if self._validator is not None:
+            self._validator.write(chunk)
+        if self._hasher is not None:
+            self._hasher.update(chunk.encode(self._encoding))
+
+    def close(self) -> None:
+        """Raise a ValueError if the document isn't valid."""
+        if self._validator is not None:
+            self._validator.check()
+
+
+def suite_counters(suite: "TestSuite") -> "SuiteCounters":
+    """Return new counters of a suite, collecting statistics if it has them."""
+    return SuiteCounters(SuiteStatistics(suite.slowest) if suite.statistics else None)
+
+
+def count_suite(suite: "TestSuite") -> "SuiteCounters":
+    """Return the counters of the test cases of a suite."""
+    counters = suite_counters(suite)
+    # a single pass over the test cases for all the counters, the stored ones
+    # have been counted when they were added
+    for c in suite.test_cases:
+        counters.add(c)
+    if suite.case_store is not None:
+        counters.add_counters(suite.case_store.counters)
+    return counters
+
+
+def suite_properties(
+    suite: "TestSuite", counters: "SuiteCounters | None" = None
+) -> list[tuple[str, str]]:
+    """Return the decoded properties of a suite, with its statistics if any."""
+    properties = [(decode(k), decode(v)) for k, v in (suite.properties or {}).items()]
+    if counters is not None and counters.statistics is not None:
+        properties.extend(counters.summary().properties().items())
+    return properties
+
+
+def _micros_text(micros: int) -> str:
+    """Format a time in microseconds like the times of the test cases."""
+    seconds, micros = divmod(micros, 1_000_000)
+    return f"{seconds}.{micros:06d}"
+
+
+class SuiteCounters:
+    """Running totals of the test cases of a suite."""
+
+    __slots__ = (
+        "assertions",
+        "disabled",
+        "elapsed_micros",
+        "elapsed_sec",
+        "errors",
+        "failures",
+        "has_assertions",
+        "skipped",
+        "statistics",
+        "tests",
+    )
+
+    def __init__(self, statistics: SuiteStatistics | None = None) -> None:
+        self.assertions = self.disabled = self.errors = 0
+        self.failures = self.skipped = self.tests = 0
+        self.has_assertions = False
+        self.elapsed_sec: float = 0
+        # the exact sum for the canonical form, a sum of floats depends on order
+        self.elapsed_micros = 0
+        self.statistics = statistics
+
+    def add(self, c: "TestCase") -> None:
+        """Count a test case of the suite."""
+        self.tests += 1
+        if c.assertions:
+            self.has_assertions = True
+            self.assertions += int(c.assertions)
+        if not c.is_enabled:
+            self.disabled += 1
+        if c.is_error():
+            self.errors += 1
+        if c.is_failure():
+            self.failures += 1
+        if c.is_skipped():
+            self.skipped += 1
+        if c.elapsed_sec:
+            self.elapsed_sec += c.elapsed_sec
+            if math.isfinite(c.elapsed_sec):
+                self.elapsed_micros += round(c.elapsed_sec * 1_000_000)
+        if self.statistics is not None:
+            self.statistics.add(c)
+
+    def add_counters(self, other: "SuiteCounters") -> None:
+        """Count the test cases counted by other."""
+        self.assertions += other.assertions
+        self.disabled += other.disabled
+        self.errors += other.errors
+        self.failures += other.failures
+        self.skipped += other.skipped
+        self.tests += other.tests
+        self.has_assertions = self.has_assertions or other.has_assertions
+        self.elapsed_sec += other.elapsed_sec
+        self.elapsed_micros += other.elapsed_micros
+        if self.statistics is not None and other.statistics is not None:
+            self.statistics.add_statistics(other.statistics)
+
+    def summary(self) -> SuiteSummary:
+        """Return the statistics of the counted test cases."""
+        statistics = self.statistics or SuiteStatistics()
+        return statistics.summary(self.tests, self.failures, self.errors, self.skipped)
+
+    def attributes(self, suite: "TestSuite", canonical: bool = False) -> dict[str, str]:
+        """
+        Return the attributes of the testsuite element.
+
+        The canonical time has the 6 decimals of the times of the test cases.
+        """
+        test_suite_attributes: dict[str, str] = {}
+        if self.has_assertions:
+            test_suite_attributes["assertions"] = str(self.assertions)
+        test_suite_attributes["disabled"] = str(self.disabled)
+        test_suite_attributes["errors"] = str(self.errors)
+        test_suite_attributes["failures"] = str(self.failures)
+        test_suite_attributes["name"] = decode(suite.name)
+        test_suite_attributes["skipped"] = str(self.skipped)
+        test_suite_attributes["tests"] = str(self.tests)
+        test_suite_attributes["time"] = (
+            _micros_text(self.elapsed_micros) if canonical else str(self.elapsed_sec)
+        )
+
+        if suite.hostname:
+            test_suite_attributes["hostname"] = decode(suite.hostname)
+        if suite.id:
+            test_suite_attributes["id"] = decode(suite.id)
+        if suite.package:
+            test_suite_attributes["package"] = decode(suite.package)
+        if suite.timestamp:
+            test_suite_attributes["timestamp"] = format_timestamp(suite.timestamp)
+        if suite.file:
+            test_suite_attributes["file"] = decode(suite.file)
+        if suite.log:
+            test_suite_attributes["log"] = decode(suite.log)
+        if suite.url:
+            test_suite_attributes["url"] = decode(suite.url)
+        return test_suite_attributes
+
+
+def root_element_attributes(
+    suites_attributes: Iterable[dict[str, str]], canonical: bool = False
+) -> dict[str, str]:
+    """
+    Return the attributes of the testsuites element, totals of the suites.
+
+    All the totals are returned, the dialect decides which are written. The
+    canonical time is the exact sum of the canonical times of the suites.
+    """
+    attributes: dict[str, int | float] = defaultdict(int)
+    for ts_attributes in suites_attributes:
+        if "assertions" in ts_attributes:
+            attributes["assertions"] += int(ts_attributes["assertions"])
+        for key in ["disabled", "errors", "failures", "skipped", "tests"]:
+            attributes[key] += int(ts_attributes.get(key, 0))
+        if canonical:
+            attributes["time"] += int(ts_attributes["time"].replace(".", ""))
+        else:
+            attributes["time"] += float(ts_attributes.get("time", 0))
+    texts = {key: str(value) for key, value in attributes.items()}
+    if canonical and "time" in attributes:
+        texts["time"] = _micros_text(int(attributes["time"]))
+    return {
+        key: texts[key]
+        for key in [
+            *["assertions", "disabled", "errors", "failures", "skipped", "tests"],
+            "time",
+        ]
+        if key in texts
+    }
+
+
+@cache
+def _minidom_escapes_whitespace() -> bool:
+    """Return whether minidom writes newlines in attributes as references."""
+    import xml.dom.minidom  # noqa: PLC0415
+
+    element = xml.dom.minidom.Document().createElement("a")
+    element.setAttribute("b", "\n")
+    return "&#10;" in element.toxml()
+
+
+class XmlStreamWriter:
+    """
+    Serializer of test suites into a stream of XML text chunks.
+
+    Values are sanitized and escaped chunk by chunk, so the document never has
+    to be held in memory. The compact output matches ElementTree.tostring(),
+    the pretty one matches minidom's toprettyxml(), except for carriage
+    returns in attribute values: they are removed like the other control
+    characters, where ElementTree writes &#13; and minidom a literal one.
+    Newlines and tabs in attribute values are written as &#10; and &#09; in
+    the compact output, and in the pretty one the way minidom of the running
+    Python writes them: older versions write them literally, which parsers
+    read back as spaces. The fields which are written are those of the
+    dialect, see junit_xml.dialects.
+
+    The canonical form depends on the results only, not on the order they
+    were added in: the suites are sorted by name, package, id and hostname,
+    the test cases by classname and name, the properties by name. The times
+    of the suites are exact sums with 6 decimals, like the times of the test
+    cases. The whitespace between the elements is that of prettyprint, the
+    pretty document isn't reformatted by minidom.
+
+    A redactor replaces secrets in the same pass that removes the characters
+    which are illegal in XML, see junit_xml.redaction.
+    """
+
+    def __init__(
+        self,
+        prettyprint: bool = False,
+        encoding: str | None = None,
+        dialect: str | Dialect | None = None,
+        canonical: bool = False,
+        errors: str = "replace",
+        redactor: "Redactor | None" = None,
+    ) -> None:
+        self.prettyprint = prettyprint
+        self.encoding = encoding
+        self.dialect = get_dialect(dialect)
+        self.canonical = canonical
+        # how invalid bytes of the outputs are decoded
+        self.errors = check_errors(errors)
+        self.redactor = redactor
+        self.clean = clean_illegal_xml_chars if redactor is None else redactor.sub
+        # newlines and tabs in attribute values become character references
+        self.escape_whitespace = not prettyprint or _minidom_escapes_whitespace()
+        self.newline = "\n" if prettyprint else ""
+        self.empty_end = "/>\n" if prettyprint else " />"
+        # characters which the target encoding can't represent become
+        # character references, like ElementTree and minidom do it
+        charref_encoding = encoding or (None if prettyprint else "us-ascii")
+        if charref_encoding and codecs.lookup(charref_encoding).name == "utf-8":
+            charref_encoding = None
+        self.charref_encoding = charref_encoding
+        # the escaped attribute values of the case templates by their id
+        self._templates: dict[int, tuple[CaseTemplate, dict[str, tuple[str, str]]]] = {}
+
+    def iter_report(self, test_suites: "Iterable[TestSuite]") -> Iterator[str]:
+        """Yield the chunks of the whole document with a testsuites root."""
+        test_suites = list(test_suites)
+        for ts in test_suites:
+            ts.merge_test_cases()
+        canonical = self.canonical
+        if canonical:
+            test_suites.sort(key=suite_order_key)
+        suites = [(ts, count_suite(ts)) for ts in test_suites]
+        suites_attributes = [
+            counters.attributes(ts, canonical) for ts, counters in suites
+        ]
+        root_attributes = root_element_attributes(suites_attributes, canonical)
+
+        yield self.declaration()
+        if not suites:
+            yield self.root_start_tag(root_attributes) + self.empty_end
+            return
+        yield self.root_start_tag(root_attributes) + ">" + self.newline
+        for (ts, counters), ts_attributes in zip(
+            suites, suites_attributes, strict=True
+        ):
+            yield from self.iter_suite(ts, ts_attributes, 1, counters)
+        yield self.end_tag("testsuites", 0)
+
+    def iter_suite(
+        self,
+        suite: "TestSuite",
+        attributes: dict[str, str],
+        level: int,
+        counters: SuiteCounters | None = None,
+    ) -> Iterator[str]:
+        """
+        Yield the chunks of one testsuite element.
+
+        The statistics of the counters are written as properties if it has
+        any, see junit_xml.statistics.
+        """
+        start = self.suite_start_tag(attributes, level)
+        if not (self.has_suite_children(suite, counters) or suite.has_test_cases()):
+            yield start + self.empty_end
+            return
+        yield start + ">" + self.newline
+        yield from self.iter_suite_children(suite, level, counters)
+        cases = suite.iter_test_cases()
+        if self.canonical:
+            cases = iter(sorted(cases, key=case_order_key))
+        for case in cases:
+            yield from self.iter_case(case, level + 1, suite.timestamp)
+        yield self.end_tag("testsuite", level)
+
+    def has_suite_children(
+        self, suite: "TestSuite", counters: SuiteCounters | None = None
+    ) -> bool:
+        """Return whether the suite has children of its own which are written."""
+        dialect = self.dialect
+        statistics = counters is not None and counters.statistics is not None
+        return bool(
+            (dialect.properties and (suite.properties or statistics))
+            or (dialect.suite_outputs and (suite.stdout or suite.stderr))
+        )
+
+    def iter_suite_children(
+        self, suite: "TestSuite", level: int, counters: SuiteCounters | None = None
+    ) -> Iterator[str]:
+        """
+        Yield the chunks of the suite's own children, without the cases.
+
+        The statistics of the counters are written as properties if it has
+        any.
+        """
+        yield from self.iter_suite_properties(suite, level, counters)
+        yield from self.iter_suite_outputs(suite, level)
+
+    def iter_suite_properties(
+        self, suite: "TestSuite", level: int, counters: SuiteCounters | None = None
+    ) -> Iterator[str]:
+        """Yield the chunks of the properties element of the suite, if any."""
+        properties = (
+            suite_properties(suite, counters) if self.dialect.properties else []
+        )
+        if properties:
+            if self.canonical:
+                properties.sort()
+            yield self.start_tag("properties", {}, level + 1) + ">" + self.newline
+            yield "".join(
+                self.start_tag("property", {"name": k, "value": v}, level + 2)
+                + self.empty_end
+                for k, v in properties
+            )
+            yield self.end_tag("properties", level + 1)
+
+    def iter_suite_outputs(self, suite: "TestSuite", level: int) -> Iterator[str]:
+        """Yield the chunks of the system-out and system-err of the suite."""
+        if not self.dialect.suite_outputs:
+            return
+        if suite.stdout:
+            yield from self.iter_text_element("system-out", {}, suite.stdout, level + 1)
+        if suite.stderr:
+            yield from self.iter_text_element("system-err", {}, suite.stderr, level + 1)
+
+    def iter_case(
+        self, case: "TestCase", level: int, base: Timestamp | None = None
+    ) -> Iterator[str]:
+        """
+        Yield the chunks of one testcase element.
+
+        A relative timestamp of the test case is added to base, the timestamp
+        of its suite.
+        """
+        attributes = self.dialect.case_attributes(case, base)
+        start = self.case_start_tag(case, attributes, level)
+        children = case_children(case)
+        if not children:
+            yield start + self.empty_end
+            return
+        yield start + ">" + self.newline
+        for tag, attributes, output in children:
+            yield from self.iter_text_element(tag, attributes, output, level + 1)
+        yield self.end_tag("testcase", level)
+
+    def iter_text_element(
+        self,
+        tag: str,
+        attributes: dict[str, str],
+        output: OutputSource | None,
+        level: int,
+    ) -> Iterator[str]:
+        """Yield the chunks of an element whose text is streamed from output."""
+        start = self.start_tag(tag, attributes, level)
+        if output:
+            texts = iter_output(output, self.errors)
+            if self.redactor is None:
+                chunks = (self.text(chunk) for chunk in texts)
+            else:
+                # secrets split between chunks are found too
+                texts = self.redactor.iter_redacted(texts)
+                chunks = (self.escape_text(chunk) for chunk in texts)
+            for chunk in chunks:
+                if chunk:
+                    yield start + ">" + chunk
+                    yield from chunks
+                    yield f"</{tag}>{self.newline}"
+                    return
+        yield start + self.empty_end
+
+    def declaration(self) -> str:
+        """Return the XML declaration the document starts with."""
+        if self.prettyprint:
+            if self.encoding is None:
+                return '<?xml version="1.0" ?>\n'
+            return f'<?xml version="1.0" encoding="{self.encoding}"?>\n'
+        if self.encoding and self.encoding.lower() not in (
+            "utf-8",
+            "us-ascii",
+            "unicode",
+        ):
+            return f"<?xml version='1.0' encoding='{self.encoding}'?>\n"
+        return ""
+
+    def start_tag(self, tag: str, attributes: dict[str, str], level: int) -> str:
+        """Return the unclosed start tag of an element with its attributes."""
+        indent = "\t" * level if self.prettyprint else ""
+        attrs = "".join(
+            f' {key}="{self.attribute(value)}"' for key, value in attributes.items()
+        )
+        return f"{indent}<{tag}{attrs}"
+
+    def root_start_tag(self, attributes: dict[str, str]) -> str:
+        """Return the start tag of the testsuites element, as of the dialect."""
+        return self.start_tag("testsuites", self.dialect.root_attributes(attributes), 0)
+
+    def suite_start_tag(self, attributes: dict[str, str], level: int) -> str:
+        """Return the start tag of a testsuite element, as of the dialect."""
+        return self.start_tag(
+            "testsuite", self.dialect.suite_attributes(attributes), level
+        )
+
+    def case_start_tag(
+        self, case: "TestCase", attributes: dict[str, str], level: int
+    ) -> str:
+        """
+        Return the start tag of a testcase element.
+
+        The attribute values of the template of the test case, see
+        CaseTemplate, are escaped once for all of its test cases.
+        """
+        template = case.template
+        if template is None:
+            return self.start_tag("testcase", attributes, level)
+        entry = self._templates.get(id(template))
+        if entry is None or entry[0] is not template:
+            shared = {
+                key: (value, self.attribute(value))
+                for key, value in template.attributes.items()
+            }
+            entry = self._templates[id(template)] = (template, shared)
+        shared = entry[1]
+        attribute = self.attribute
+        attrs: list[str] = []
+        for key, value in attributes.items():
+            escaped = shared.get(key)
+            if escaped is None or escaped[0] != value:
+                attrs.append(f' {key}="{attribute(value)}"')
+            else:
+                attrs.append(f' {key}="{escaped[1]}"')
+        indent = "\t" * level if self.prettyprint else ""
+        return f"{indent}<testcase{''.join(attrs)}"
+
+    def end_tag(self, tag: str, level: int) -> str:
+        """Return the end tag of an element with child elements."""
+        indent = "\t" * level if self.prettyprint else ""
+        return f"{indent}</{tag}>{self.newline}"
+
+    def text(self, text: str) -> str:
+        """Sanitize and escape a chunk of element text."""
+        return self.escape_text(self.clean(text))
+
+    def escape_text(self, text: str) -> str:
+        """Escape a chunk of element text which is sanitized already."""
+        if "&" in text:
+            text = text.replace("&", "&amp;")
+        if "<" in text:
+            text = text.replace("<", "&lt;")
+        if ">" in text:
+            text = text.replace(">", "&gt;")
+        return self.charrefs(text)
+
+    def attribute(self, value: str) -> str:
+        """Sanitize and escape an attribute value."""
+        value = self.clean(value)
+        if "&" in value:
+            value = value.replace("&", "&amp;")
+        if "<" in value:
+            value = value.replace("<", "&lt;")
+        if ">" in value:
+            value = value.replace(">", "&gt;")
+        if '"' in value:
+            value = value.replace('"', "&quot;")
+        # carriage returns have been removed by clean()
+        if self.escape_whitespace:
+            if "\n" in value:
+                value = value.replace("\n", "&#10;")
+            if "\t" in value:
+                value = value.replace("\t", "&#09;")
+        return self.charrefs(value)
+
+    def charrefs(self, text: str) -> str:
+        """Replace characters the output encoding can't represent."""
+        if self.charref_encoding is None or text.isascii():
+            return text
+        return text.encode(self.charref_encoding, "xmlcharrefreplace").decode(
+            self.charref_encoding
+        )
@@ -0,0 +1,74 @@
+"""Timestamps of test suites and test cases, written in ISO 8601."""
+
+import math
+import time
+from datetime import UTC, datetime, timedelta
+from typing import TypeAlias
+
+Timestamp: TypeAlias = int | float | str | datetime
+"""
+Start of a test suite or test case.
+
+A str is written as it is, an int too, like in earlier versions. A float is
+seconds since the epoch, like time.time(), and a datetime is converted to
+UTC if it is aware. Both are written in ISO 8601 to the second, e.g.
+2012-11-15T01:02:29, the format Jenkins reads.
+"""
+
+CaseTimestamp: TypeAlias = Timestamp | timedelta
+"""
+Start of a test case, a Timestamp or a timedelta since the start of its suite.
+
+A relative timestamp only takes a clock reading, e.g. from time.monotonic(),
+while the tests run. It is added to the timestamp of the suite when the
+report is written, a str timestamp of the suite must be in ISO 8601 then.
+"""
+
+_EPOCH = datetime(1970, 1, 1)  # noqa: DTZ001
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=UTC)
+_SECOND = timedelta(seconds=1)
+
+# the last formatted second and the last base of relative timestamps, the
+# timestamps of a suite are close together, replaced as a whole for threads
+_last_second: list[tuple[int, str]] = [(0, "1970-01-01T00:00:00")]
+_last_base: list[tuple[Timestamp | None, timedelta]] = [(None, timedelta())]
+
+
+def timestamp_offset(timestamp: Timestamp) -> timedelta:
+    """Return the time of a timestamp since the epoch."""
+    if isinstance(timestamp, datetime):
+        return timestamp - (_EPOCH if timestamp.tzinfo is None else _EPOCH_UTC)
+    if isinstance(timestamp, str):
+        return timestamp_offset(datetime.fromisoformat(timestamp))
+    return timedelta(seconds=timestamp)
+
+
+def format_timestamp(timestamp: CaseTimestamp, base: Timestamp | None = None) -> str:
+    """
+    Return the attribute value of a timestamp.
+
+    A relative timestamp is added to base, the timestamp of its suite. The
+    text of a second is formatted once for all the timestamps within it.
+    """
+    if isinstance(timestamp, str):
+        return timestamp
+    if isinstance(timestamp, int):
+        return str(timestamp)
+    if isinstance(timestamp, float):
+        seconds = math.floor(timestamp)
+    elif isinstance(timestamp, datetime):
+        seconds = timestamp_offset(timestamp) // _SECOND
+    else:
+        if base is None:
+            error_message = "a relative timestamp needs a timestamp of its suite"
+            raise ValueError(error_message)
+        last_base, offset = _last_base[0]
+        if base is not last_base:
+            offset = timestamp_offset(base)
+            _last_base[0] = (base, offset)
+        seconds = (offset + timestamp) // _SECOND
+    second, text = _last_second[0]
+    if seconds != second:
+        text = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+        _last_second[0] = (seconds, text)
+    return text
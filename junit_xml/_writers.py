@@ -0,0 +1,520 @@
+"""Incremental writers of JUnit XML documents into one or many files."""
+
+import copy
+import shutil
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from functools import partial
+from operator import itemgetter
+from typing import TYPE_CHECKING, TextIO
+
+from junit_xml._output import CHUNK_SIZE, Hasher
+from junit_xml._suite import (
+    ReportOutput,
+    SuiteCounters,
+    TestSuite,
+    XmlStreamWriter,
+    case_order_key,
+    root_element_attributes,
+    suite_counters,
+    suite_order_key,
+)
+from junit_xml.atomic import atomic_file, check_fsync
+
+if TYPE_CHECKING:
+    from junit_xml._case import TestCase
+    from junit_xml.dialects import Dialect
+    from junit_xml.redaction import Redactor
+
+
+def to_xml_report_files(
+    path_template: str,
+    test_suites: list[TestSuite],
+    prettyprint: bool = True,
+    encoding: str | None = None,
+    max_bytes: int | None = None,
+    max_cases: int | None = None,
+    dialect: "str | Dialect | None" = None,
+    errors: str = "replace",
+    redactor: "Redactor | None" = None,
+    fsync: str = "file",
+) -> list[str]:
+    """
+    Write the JUnit XML document split into numbered files.
+
+    @param path_template: Path of the files with an {index} field, numbered
+        from 1, e.g. "report-{index:03d}.xml".
+    @param max_bytes: Size limit of a file.
+    @param max_cases: Maximum number of test cases in a file.
+    @param dialect: Fields written for a CI system, see junit_xml.dialects.
+    @param errors: Error policy for invalid bytes of the outputs.
+    @param redactor: Replaces secrets, see junit_xml.redaction.
+    @param fsync: When the files are synced, see junit_xml.atomic.
+    @return: paths of the written files
+    """
+    with ShardedReportWriter(
+        path_template,
+        max_bytes=max_bytes,
+        max_cases=max_cases,
+        prettyprint=prettyprint,
+        encoding=encoding,
+        dialect=dialect,
+        errors=errors,
+        redactor=redactor,
+        fsync=fsync,
+    ) as writer:
+        for suite in test_suites:
+            writer.write_suite(suite)
+    return writer.paths
+
+
+class XmlReportWriter:
+    """
+    Incremental writer of a JUnit XML document.
+
+    Test cases can be added as soon as they finish, also interleaved between
+    suites. They are serialized right away into a spool file per suite, which
+    is kept in memory up to spool_size characters and moved to disk beyond.
+    The document is written to the file by close(), once the totals of the
+    root element are known, so memory stays bounded for any number of cases.
+    The properties and outputs of a suite are written by close() too, they
+    can still be set after its first test case was added.
+
+    With validate, close() checks the document with junit_xml.validator
+    while writing it, and raises a ValueError listing the problems, which
+    makes writing about 1.5 times as slow, for debugging. With
+    canonical the document is written in the canonical form of
+    XmlStreamWriter, the spooled test cases are copied in their sorted
+    order. A hasher is updated with the encoded document, like with
+    to_xml_report_file(). Invalid bytes of the outputs are handled by the
+    error policy errors, a redactor replaces secrets while the test cases are
+    serialized.
+    """
+
+    def __init__(
+        self,
+        file_descriptor: TextIO,
+        prettyprint: bool = False,
+        encoding: str | None = None,
+        spool_size: int = 1024 * 1024,
+        validate: bool = False,
+        dialect: "str | Dialect | None" = None,
+        canonical: bool = False,
+        hasher: Hasher | None = None,
+        errors: str = "replace",
+        redactor: "Redactor | None" = None,
+    ) -> None:
+        self.file_descriptor = file_descriptor
+        self.spool_size = spool_size
+        self.validate = validate
+        self.hasher = hasher
+        self._writer = XmlStreamWriter(
+            prettyprint, encoding, dialect, canonical, errors, redactor
+        )
+        self._suites: dict[int, _SpooledSuite] = {}
+        self._closed = False
+
+    def _spooled_suite(self, suite: "TestSuite") -> "_SpooledSuite":
+        spooled = self._suites.get(id(suite))
+        if spooled is None:
+            if self._closed:
+                error_message = "the report has already been written"
+                raise ValueError(error_message)
+            spooled = self._suites[id(suite)] = _SpooledSuite(
+                suite, self.spool_size, indexed=self._writer.canonical
+            )
+        return spooled
+
+    def add_test_case(self, suite: "TestSuite", test_case: "TestCase") -> None:
+        """Serialize a finished test case of the suite."""
+        spooled = self._spooled_suite(suite)
+        spooled.counters.add(test_case)
+        chunks = self._writer.iter_case(test_case, 2, suite.timestamp)
+        if spooled.index is None:
+            spooled.write(chunks)
+        else:
+            spooled.write_indexed(case_order_key(test_case), chunks)
+
+    def write_suite(self, suite: "TestSuite") -> None:
+        """Serialize a suite with all of its test cases."""
+        suite.merge_test_cases()
+        self._spooled_suite(suite)
+        for case in suite.iter_test_cases():
+            self.add_test_case(suite, case)
+
+    def close(self) -> None:
+        """Write the document to the file."""
+        if self._closed:
+            return
+        self._closed = True
+        suites = list(self._suites.values())
+        self._suites.clear()
+        writer = self._writer
+        if writer.canonical:
+            suites.sort(key=lambda spooled: suite_order_key(spooled.suite))
+        if not (self.validate or self.hasher):
+            _write_spooled_report(self.file_descriptor.write, writer, suites)
+            return
+        output = ReportOutput(
+            self.file_descriptor.write, writer, self.validate, self.hasher
+        )
+        _write_spooled_report(output.write, writer, suites)
+        output.close()
+
+    def __enter__(self) -> "XmlReportWriter":
+        """Return the writer itself."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Write the document when leaving the with block."""
+        self.close()
+
+
+class ShardedReportWriter:
+    """
+    Incremental writer of a JUnit XML document split into numbered files.
+
+    A new file is started when the next test case would make the current one
+    larger than max_bytes, or when it already has max_cases test cases. Every
+    file is a standalone document with the totals of its own test cases. A
+    suite which doesn't fit into one file is continued in the next one, as a
+    testsuite element of the same name and properties, the system-out and
+    system-err of the suite are written with its first part only. The
+    statistics of a suite, see junit_xml.statistics, are those of the test
+    cases of each part.
+
+    Like XmlReportWriter it spools the files being written, at most one file
+    worth of test cases is kept, and that on disk beyond spool_size. Every
+    file is written to a temporary file first and renamed once complete, like
+    by junit_xml.atomic with the fsync policy fsync, so a killed run never
+    leaves a partial file.
+    """
+
+    # the time of the root element is a sum of floats, its length is reserved
+    _TIME_RESERVE = 24
+
+    def __init__(
+        self,
+        path_template: str,
+        max_bytes: int | None = None,
+        max_cases: int | None = None,
+        prettyprint: bool = False,
+        encoding: str | None = None,
+        spool_size: int = 1024 * 1024,
+        dialect: "str | Dialect | None" = None,
+        errors: str = "replace",
+        redactor: "Redactor | None" = None,
+        fsync: str = "file",
+    ) -> None:
+        if path_template.format(index=1) == path_template.format(index=2):
+            error_message = "path_template must contain an {index} field"
+            raise ValueError(error_message)
+        self.path_template = path_template
+        self.max_bytes = max_bytes
+        self.max_cases = max_cases
+        self.encoding = encoding
+        self.spool_size = spool_size
+        self.fsync = check_fsync(fsync)
+        self.paths: list[str] = []
+        self._writer = XmlStreamWriter(
+            prettyprint=prettyprint,
+            encoding=encoding,
+            dialect=dialect,
+            errors=errors,
+            redactor=redactor,
+        )
+        # ids of the suites which have been written, to continue them
+        self._started: set[int] = set()
+        self._scratch = tempfile.SpooledTemporaryFile(  # noqa: SIM115
+            max_size=spool_size, mode="w+", encoding="utf-8"
+        )
+        self._closed = False
+        # the file being written
+        self._suites: dict[int, _SpooledSuite] = {}
+        # the length of the start tag of every suite, with its properties if
+        # they have statistics
+        self._heads: dict[int, int] = {}
+        self._totals = SuiteCounters()
+        self._body_size = 0
+
+    def _length(self, text: str) -> int:
+        """Return the number of bytes of text in the file."""
+        if text.isascii():
+            return len(text)
+        return len(text.encode(self.encoding or "utf-8", "xmlcharrefreplace"))
+
+    def _write(self, chunks: Iterable[str], write: Callable[[str], object]) -> int:
+        """Write chunks, return their number of bytes in the file."""
+        size = 0
+        for chunk in chunks:
+            write(chunk)
+            size += self._length(chunk)
+        return size
+
+    def _head_length(self, part: "TestSuite", counters: SuiteCounters) -> int:
+        writer = self._writer
+        length = self._length(writer.suite_start_tag(counters.attributes(part), 1))
+        if counters.statistics is not None:
+            length += self._length(
+                "".join(writer.iter_suite_properties(part, 1, counters))
+            )
+        return length
+
+    def _iter_children(
+        self, part: "TestSuite", counters: SuiteCounters
+    ) -> Iterator[str]:
+        """Yield the spooled children of a part, the statistics come later."""
+        if counters.statistics is not None:
+            return self._writer.iter_suite_outputs(part, 1)
+        return self._writer.iter_suite_children(part, 1)
+
+    def _part(self, suite: "TestSuite") -> "TestSuite":
+        """Return the suite, or its continuation without the outputs."""
+        if id(suite) not in self._started:
+            return suite
+        part = copy.copy(suite)
+        part.stdout = part.stderr = None
+        return part
+
+    def _add_suite(self, suite: "TestSuite", part: "TestSuite") -> "_SpooledSuite":
+        writer = self._writer
+        spooled = self._suites[id(suite)] = _SpooledSuite(
+            part, self.spool_size, children_spooled=True
+        )
+        self._started.add(id(suite))
+        self._heads[id(suite)] = self._head_length(part, spooled.counters)
+        self._body_size += self._length(
+            ">" + writer.newline + writer.end_tag("testsuite", 1)
+        )
+        return spooled
+
+    def _is_full(
+        self,
+        suite: "TestSuite",
+        spooled: "_SpooledSuite | None",
+        test_case: "TestCase",
+        size: int,
+    ) -> bool:
+        """Return whether the test case of size bytes doesn't fit the file."""
+        if self.max_cases and self._totals.tests >= self.max_cases:
+            return True
+        if not self.max_bytes:
+            return False
+        writer = self._writer
+        if spooled is None:
+            counters = suite_counters(suite)
+        else:
+            counters = copy.copy(spooled.counters)
+            # not to count the test case in the statistics of the suite yet
+            counters.statistics = copy.deepcopy(counters.statistics)
+        counters.add(test_case)
+        totals = copy.copy(self._totals)
+        totals.add(test_case)
+        root_attributes = root_element_attributes([totals.attributes(suite)])
+        root_attributes["time"] = "0" * self._TIME_RESERVE
+        heads = (
+            sum(self._heads.values())
+            - self._heads.get(id(suite), 0)
+            + self._head_length(spooled.suite if spooled else suite, counters)
+        )
+        end_tag = 0
+        if spooled is None:
+            end_tag = self._length(
+                ">" + writer.newline + writer.end_tag("testsuite", 1)
+            )
+        file_size = (
+            self._length(writer.declaration())
+            + self._length(writer.root_start_tag(root_attributes))
+            + self._length(">" + writer.newline + writer.end_tag("testsuites", 0))
+            + heads
+            + self._body_size
+            + end_tag
+            + size
+        )
+        return file_size > self.max_bytes
+
+    def add_test_case(self, suite: "TestSuite", test_case: "TestCase") -> None:
+        """Serialize a finished test case of the suite."""
+        if self._closed:
+            error_message = "the report has already been written"
+            raise ValueError(error_message)
+        writer = self._writer
+        spooled = self._suites.get(id(suite))
+        part = spooled.suite if spooled else self._part(suite)
+
+        # the suite's own children if it is new in this file, and the case
+        scratch = self._scratch
+        scratch.seek(0)
+        scratch.truncate()
+        size = 0
+        if spooled is None:
+            size += self._write(
+                self._iter_children(part, suite_counters(part)), scratch.write
+            )
+        size += self._write(
+            writer.iter_case(test_case, 2, suite.timestamp), scratch.write
+        )
+
+        if self._totals.tests and self._is_full(part, spooled, test_case, size):
+            self._write_shard()
+            if spooled is not None:
+                # continued in the new file, without the outputs of the suite
+                part = self._part(suite)
+                spooled = self._add_suite(suite, part)
+                self._body_size += self._write(
+                    self._iter_children(part, spooled.counters), spooled.spool.write
+                )
+        if spooled is None:
+            spooled = self._add_suite(suite, part)
+
+        spooled.counters.add(test_case)
+        self._totals.add(test_case)
+        scratch.seek(0)
+        shutil.copyfileobj(scratch, spooled.spool)
+        self._body_size += size
+        self._heads[id(suite)] = self._head_length(part, spooled.counters)
+
+    def write_suite(self, suite: "TestSuite") -> None:
+        """Serialize a suite with all of its test cases."""
+        suite.merge_test_cases()
+        if not suite.has_test_cases() and id(suite) not in self._suites:
+            part = self._part(suite)
+            spooled = self._add_suite(suite, part)
+            self._body_size += self._write(
+                self._iter_children(part, spooled.counters), spooled.spool.write
+            )
+        for case in suite.iter_test_cases():
+            self.add_test_case(suite, case)
+
+    def _write_shard(self) -> None:
+        path = self.path_template.format(index=len(self.paths) + 1)
+        with atomic_file(path, self.encoding or "utf-8", self.fsync) as f:
+            _write_spooled_report(f.write, self._writer, list(self._suites.values()))
+        self.paths.append(path)
+        self._suites = {}
+        self._heads = {}
+        self._totals = SuiteCounters()
+        self._body_size = 0
+
+    def close(self) -> None:
+        """Write the last file."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._suites or not self.paths:
+            self._write_shard()
+        self._scratch.close()
+
+    def __enter__(self) -> "ShardedReportWriter":
+        """Return the writer itself."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Write the last file when leaving the with block."""
+        self.close()
+
+
+class _SpooledSuite:
+    """
+    A suite with its counters and its children serialized so far.
+
+    The spool holds the test cases, preceded by the suite's own children
+    if children_spooled is set, otherwise they are written from the suite.
+    The properties of a suite with statistics are never spooled, they are
+    known only once all of its test cases are counted.
+    If indexed, the sort key, position and length of every test case in the
+    spool are kept in index, to read them back sorted.
+    """
+
+    __slots__ = ("children_spooled", "counters", "index", "spool", "suite")
+
+    def __init__(
+        self,
+        suite: "TestSuite",
+        spool_size: int,
+        children_spooled: bool = False,
+        indexed: bool = False,
+    ) -> None:
+        self.suite = suite
+        self.children_spooled = children_spooled
+        self.counters = suite_counters(suite)
+        self.spool = tempfile.SpooledTemporaryFile(  # noqa: SIM115
+            max_size=spool_size, mode="w+", encoding="utf-8"
+        )
+        self.index: list[tuple[tuple[str, str], int, int]] | None = (
+            [] if indexed else None
+        )
+
+    def write(self, chunks: Iterable[str]) -> None:
+        write = self.spool.write
+        for chunk in chunks:
+            write(chunk)
+
+    def write_indexed(self, key: tuple[str, str], chunks: Iterable[str]) -> None:
+        spool = self.spool
+        start = spool.tell()
+        length = 0
+        for chunk in chunks:
+            spool.write(chunk)
+            length += len(chunk)
+        if self.index is not None:
+            self.index.append((key, start, length))
+
+    def iter_spool(self) -> Iterator[str]:
+        """Yield the spooled text in chunks, the test cases sorted if indexed."""
+        spool = self.spool
+        spool.seek(0)
+        if self.index is None:
+            yield from iter(partial(spool.read, CHUNK_SIZE), "")
+            return
+        # the sort is stable, test cases with the same key keep their order
+        for _, start, length in sorted(self.index, key=itemgetter(0)):
+            spool.seek(start)
+            remaining = length
+            while remaining:
+                chunk = spool.read(min(remaining, CHUNK_SIZE))
+                yield chunk
+                remaining -= len(chunk)
+
+
+def _write_spooled_report(
+    write: Callable[[str], object],
+    writer: "XmlStreamWriter",
+    suites: list[_SpooledSuite],
+) -> None:
+    """Write a document of spooled suites, closing their spools."""
+    canonical = writer.canonical
+    suites_attributes = [
+        (spooled, spooled.counters.attributes(spooled.suite, canonical))
+        for spooled in suites
+    ]
+    root_attributes = root_element_attributes(
+        (attrs for _, attrs in suites_attributes), canonical
+    )
+    write(writer.declaration())
+    if not suites_attributes:
+        write(writer.root_start_tag(root_attributes) + writer.empty_end)
+        return
+    write(writer.root_start_tag(root_attributes) + ">" + writer.newline)
+    for spooled, attributes in suites_attributes:
+        start = writer.suite_start_tag(attributes, 1)
+        suite = spooled.suite
+        counters = spooled.counters
+        if spooled.children_spooled:
+            children = counters.statistics is not None and writer.dialect.properties
+            chunks = writer.iter_suite_properties(suite, 1, counters)
+        else:
+            children = writer.has_suite_children(suite, counters)
+            chunks = writer.iter_suite_children(suite, 1, counters)
+        with spooled.spool:
+            if not (children or spooled.spool.tell()):
+                write(start + writer.empty_end)
+                continue
+            write(start + ">" + writer.newline)
+            if children:
+                for chunk in chunks:
+                    write(chunk)
+            for chunk in spooled.iter_spool():
+                write(chunk)
+        write(writer.end_tag("testsuite", 1))
+    write(writer.end_tag("testsuites", 0))
@@ -0,0 +1,153 @@
+"""
+Crash-safe writing of reports to a path.
+
+The report is written to a temporary file in the directory of the path,
+which replaces the path by an atomic rename once it is complete, so readers
+see either the previous file or the whole new report, never a half-written
+one if the process is killed meanwhile. The temporary file is removed if
+writing fails:
+
+    to_xml_report_path("report.xml", test_suites)
+    with atomic_file("report.xml") as f, XmlReportWriter(f) as writer:
+        ...
+
+The writes are buffered in buffer_size bytes, so a large report takes few
+system calls. fsync is one of FSYNC_POLICIES:
+
+    never      the data reaches the disk whenever the system writes it back,
+               a crash of the system can leave an empty or partial file
+    file       the temporary file is synced before the rename, the default
+    full       the directory is synced after the rename too, so the rename
+               itself survives a crash of the system
+"""
+
+import io
+import os
+from collections.abc import Generator
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import BinaryIO, TextIO
+
+from junit_xml._output import Hasher
+from junit_xml._suite import TestSuite, to_xml_report_file
+from junit_xml.budget import Budget
+from junit_xml.dialects import Dialect
+from junit_xml.redaction import Redactor
+
+FSYNC_POLICIES = ("never", "file", "full")
+
+
+def check_fsync(fsync: str) -> str:
+    if fsync not in FSYNC_POLICIES:
+        error_message = (
+            f"unknown fsync policy {fsync!r}, expected one of "
+            f"{', '.join(FSYNC_POLICIES)}"
+        )
+        raise ValueError(error_message)
+    return fsync
+
+
+def _create_temporary(path: Path) -> tuple[int, Path]:
+    """Create a new temporary file next to path, return its descriptor and path."""
+    while True:
+        temporary = path.with_name(f".{path.name}.{os.urandom(6).hex()}.tmp")
+        try:
+            # with the permissions of a new file under the umask
+            fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            continue
+        return fd, temporary
+
+
+def _fsync_directory(path: Path) -> None:
+    if os.name != "posix":
+        # directories can't be opened for syncing on Windows
+        return
+    fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_binary_file(
+    path: str | os.PathLike[str], fsync: str = "file", buffer_size: int = 1024 * 1024
+) -> Generator[BinaryIO, None, None]:
+    """Return a context of a binary file which replaces path when it's left."""
+    fsync = check_fsync(fsync)
+    path = Path(path)
+    fd, temporary = _create_temporary(path)
+    try:
+        with open(fd, "wb", buffering=buffer_size) as f:  # noqa: PTH123
+            yield f
+            f.flush()
+            if fsync != "never":
+                os.fsync(f.fileno())
+        temporary.replace(path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            temporary.unlink()
+        raise
+    if fsync == "full":
+        _fsync_directory(path)
+
+
+@contextmanager
+def atomic_file(
+    path: str | os.PathLike[str],
+    encoding: str = "utf-8",
+    fsync: str = "file",
+    buffer_size: int = 1024 * 1024,
+    newline: str | None = None,
+) -> Generator[TextIO, None, None]:
+    """Return a context of a text file which replaces path when it's left."""
+    with atomic_binary_file(path, fsync, buffer_size) as binary:
+        f = io.TextIOWrapper(binary, encoding=encoding, newline=newline)
+        try:
+            yield f
+        finally:
+            f.flush()
+            f.detach()
+
+
+def to_xml_report_path(
+    path: str | os.PathLike[str],
+    test_suites: list[TestSuite],
+    prettyprint: bool = True,
+    encoding: str | None = None,
+    validate: bool = False,
+    dialect: str | Dialect | None = None,
+    canonical: bool = False,
+    hasher: Hasher | None = None,
+    errors: str = "replace",
+    redactor: Redactor | None = None,
+    budget: Budget | None = None,
+    fsync: str = "file",
+    buffer_size: int = 1024 * 1024,
+) -> bool:
+    """
+    Write the JUnit XML document to a path, atomically.
+
+    The document is written like by to_xml_report_file(), in the encoding
+    of the declaration, UTF-8 by default.
+
+    @return: whether the document is complete, see junit_xml.budget
+    """
+    with atomic_file(path, encoding or "utf-8", fsync, buffer_size) as f:
+        return to_xml_report_file(
+            f,
+            test_suites,
+            prettyprint,
+            encoding,
+            validate,
+            dialect,
+            canonical,
+            hasher,
+            errors,
+            redactor,
+            budget,
+        )
+
+
+__all__ = ["FSYNC_POLICIES", "atomic_binary_file", "atomic_file", "to_xml_report_path"]
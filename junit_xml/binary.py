@@ -0,0 +1,269 @@
+"""
+Compact binary interchange format of test suites.
+
+A file starts with a magic and a version byte, followed by the records of
+junit_xml._records: a suite record followed by the records of its test
+cases, for every suite, and an end record. Strings repeated over the cases,
+like class names and failure types, are stored once in the string table.
+
+load() memory-maps the file and leaves the outputs of the test cases in the
+mapping, they are decoded in chunks only while a JUnit XML report is written.
+iter_results() yields the results one test case at a time instead, like
+junit_xml.parser.iter_results(), so no suite is held in memory as a whole.
+"""
+
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from collections.abc import Iterable, Iterator
+from typing import IO, BinaryIO, TextIO
+
+from junit_xml import TestCase, TestSuite
+from junit_xml import to_xml_report_file as _to_xml_report_file
+from junit_xml._output import CHUNK_SIZE
+from junit_xml._records import FRAME, RecordDecoder, RecordEncoder
+
+MAGIC = b"JUXB\x01"
+
+_FLUSH_SIZE = 64 * 1024
+
+
+def dump(test_suites: list[TestSuite], fp: BinaryIO, errors: str = "replace") -> None:
+    """
+    Write test suites in the binary format to a binary file.
+
+    Invalid bytes of the outputs are handled by the error policy errors.
+    """
+    encoder = RecordEncoder(errors)
+    out = bytearray(MAGIC)
+    for suite in test_suites:
+        suite.merge_test_cases()
+        encoder.encode_suite(suite, out)
+        for case in suite.iter_test_cases():
+            encoder.encode_case(suite.name, case, out, base=suite.timestamp)
+            if len(out) >= _FLUSH_SIZE:
+                fp.write(out)
+                out.clear()
+    encoder.encode_end(out)
+    fp.write(out)
+
+
+def dumps(test_suites: list[TestSuite], errors: str = "replace") -> bytes:
+    """Return test suites in the binary format, like dump()."""
+    out = io.BytesIO()
+    dump(test_suites, out, errors)
+    return out.getvalue()
+
+
+def loads(
+    data: bytes | bytearray | memoryview | mmap.mmap, lazy_outputs: bool = False
+) -> list[TestSuite]:
+    """
+    Return the test suites of data in the binary format.
+
+    With lazy_outputs the outputs of the test cases stay views of data.
+    """
+    view = memoryview(data)
+    if view[: len(MAGIC)].tobytes() != MAGIC:
+        error_message = "not a binary junit_xml document"
+        raise ValueError(error_message)
+    decoder = RecordDecoder(lazy_outputs=lazy_outputs)
+    test_suites: list[TestSuite] = []
+    for record in decoder.iter_records(view[len(MAGIC) :]):
+        if isinstance(record, TestSuite):
+            test_suites.append(record)
+        else:
+            test_suites[-1].test_cases.append(record[1])
+    if not decoder.ended:
+        error_message = "truncated binary junit_xml document"
+        raise ValueError(error_message)
+    return test_suites
+
+
+def load(source: str | os.PathLike[str] | BinaryIO) -> list[TestSuite]:
+    """
+    Return the test suites of a file in the binary format.
+
+    A path is memory-mapped and the outputs of the test cases are left in the
+    mapping, which is unmapped when they are not referenced anymore. A file
+    object is read as a whole.
+    """
+    if not isinstance(source, str | os.PathLike):
+        return loads(source.read())
+    with open(source, "rb") as f:  # noqa: PTH123
+        if not os.fstat(f.fileno()).st_size:
+            return loads(b"")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return loads(mapped, lazy_outputs=True)
+
+
+def _iter_frames(fp: BinaryIO) -> Iterator[bytes]:
+    """Yield the data of a file in chunks which end with a whole frame."""
+    pending = bytearray()
+    while chunk := fp.read(CHUNK_SIZE):
+        pending += chunk
+        end = 0
+        while end + FRAME.size <= len(pending):
+            _, length = FRAME.unpack_from(pending, end)
+            if end + FRAME.size + length > len(pending):
+                break
+            end += FRAME.size + length
+        if end:
+            yield bytes(pending[:end])
+            del pending[:end]
+    if pending:
+        error_message = "truncated binary junit_xml document"
+        raise ValueError(error_message)
+
+
+def iter_results(
+    source: str | os.PathLike[str] | BinaryIO, head: bytes = b""
+) -> Iterator[tuple[TestSuite, TestCase | None]]:
+    """
+    Yield the results of a file in the binary format, one test case at a time.
+
+    A (suite, case) tuple is yielded for every test case and (suite, None)
+    when the suite ends, like by junit_xml.parser.iter_results(). A path is
+    memory-mapped like by load(), a file object is read in chunks, head are
+    the bytes which have already been read from it, e.g. to detect the
+    format.
+    """
+    mapping = isinstance(source, str | os.PathLike)
+    decoder = RecordDecoder(lazy_outputs=mapping)
+    if isinstance(source, str | os.PathLike):
+        with open(source, "rb") as f:  # noqa: PTH123
+            size = os.fstat(f.fileno()).st_size
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        view = memoryview(mapped)
+        magic = view[: len(MAGIC)].tobytes()
+        records: Iterable[TestSuite | tuple[str, TestCase]] = decoder.iter_records(
+            view[len(MAGIC) :]
+        )
+    else:
+        magic = head + source.read(len(MAGIC) - len(head))
+        records = (
+            record
+            for chunk in _iter_frames(source)
+            for record in decoder.iter_records(chunk)
+        )
+    if magic != MAGIC:
+        error_message = "not a binary junit_xml document"
+        raise ValueError(error_message)
+    suite: TestSuite | None = None
+    for record in records:
+        if isinstance(record, TestSuite):
+            if suite is not None:
+                yield suite, None
+            suite = record
+        elif suite is not None:
+            yield suite, record[1]
+    if not decoder.ended:
+        error_message = "truncated binary junit_xml document"
+        raise ValueError(error_message)
+    if suite is not None:
+        yield suite, None
+
+
+class BinaryWriter:
+    """
+    Incremental writer of the binary format, like XmlReportWriter for XML.
+
+    Test cases are encoded right away into a spool file per suite, which is
+    kept in memory up to spool_size bytes and moved to disk beyond. The
+    suites are written by close(), so their properties and outputs can still
+    be set after their first test case was added. Invalid bytes of the
+    outputs are handled by the error policy errors.
+    """
+
+    def __init__(
+        self, fp: BinaryIO, spool_size: int = 1024 * 1024, errors: str = "replace"
+    ) -> None:
+        self.fp = fp
+        self.spool_size = spool_size
+        self._encoder = RecordEncoder(errors)
+        # the string frames of all the records, written before the suites
+        self._strings = bytearray()
+        self._suites: dict[int, tuple[TestSuite, IO[bytes]]] = {}
+        self._buffer = bytearray()
+        self._closed = False
+
+    def _spool(self, suite: TestSuite) -> IO[bytes]:
+        entry = self._suites.get(id(suite))
+        if entry is None:
+            if self._closed:
+                error_message = "the document has already been written"
+                raise ValueError(error_message)
+            spool = tempfile.SpooledTemporaryFile(max_size=self.spool_size)  # noqa: SIM115
+            entry = self._suites[id(suite)] = (suite, spool)
+        return entry[1]
+
+    def add_test_case(self, suite: TestSuite, test_case: TestCase) -> None:
+        """Encode a finished test case of the suite."""
+        spool = self._spool(suite)
+        self._encoder.encode_case(
+            suite.name, test_case, self._buffer, self._strings, suite.timestamp
+        )
+        spool.write(self._buffer)
+        self._buffer.clear()
+
+    def write_suite(self, suite: TestSuite) -> None:
+        """Encode a suite with all of its test cases."""
+        suite.merge_test_cases()
+        self._spool(suite)
+        for case in suite.iter_test_cases():
+            self.add_test_case(suite, case)
+
+    def close(self) -> None:
+        """Write the document to the file."""
+        if self._closed:
+            return
+        self._closed = True
+        records: list[bytearray] = []
+        for suite, _ in self._suites.values():
+            record = bytearray()
+            self._encoder.encode_suite(suite, record, self._strings)
+            records.append(record)
+        self.fp.write(MAGIC)
+        self.fp.write(self._strings)
+        for record, (_, spool) in zip(records, self._suites.values(), strict=True):
+            with spool:
+                self.fp.write(record)
+                spool.seek(0)
+                shutil.copyfileobj(spool, self.fp)
+        end = bytearray()
+        RecordEncoder.encode_end(end)
+        self.fp.write(end)
+        self._suites.clear()
+
+    def __enter__(self) -> "BinaryWriter":
+        """Return the writer itself."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Write the document when leaving the with block."""
+        self.close()
+
+
+def to_xml_report_file(
+    file_descriptor: TextIO,
+    source: str | os.PathLike[str] | BinaryIO,
+    prettyprint: bool = True,
+    encoding: str | None = None,
+) -> None:
+    """Convert a file in the binary format into a JUnit XML document."""
+    _to_xml_report_file(
+        file_descriptor, load(source), prettyprint=prettyprint, encoding=encoding
+    )
+
+
+__all__ = [
+    "BinaryWriter",
+    "dump",
+    "dumps",
+    "iter_results",
+    "load",
+    "loads",
+    "to_xml_report_file",
+]
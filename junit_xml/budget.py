@@ -0,0 +1,64 @@
+"""
+Time budget and cancellation of report generation.
+
+A report written with a budget is checked between suites and test cases.
+Once the budget runs out or it is cancelled, e.g. from another thread or a
+signal handler, the document is finished with what was written so far, and
+its totals count those test cases only:
+
+    budget = Budget(seconds=60)
+    with open("report.xml", "w") as f:
+        complete = to_xml_report_file(f, test_suites, budget=budget)
+
+The last suite which was written, in part or as a whole, gets the property
+TRUNCATED_PROPERTY with the reason as its value, and the suites after it are
+left out. The time the writer needs to finish the document is kept from the
+budget.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+
+TRUNCATED_PROPERTY = "junit_xml.truncated"
+
+
+class Budget:
+    """A deadline of report generation, on the clock, which can be cancelled."""
+
+    def __init__(
+        self,
+        seconds: float | None = None,
+        deadline: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if seconds is not None and deadline is not None:
+            error_message = "give either seconds or deadline"
+            raise ValueError(error_message)
+        self.clock = clock
+        self.deadline = deadline if seconds is None else clock() + seconds
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Stop the report generation at the next check."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() was called."""
+        return self._cancelled.is_set()
+
+    def exceeded(self, reserve: float = 0.0) -> str | None:
+        """
+        Return why the generation has to stop, None if it can go on.
+
+        The deadline is reserve seconds earlier, the time needed to finish.
+        """
+        if self._cancelled.is_set():
+            return "cancelled"
+        if self.deadline is not None and self.clock() + reserve >= self.deadline:
+            return "deadline exceeded"
+        return None
+
+
+__all__ = ["TRUNCATED_PROPERTY", "Budget"]
@@ -0,0 +1,160 @@
+"""
+Collection of test results from worker processes.
+
+Workers send their test cases over a pipe as compact binary records instead
+of pickled objects. The controller decodes the records and hands the test
+cases to an XmlReportWriter as they arrive, without waiting for the run to
+finish:
+
+    channel = ResultChannel()
+    worker_channel = channel.worker()
+    process = multiprocessing.Process(target=run_tests, args=(worker_channel,))
+    process.start()
+    worker_channel.release()
+    with open("report.xml", "w") as f, XmlReportWriter(f) as writer:
+        channel.drain(writer)
+
+and in the worker:
+
+    def run_tests(channel: WorkerChannel) -> None:
+        with channel:
+            channel.add_test_case(suite, TestCase("test", elapsed_sec=0.1))
+"""
+
+import multiprocessing
+from collections.abc import Iterator
+from multiprocessing.connection import Connection, wait
+
+from junit_xml import TestCase, TestSuite, XmlReportWriter
+from junit_xml._output import check_errors
+from junit_xml._records import RecordDecoder, RecordEncoder
+
+
+class WorkerChannel:
+    """
+    Sending end of a ResultChannel, passed to a worker process.
+
+    Records are batched and sent once buffer_size bytes are collected.
+    Invalid bytes of the outputs are handled by the error policy errors.
+    """
+
+    def __init__(
+        self,
+        connection: Connection,
+        buffer_size: int = 64 * 1024,
+        errors: str = "replace",
+    ) -> None:
+        self.connection = connection
+        self.buffer_size = buffer_size
+        self.errors = check_errors(errors)
+        self._buffer = bytearray()
+        self._encoder: RecordEncoder | None = None
+        self._suites: set[str] = set()
+
+    def add_test_case(self, suite: TestSuite | str, test_case: TestCase) -> None:
+        """
+        Send a finished test case of a suite.
+
+        The attributes of a TestSuite are sent with its first test case, its
+        test_cases are not sent.
+        """
+        if self._encoder is None:
+            self._encoder = RecordEncoder(self.errors)
+        if isinstance(suite, str):
+            suite_name, base = suite, None
+        else:
+            suite_name, base = suite.name, suite.timestamp
+        if suite_name not in self._suites:
+            self._suites.add(suite_name)
+            if isinstance(suite, TestSuite):
+                self._encoder.encode_suite(suite, self._buffer)
+        self._encoder.encode_case(suite_name, test_case, self._buffer, base=base)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Send the batched records."""
+        if self._buffer:
+            self.connection.send_bytes(self._buffer)
+            self._buffer.clear()
+
+    def release(self) -> None:
+        """
+        Close the sending end in this process without ending the stream.
+
+        Called by the controller after it started the worker, so that the
+        channel ends when the worker exits even if it didn't close it.
+        """
+        self.connection.close()
+
+    def close(self) -> None:
+        """Send the rest of the records and the end of the stream."""
+        if self.connection.closed:
+            return
+        RecordEncoder.encode_end(self._buffer)
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self) -> "WorkerChannel":
+        """Return the channel itself."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the channel when leaving the with block."""
+        self.close()
+
+
+class ResultChannel:
+    """Receiving end of the test results of worker processes."""
+
+    def __init__(self) -> None:
+        self._connections: list[Connection] = []
+
+    def worker(
+        self, buffer_size: int = 64 * 1024, errors: str = "replace"
+    ) -> WorkerChannel:
+        """Return a new channel for one worker process."""
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self._connections.append(receiver)
+        return WorkerChannel(sender, buffer_size, errors)
+
+    def iter_results(self) -> Iterator[tuple[TestSuite, TestCase]]:
+        """
+        Yield the test cases with their suites as they arrive.
+
+        Suites of the same name from several workers are merged into one,
+        the attributes sent first win. Ends when every worker has closed its
+        channel or exited.
+        """
+        decoders = {connection: RecordDecoder() for connection in self._connections}
+        self._connections = []
+        suites: dict[str, TestSuite] = {}
+        while decoders:
+            for connection in wait(list(decoders)):
+                assert isinstance(connection, Connection)
+                decoder = decoders[connection]
+                try:
+                    data = connection.recv_bytes()
+                except EOFError:
+                    data = b""
+                    decoder.ended = True
+                for record in decoder.iter_records(data):
+                    if isinstance(record, TestSuite):
+                        suites.setdefault(record.name, record)
+                        continue
+                    suite_name, case = record
+                    suite = suites.get(suite_name)
+                    if suite is None:
+                        suite = suites[suite_name] = TestSuite(suite_name)
+                    yield suite, case
+                if decoder.ended:
+                    connection.close()
+                    del decoders[connection]
+
+    def drain(self, writer: XmlReportWriter) -> None:
+        """Write the test cases of all the workers to a report writer."""
+        for suite, case in self.iter_results():
+            writer.add_test_case(suite, case)
+
+
+__all__ = ["ResultChannel", "WorkerChannel"]
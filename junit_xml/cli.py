@@ -0,0 +1,456 @@
+"""
+Command line tool for JUnit XML reports, installed as junit-xml.
+
+Every command streams the reports through the parser and the incremental
+writers, so reports of any size are processed in bounded memory. Inputs are
+JUnit XML or the binary format, "-" or no input reads from stdin, and the
+output is written to stdout unless -o is given, which replaces the file
+atomically once the output is complete:
+
+    junit-xml merge a.xml b.xml -o all.xml
+    junit-xml merge --canonical shard-*.xml -o all.xml
+    junit-xml minify --dialect gitlab report.xml -o gitlab.xml
+    junit-xml summarize report.xml
+    junit-xml split --max-bytes 10000000 -o "report-{index:03d}.xml" report.xml
+    junit-xml prettify report.xml
+    junit-xml minify < report.xml > compact.xml
+    junit-xml convert --to binary report.xml -o report.juxb
+    junit-xml convert --from tap --to xml results.tap -o report.xml
+    junit-xml transform --drop-passed --redact "token=[0-9a-f]+" report.xml
+    junit-xml export --format csv report.xml -o cases.csv
+    junit-xml validate report.xml
+
+prettify and minify don't only change the whitespace, they rewrite the
+report like merge: the totals are recomputed and the times are written
+with 6 decimals. What the parser doesn't read is left out, like the
+properties of test cases, the attributes of the testsuites element and
+unknown attributes.
+"""
+
+import argparse
+import io
+import re
+import sys
+from collections.abc import Callable, Generator, Iterable, Iterator
+from contextlib import contextmanager
+from typing import BinaryIO, TextIO
+from xml.parsers import expat
+
+from junit_xml import ShardedReportWriter, TestCase, TestSuite, XmlReportWriter, binary
+from junit_xml._output import CHUNK_SIZE
+from junit_xml._suite import SuiteCounters
+from junit_xml.atomic import atomic_binary_file, atomic_file
+from junit_xml.converters import iter_jsonl, iter_tap, write_results
+from junit_xml.dialects import DIALECTS
+from junit_xml.export import export_csv, export_jsonl
+from junit_xml.parser import ReportParser
+from junit_xml.transform import (
+    Pipeline,
+    drop_passed,
+    redact,
+    rename_classnames,
+    strip_passed_outputs,
+)
+from junit_xml.validator import ReportValidator
+
+
+@contextmanager
+def _binary_input(path: str) -> Generator[BinaryIO, None, None]:
+    if path == "-":
+        yield sys.stdin.buffer
+        return
+    with open(path, "rb") as f:  # noqa: PTH123
+        yield f
+
+
+@contextmanager
+def _text_input(path: str) -> Generator[TextIO, None, None]:
+    if path == "-":
+        yield io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+        return
+    with open(path, encoding="utf-8") as f:  # noqa: PTH123
+        yield f
+
+
+@contextmanager
+def _text_output(path: str) -> Generator[TextIO, None, None]:
+    if path == "-":
+        out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
+        try:
+            yield out
+        finally:
+            out.flush()
+            out.detach()
+        return
+    with atomic_file(path) as out:
+        yield out
+
+
+@contextmanager
+def _binary_output(path: str) -> Generator[BinaryIO, None, None]:
+    if path == "-":
+        yield sys.stdout.buffer
+        sys.stdout.buffer.flush()
+        return
+    with atomic_binary_file(path) as out:
+        yield out
+
+
+def _iter_input(path: str) -> Iterator[tuple[TestSuite, TestCase | None]]:
+    """
+    Yield the results of a report, like junit_xml.parser.iter_results().
+
+    A report in the binary format is detected by its magic, a file is
+    memory-mapped, stdin is read in chunks.
+    """
+    with _binary_input(path) as f:
+        head = f.read(len(binary.MAGIC))
+        if head == binary.MAGIC:
+            yield from binary.iter_results(f if path == "-" else path, head)
+            return
+        parser = ReportParser()
+        yield from parser.feed(head)
+        while chunk := f.read(CHUNK_SIZE):
+            yield from parser.feed(chunk)
+        yield from parser.close()
+
+
+def _iter_inputs(paths: list[str]) -> Iterator[tuple[TestSuite, TestCase | None]]:
+    for path in paths or ["-"]:
+        yield from _iter_input(path)
+
+
+def _iter_converted(
+    path: str, input_format: str
+) -> Iterator[tuple[TestSuite, TestCase | None]]:
+    """Yield the results of an input in the format of junit_xml.converters."""
+    if input_format == "junit":
+        yield from _iter_input(path)
+        return
+    with _text_input(path) as f:
+        if input_format == "tap":
+            yield from iter_tap(f)
+        else:
+            yield from iter_jsonl(f)
+
+
+def _write_xml(
+    results: Iterable[tuple[TestSuite, TestCase | None]],
+    prettyprint: bool,
+    args: argparse.Namespace,
+) -> None:
+    """Write the results as one report with the output options of args."""
+    with _text_output(args.output) as out:
+        writer = XmlReportWriter(
+            out,
+            prettyprint=prettyprint,
+            encoding="utf-8",
+            dialect=args.dialect,
+            canonical=args.canonical,
+        )
+        write_results(results, writer)
+        # not written if reading failed, unlike when leaving a with block
+        writer.close()
+
+
+def merge(args: argparse.Namespace) -> int:
+    """Write the suites of all the inputs into one report."""
+    _write_xml(_iter_inputs(args.inputs), args.pretty, args)
+    return 0
+
+
+def prettify(args: argparse.Namespace) -> int:
+    """Rewrite a report indented, like merge, see the module."""
+    _write_xml(_iter_input(args.input), prettyprint=True, args=args)
+    return 0
+
+
+def minify(args: argparse.Namespace) -> int:
+    """Rewrite a report without whitespace between the elements, like merge."""
+    _write_xml(_iter_input(args.input), prettyprint=False, args=args)
+    return 0
+
+
+def split(args: argparse.Namespace) -> int:
+    """Split a report into numbered files, print their paths."""
+    writer = ShardedReportWriter(
+        args.output,
+        max_bytes=args.max_bytes,
+        max_cases=args.max_cases,
+        prettyprint=args.pretty,
+        encoding="utf-8",
+        dialect=args.dialect,
+    )
+    write_results(_iter_input(args.input), writer)
+    writer.close()
+    for path in writer.paths:
+        print(path)
+    return 0
+
+
+def convert(args: argparse.Namespace) -> int:
+    """Convert a report into another format."""
+    results = _iter_converted(args.input, args.input_format)
+    if args.to == "xml":
+        _write_xml(results, args.pretty, args)
+        return 0
+    with _binary_output(args.output) as out:
+        writer = binary.BinaryWriter(out)
+        write_results(results, writer)
+        writer.close()
+    return 0
+
+
+def transform(args: argparse.Namespace) -> int:
+    """Filter and rewrite the test cases of the inputs into one report."""
+    pipeline = Pipeline()
+    if args.drop_passed:
+        pipeline.stages.append(drop_passed())
+    if args.strip_passed_outputs:
+        pipeline.stages.append(strip_passed_outputs())
+    for rename in args.rename_classname:
+        old, separator, new = rename.partition("=")
+        if not separator:
+            error_message = f"--rename-classname needs OLD=NEW, not {rename}"
+            raise ValueError(error_message)
+        pipeline.stages.append(rename_classnames(_prefix_renamer(old, new)))
+    for pattern in args.redact:
+        try:
+            pipeline.stages.append(redact(pattern))
+        except re.error as e:
+            error_message = f"invalid pattern {pattern}: {e}"
+            raise ValueError(error_message) from e
+    _write_xml(pipeline.apply(_iter_inputs(args.inputs)), args.pretty, args)
+    return 0
+
+
+def _prefix_renamer(old: str, new: str) -> Callable[[str | None], str | None]:
+    def rename(classname: str | None) -> str | None:
+        if classname is None or not classname.startswith(old):
+            return classname
+        return new + classname.removeprefix(old)
+
+    return rename
+
+
+def export(args: argparse.Namespace) -> int:
+    """Write a row per test case of the inputs as JSON lines or CSV."""
+    export_rows = export_csv if args.format == "csv" else export_jsonl
+    with _text_output(args.output) as out:
+        export_rows(_iter_inputs(args.inputs), out, outputs=not args.no_outputs)
+    return 0
+
+
+def summarize(args: argparse.Namespace) -> int:
+    """Print the totals of every suite and of all of them."""
+    totals = SuiteCounters()
+    suites: dict[int, SuiteCounters] = {}
+    for suite, case in _iter_inputs(args.inputs):
+        counters = suites.setdefault(id(suite), SuiteCounters())
+        if case is not None:
+            counters.add(case)
+            totals.add(case)
+            continue
+        del suites[id(suite)]
+        print(_summary(suite.name, counters))
+    print(_summary("total", totals))
+    return 0
+
+
+def _summary(name: str, counters: SuiteCounters) -> str:
+    return (
+        f"{name}: {counters.tests} tests, {counters.failures} failures, "
+        f"{counters.errors} errors, {counters.skipped} skipped "
+        f"in {counters.elapsed_sec:.3f} s"
+    )
+
+
+def _problems(path: str) -> list[str]:
+    """Return the problems of a report, a binary one is only decoded."""
+    with _binary_input(path) as f:
+        head = f.read(len(binary.MAGIC))
+        if head != binary.MAGIC:
+            validator = ReportValidator()
+            validator.feed(head)
+            while chunk := f.read(CHUNK_SIZE):
+                validator.feed(chunk)
+            return validator.close()
+        # decoded from the open input, stdin can't be read again
+        try:
+            for _ in binary.iter_results(f if path == "-" else path, head):
+                pass
+        except ValueError as e:
+            return [str(e)]
+    return []
+
+
+def validate(args: argparse.Namespace) -> int:
+    """Check that the inputs are valid JUnit XML documents for Jenkins."""
+    status = 0
+    for path in args.inputs or ["-"]:
+        problems = _problems(path)
+        for problem in problems:
+            print(f"{path}: {problem}", file=sys.stderr)
+        if problems:
+            status = 1
+        else:
+            print(f"{path}: ok")
+    return status
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="junit-xml", description="Process JUnit XML reports."
+    )
+    commands = parser.add_subparsers(required=True, metavar="command")
+
+    def command(func: Callable[[argparse.Namespace], int]) -> argparse.ArgumentParser:
+        return commands.add_parser(
+            func.__name__, help=func.__doc__, description=func.__doc__
+        )
+
+    def inputs(command_parser: argparse.ArgumentParser) -> None:
+        command_parser.add_argument(
+            "inputs", nargs="*", metavar="input", help="report, - for stdin"
+        )
+
+    def single_input(command_parser: argparse.ArgumentParser) -> None:
+        command_parser.add_argument(
+            "input", nargs="?", default="-", help="report, - for stdin"
+        )
+
+    def output(command_parser: argparse.ArgumentParser) -> None:
+        command_parser.add_argument(
+            "-o", "--output", default="-", help="output file, - for stdout"
+        )
+
+    def pretty(command_parser: argparse.ArgumentParser) -> None:
+        command_parser.add_argument(
+            "--pretty", action="store_true", help="indent the XML output"
+        )
+
+    def dialect(command_parser: argparse.ArgumentParser) -> None:
+        command_parser.add_argument(
+            "--dialect",
+            choices=list(DIALECTS),
+            help="write only the fields read by a CI system, all of them by default",
+        )
+
+    def canonical(command_parser: argparse.ArgumentParser) -> None:
+        command_parser.add_argument(
+            "--canonical",
+            action="store_true",
+            help="sort the suites, test cases and properties for reproducible output",
+        )
+
+    merge_parser = command(merge)
+    inputs(merge_parser)
+    output(merge_parser)
+    pretty(merge_parser)
+    dialect(merge_parser)
+    canonical(merge_parser)
+    merge_parser.set_defaults(func=merge)
+
+    for func in (prettify, minify):
+        command_parser = command(func)
+        single_input(command_parser)
+        output(command_parser)
+        dialect(command_parser)
+        canonical(command_parser)
+        command_parser.set_defaults(func=func)
+
+    split_parser = command(split)
+    single_input(split_parser)
+    split_parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help='path template with an {index} field, e.g. "report-{index:03d}.xml"',
+    )
+    split_parser.add_argument("--max-bytes", type=int, help="size limit of a file")
+    split_parser.add_argument(
+        "--max-cases", type=int, help="maximum number of test cases in a file"
+    )
+    pretty(split_parser)
+    dialect(split_parser)
+    split_parser.set_defaults(func=split)
+
+    convert_parser = command(convert)
+    single_input(convert_parser)
+    output(convert_parser)
+    convert_parser.add_argument(
+        "--from",
+        dest="input_format",
+        choices=["junit", "tap", "jsonl"],
+        default="junit",
+        help="input format, JUnit XML or the binary format by default",
+    )
+    convert_parser.add_argument(
+        "--to", choices=["xml", "binary"], required=True, help="output format"
+    )
+    pretty(convert_parser)
+    dialect(convert_parser)
+    canonical(convert_parser)
+    convert_parser.set_defaults(func=convert)
+
+    transform_parser = command(transform)
+    inputs(transform_parser)
+    output(transform_parser)
+    pretty(transform_parser)
+    dialect(transform_parser)
+    canonical(transform_parser)
+    transform_parser.add_argument(
+        "--drop-passed", action="store_true", help="drop the test cases which passed"
+    )
+    transform_parser.add_argument(
+        "--strip-passed-outputs",
+        action="store_true",
+        help="remove the outputs of the test cases which passed",
+    )
+    transform_parser.add_argument(
+        "--rename-classname",
+        action="append",
+        default=[],
+        metavar="OLD=NEW",
+        help="replace the classname prefix OLD by NEW, can be repeated",
+    )
+    transform_parser.add_argument(
+        "--redact",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="replace the matches of a regular expression in messages and outputs",
+    )
+    transform_parser.set_defaults(func=transform)
+
+    export_parser = command(export)
+    inputs(export_parser)
+    output(export_parser)
+    export_parser.add_argument(
+        "--format", choices=["jsonl", "csv"], required=True, help="output format"
+    )
+    export_parser.add_argument(
+        "--no-outputs",
+        action="store_true",
+        help="leave out the outputs of the test cases",
+    )
+    export_parser.set_defaults(func=export)
+
+    for func in (summarize, validate):
+        command_parser = command(func)
+        inputs(command_parser)
+        command_parser.set_defaults(func=func)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = _parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError, expat.ExpatError) as e:
+        parser.exit(1, f"junit-xml: error: {e}\n")
+
+
+__all__ = ["main"]
@@ -0,0 +1,256 @@
+"""
+Streaming converters of other test result formats into JUnit XML.
+
+The converters read their input one line at a time and yield the results
+like junit_xml.parser.iter_results(): a (suite, case) tuple for every test
+case and (suite, None) once a suite has ended. write_results() adds them to
+an incremental writer, which counts the suites like to_xml_report_file():
+
+    with open("results.tap", encoding="utf-8") as f, XmlReportWriter(out) as w:
+        write_results(iter_tap(f, "suite"), w)
+
+TAP (the Test Anything Protocol, versions 12 to 14): every top level test
+point is a test case, "not ok" is a failure, a SKIP directive is a skip and
+a failed TODO test is a skip too. The YAML block and the diagnostic lines
+following a test point are its output, a message and duration_ms of the
+YAML block are read. Subtests are only counted through their parent test
+point. Tests missing from the plan and "Bail out!" are errors. A failure
+without a message gets the message "not ok", a bail out without a reason
+"Bail out!".
+
+JSON lines: one object per line for every test case, with the keys
+
+    suite        name of the suite, suite_name by default
+    name         name of the test case, required
+    classname
+    elapsed_sec  number of seconds
+    outcome      passed (the default), failure, failed, error or skipped
+    message      message and output of the failure, error or skip, the
+                 outcome is the message of a failure or error without one
+    output
+    type         type of the failure or error
+    stdout
+    stderr
+    file
+    line
+
+The suites are ended in the order of their first test case, at the end.
+"""
+
+import json
+import re
+from collections.abc import Iterable, Iterator
+from typing import Protocol, cast
+
+from junit_xml import TestCase, TestSuite
+from junit_xml.recorder import Outcome
+
+_TAP_TEST = re.compile(
+    r"(?P<not>not )?ok\b *(?P<number>\d+)? *(?:- *)?(?P<description>[^#]*?)"
+    r" *(?:# *(?P<directive>SKIP|TODO)\S* *(?P<reason>.*))?$",
+    re.IGNORECASE,
+)
+_TAP_PLAN = re.compile(r"1\.\.(?P<count>\d+)")
+_TAP_YAML_KEY = re.compile(
+    r" *(?:message: *(?P<message>.*)|duration_ms: *(?P<duration>\d+(?:\.\d*)?) *)$"
+)
+
+_OUTCOMES = {
+    "passed": Outcome.PASSED,
+    "failure": Outcome.FAILURE,
+    "failed": Outcome.FAILURE,
+    "error": Outcome.ERROR,
+    "skipped": Outcome.SKIPPED,
+}
+
+
+class ResultWriter(Protocol):
+    """A writer the results are added to, like XmlReportWriter."""
+
+    def add_test_case(self, suite: TestSuite, test_case: TestCase) -> None:
+        """Write a finished test case of the suite."""
+        ...
+
+    def write_suite(self, suite: TestSuite) -> None:
+        """Write a suite with all of its test cases."""
+        ...
+
+
+def write_results(
+    results: Iterable[tuple[TestSuite, TestCase | None]], writer: ResultWriter
+) -> None:
+    """Add the results to a writer, suites without test cases included."""
+    with_cases: set[int] = set()
+    for suite, case in results:
+        if case is not None:
+            with_cases.add(id(suite))
+            writer.add_test_case(suite, case)
+        elif id(suite) in with_cases:
+            with_cases.discard(id(suite))
+        else:
+            writer.write_suite(suite)
+
+
+class _TapTest:
+    """A test point whose YAML block and diagnostics may still follow."""
+
+    __slots__ = ("description", "directive", "failed", "lines", "number", "reason")
+
+    def __init__(self, match: re.Match[str], number: int) -> None:
+        self.failed = match["not"] is not None
+        self.number = int(match["number"]) if match["number"] else number
+        self.description = match["description"]
+        self.directive = (match["directive"] or "").upper()
+        self.reason = match["reason"] or None
+        self.lines: list[str] = []
+
+    def test_case(self, classname: str | None) -> TestCase:
+        message: str | None = None
+        elapsed_sec: float | None = None
+        for line in self.lines:
+            key = _TAP_YAML_KEY.match(line)
+            if key is None:
+                continue
+            if key["message"] is not None:
+                message = key["message"].strip("'\"")
+            else:
+                elapsed_sec = float(key["duration"]) / 1000
+        output = "\n".join(self.lines) or None
+        case = TestCase(
+            self.description or f"test {self.number}",
+            classname=classname,
+            elapsed_sec=elapsed_sec,
+        )
+        if self.directive == "SKIP":
+            case.add_skipped_info(self.reason, output)
+        elif self.directive == "TODO" and self.failed:
+            case.add_skipped_info(f"TODO {self.reason or ''}".rstrip(), output)
+        elif self.failed:
+            # a failure without a message would not be counted
+            case.add_failure_info(message or "not ok", output)
+        else:
+            case.stdout = output
+        return case
+
+
+def iter_tap(
+    lines: Iterable[str], suite_name: str = "tap", classname: str | None = None
+) -> Iterator[tuple[TestSuite, TestCase | None]]:
+    """Yield the results of a TAP stream as one suite, see the module."""
+    suite = TestSuite(suite_name)
+    planned: int | None = None
+    seen = 0
+    test: _TapTest | None = None
+    yaml: list[str] | None = None
+    for raw_line in lines:
+        line = raw_line.rstrip("\r\n")
+        if yaml is not None:
+            if line.strip() == "...":
+                yaml = None
+            else:
+                yaml.append(line)
+            continue
+        stripped = line.lstrip()
+        indent = len(line) - len(stripped)
+        if indent:
+            # the YAML block of a test point, other indented lines are subtests
+            if test is not None and indent < 4 and stripped == "---":  # noqa: PLR2004
+                yaml = test.lines
+            continue
+        match = _TAP_TEST.match(line)
+        if match is not None:
+            if test is not None:
+                yield suite, test.test_case(classname)
+            seen += 1
+            test = _TapTest(match, seen)
+            continue
+        if line.startswith("#"):
+            if test is not None:
+                test.lines.append(line)
+            continue
+        if test is not None:
+            yield suite, test.test_case(classname)
+            test = None
+        if (plan := _TAP_PLAN.match(line)) is not None:
+            planned = int(plan["count"])
+        elif line.startswith("Bail out!"):
+            case = TestCase("Bail out!", classname=classname)
+            case.add_error_info(line.removeprefix("Bail out!").strip() or "Bail out!")
+            yield suite, case
+            planned = None
+            break
+    if test is not None:
+        yield suite, test.test_case(classname)
+    if planned is not None and seen < planned:
+        case = TestCase("plan", classname=classname)
+        case.add_error_info(f"planned {planned} tests, {seen} ran")
+        yield suite, case
+    yield suite, None
+
+
+def _jsonl_case(record: dict[str, object], number: int) -> tuple[str | None, TestCase]:
+    fields = {
+        key: value if isinstance(value, str) else str(value)
+        for key, value in record.items()
+        if value is not None
+    }
+    name = fields.get("name")
+    if not name:
+        error_message = f"line {number}: a test case needs a name"
+        raise ValueError(error_message)
+    elapsed_sec = record.get("elapsed_sec")
+    if elapsed_sec is not None and not isinstance(elapsed_sec, int | float):
+        error_message = f"line {number}: elapsed_sec is not a number"
+        raise ValueError(error_message)
+    outcome = _OUTCOMES.get(fields.get("outcome", "passed").lower())
+    if outcome is None:
+        error_message = f"line {number}: unknown outcome {fields['outcome']}"
+        raise ValueError(error_message)
+    case = TestCase(
+        name,
+        classname=fields.get("classname"),
+        elapsed_sec=elapsed_sec,
+        stdout=fields.get("stdout"),
+        stderr=fields.get("stderr"),
+        file=fields.get("file"),
+        line=fields.get("line"),
+    )
+    # the outcome is the message of a failure or error without one, which
+    # would not be counted otherwise
+    message = fields.get("message") or fields.get("outcome", "").lower()
+    if outcome == Outcome.FAILURE:
+        case.add_failure_info(message, fields.get("output"), fields.get("type"))
+    elif outcome == Outcome.ERROR:
+        case.add_error_info(message, fields.get("output"), fields.get("type"))
+    elif outcome == Outcome.SKIPPED:
+        case.add_skipped_info(fields.get("message"), fields.get("output"))
+    return fields.get("suite"), case
+
+
+def iter_jsonl(
+    lines: Iterable[str | bytes], suite_name: str = "jsonl"
+) -> Iterator[tuple[TestSuite, TestCase | None]]:
+    """Yield the results of JSON lines, see the module."""
+    suites: dict[str, TestSuite] = {}
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record: object = json.loads(line)
+        except ValueError as e:
+            error_message = f"line {number}: {e}"
+            raise ValueError(error_message) from e
+        if not isinstance(record, dict):
+            error_message = f"line {number}: not a JSON object"
+            raise ValueError(error_message)  # noqa: TRY004
+        name, case = _jsonl_case(cast("dict[str, object]", record), number)
+        name = name or suite_name
+        suite = suites.get(name)
+        if suite is None:
+            suite = suites[name] = TestSuite(name)
+        yield suite, case
+    for suite in suites.values():
+        yield suite, None
+
+
+__all__ = ["ResultWriter", "iter_jsonl", "iter_tap", "write_results"]
@@ -0,0 +1,181 @@
+"""
+Dialects of JUnit XML, the fields read by the CI systems the reports go to.
+
+By default every field of the suites and test cases is written, as in the
+docstring of junit_xml. A dialect writes only the attributes and elements
+a CI system reads, which makes the reports smaller and cheaper to write:
+
+    to_xml_report_file(f, test_suites, dialect="gitlab")
+
+full
+    Every field, the dialect used when none is given.
+jenkins
+    The JUnit plugin, with the class attribute it reads when a test case has
+    no classname, the properties and the outputs of the suites.
+gitlab
+    Unit test reports of merge requests: the file of the test cases, and no
+    properties or outputs of the suites, which GitLab doesn't show.
+azure
+    The JUnit format of the PublishTestResults task, with the hostname and
+    timestamp of the suites, without their properties and outputs.
+surefire
+    The Maven Surefire schema, no outputs of the suites, which the schema
+    doesn't allow.
+
+On the testsuites element, full writes the disabled total and not the
+skipped one, like earlier versions of junit_xml. All the other dialects
+write the skipped total and not the disabled one.
+"""
+
+from collections.abc import Callable, Collection
+from typing import TYPE_CHECKING
+
+from junit_xml._case import case_attributes, case_attributes_plan
+
+if TYPE_CHECKING:
+    from junit_xml._case import TestCase
+    from junit_xml._timestamps import Timestamp
+
+ROOT_FIELDS = frozenset(
+    ["assertions", "disabled", "errors", "failures", "skipped", "tests", "time"]
+)
+SUITE_FIELDS = frozenset(
+    [
+        *ROOT_FIELDS,
+        "file",
+        "hostname",
+        "id",
+        "log",
+        "name",
+        "package",
+        "timestamp",
+        "url",
+    ]
+)
+
+
+class Dialect:
+    """
+    Emission plan of a JUnit XML dialect.
+
+    The fields are the attribute names of the testsuites, testsuite and
+    testcase elements which are written, None for all of them. The testcase
+    attributes are written by a function specialized for the fields once,
+    it runs for every test case. The properties and the system-out and
+    system-err of the suites are written if properties and suite_outputs
+    are set.
+    """
+
+    __slots__ = (
+        "case_attributes",
+        "case_fields",
+        "name",
+        "properties",
+        "root_fields",
+        "suite_fields",
+        "suite_outputs",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        root_fields: Collection[str],
+        suite_fields: Collection[str] | None = None,
+        case_fields: Collection[str] | None = None,
+        properties: bool = True,
+        suite_outputs: bool = True,
+    ) -> None:
+        for fields, known, element in [
+            (root_fields, ROOT_FIELDS, "testsuites"),
+            (suite_fields or (), SUITE_FIELDS, "testsuite"),
+        ]:
+            unknown = set(fields) - known
+            if unknown:
+                error_message = (
+                    f"unknown {element} attributes: {', '.join(sorted(unknown))}"
+                )
+                raise ValueError(error_message)
+        self.name = name
+        self.root_fields = frozenset(root_fields)
+        self.suite_fields = None if suite_fields is None else frozenset(suite_fields)
+        self.case_fields = None if case_fields is None else frozenset(case_fields)
+        self.case_attributes: Callable[[TestCase, Timestamp | None], dict[str, str]] = (
+            case_attributes
+            if case_fields is None
+            else case_attributes_plan(case_fields)
+        )
+        self.properties = properties
+        self.suite_outputs = suite_outputs
+
+    def root_attributes(self, attributes: dict[str, str]) -> dict[str, str]:
+        """Return the attributes of the testsuites element which are written."""
+        fields = self.root_fields
+        return {key: value for key, value in attributes.items() if key in fields}
+
+    def suite_attributes(self, attributes: dict[str, str]) -> dict[str, str]:
+        """Return the attributes of a testsuite element which are written."""
+        fields = self.suite_fields
+        if fields is None:
+            return attributes
+        return {key: value for key, value in attributes.items() if key in fields}
+
+
+DIALECTS = {
+    dialect.name: dialect
+    for dialect in [
+        Dialect("full", ["disabled", "errors", "failures", "tests", "time"]),
+        Dialect(
+            "jenkins",
+            ["errors", "failures", "skipped", "tests", "time"],
+            [
+                *["errors", "failures", "hostname", "id", "name", "package"],
+                *["skipped", "tests", "time", "timestamp"],
+            ],
+            ["class", "classname", "time"],
+        ),
+        Dialect(
+            "gitlab",
+            ["errors", "failures", "skipped", "tests", "time"],
+            ["errors", "failures", "name", "skipped", "tests", "time"],
+            ["classname", "file", "time"],
+            properties=False,
+            suite_outputs=False,
+        ),
+        Dialect(
+            "azure",
+            ["errors", "failures", "skipped", "tests", "time"],
+            [
+                *["errors", "failures", "hostname", "name", "skipped", "tests"],
+                *["time", "timestamp"],
+            ],
+            ["classname", "time"],
+            properties=False,
+            suite_outputs=False,
+        ),
+        Dialect(
+            "surefire",
+            ["errors", "failures", "skipped", "tests", "time"],
+            ["errors", "failures", "name", "skipped", "tests", "time"],
+            ["classname", "time"],
+            suite_outputs=False,
+        ),
+    ]
+}
+
+
+def get_dialect(dialect: "str | Dialect | None") -> Dialect:
+    """Return the dialect of a name, the full one for None."""
+    if dialect is None:
+        return DIALECTS["full"]
+    if isinstance(dialect, Dialect):
+        return dialect
+    try:
+        return DIALECTS[dialect]
+    except KeyError:
+        error_message = (
+            f"unknown dialect {dialect!r}, expected one of {', '.join(DIALECTS)}"
+        )
+        raise ValueError(error_message) from None
+
+
+__all__ = ["DIALECTS", "Dialect", "get_dialect"]
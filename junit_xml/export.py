@@ -0,0 +1,195 @@
+"""
+Export of test results as JSON lines or CSV, one row per test case.
+
+The rows carry the fields of their suite along, for analytics systems which
+ingest line-oriented or columnar data. The results are read like the ones of
+junit_xml.parser.iter_results(), so a report is exported while it is parsed,
+and the rows are written in batches of batch_size test cases:
+
+    with open("report.xml", "rb") as f, open("cases.csv", "w", newline="") as out:
+        export_csv(iter_results(f), out)
+    with open("cases.jsonl", "w", encoding="utf-8") as out:
+        export_jsonl(suite_results(test_suites), out)
+
+The columns are COLUMNS. outcome is passed, failure, error or skipped, the
+first that applies of error, failure and skipped, and message, type and
+output are those of its first element. The timestamps are written like in a
+report. With outputs=False the outputs are left out, they are read into
+memory one test case at a time otherwise.
+
+The JSON lines leave out empty columns. junit_xml.converters.iter_jsonl()
+reads them back with the columns suite, classname, name, elapsed_sec,
+outcome, message, type, output, stdout, stderr, file and line only, the
+other suite_* columns, assertions, timestamp, status, category, log and url
+are lost.
+"""
+
+import csv
+import json
+from collections.abc import Iterable, Iterator
+from typing import TextIO
+
+from junit_xml import TestCase, TestSuite
+from junit_xml._output import read_output
+from junit_xml._timestamps import Timestamp, format_timestamp
+
+COLUMNS: tuple[str, ...] = (
+    "suite",
+    "suite_id",
+    "suite_package",
+    "suite_hostname",
+    "suite_timestamp",
+    "classname",
+    "name",
+    "elapsed_sec",
+    "outcome",
+    "message",
+    "type",
+    "output",
+    "stdout",
+    "stderr",
+    "assertions",
+    "timestamp",
+    "status",
+    "category",
+    "file",
+    "line",
+    "log",
+    "url",
+)
+
+Row = dict[str, str | float | None]
+
+
+def suite_results(
+    test_suites: Iterable[TestSuite],
+) -> Iterator[tuple[TestSuite, TestCase | None]]:
+    """Yield the results of test suites like junit_xml.parser.iter_results()."""
+    for suite in test_suites:
+        for case in suite.iter_test_cases():
+            yield suite, case
+        yield suite, None
+
+
+def _suite_columns(suite: TestSuite) -> Row:
+    timestamp = suite.timestamp
+    return {
+        "suite": suite.name,
+        "suite_id": None if suite.id is None else str(suite.id),
+        "suite_package": suite.package,
+        "suite_hostname": suite.hostname,
+        "suite_timestamp": None if timestamp is None else format_timestamp(timestamp),
+    }
+
+
+def _case_row(
+    suite_columns: Row, case: TestCase, base: Timestamp | None, outputs: bool
+) -> Row:
+    message = result_type = output = None
+    if case.is_error():
+        outcome = "error"
+        error = next(e for e in case.errors if e["message"] or e["output"])
+        message, result_type, output = error["message"], error["type"], error["output"]
+    elif case.is_failure():
+        outcome = "failure"
+        failure = next(f for f in case.failures if f["message"] or f["output"])
+        message, result_type = failure["message"], failure["type"]
+        output = failure["output"]
+    elif case.is_skipped():
+        outcome = "skipped"
+        message, output = case.skipped[0]["message"], case.skipped[0]["output"]
+    else:
+        outcome = "passed"
+    row = dict(suite_columns)
+    row["classname"] = case.classname
+    row["name"] = case.name
+    row["elapsed_sec"] = case.elapsed_sec
+    row["outcome"] = outcome
+    row["message"] = message
+    row["type"] = result_type
+    if outputs:
+        if output is not None:
+            row["output"] = read_output(output)
+        if case.stdout is not None:
+            row["stdout"] = read_output(case.stdout)
+        if case.stderr is not None:
+            row["stderr"] = read_output(case.stderr)
+    row["assertions"] = case.assertions
+    if case.timestamp is not None:
+        row["timestamp"] = format_timestamp(case.timestamp, base)
+    row["status"] = case.status
+    row["category"] = case.category
+    row["file"] = case.file
+    row["line"] = case.line
+    row["log"] = case.log
+    row["url"] = case.url
+    return row
+
+
+def iter_rows(
+    results: Iterable[tuple[TestSuite, TestCase | None]], outputs: bool = True
+) -> Iterator[Row]:
+    """Yield a row for every test case of the results."""
+    last_suite: TestSuite | None = None
+    suite_columns: Row = {}
+    for suite, case in results:
+        if case is None:
+            continue
+        if suite is not last_suite:
+            last_suite = suite
+            suite_columns = _suite_columns(suite)
+        yield _case_row(suite_columns, case, suite.timestamp, outputs)
+
+
+def _batches(rows: Iterator[Row], batch_size: int) -> Iterator[list[Row]]:
+    batch: list[Row] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_jsonl(
+    results: Iterable[tuple[TestSuite, TestCase | None]],
+    fp: TextIO,
+    outputs: bool = True,
+    batch_size: int = 1000,
+) -> int:
+    """Write a JSON object per test case, return the number of rows."""
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    count = 0
+    for batch in _batches(iter_rows(results, outputs), batch_size):
+        fp.write(
+            "".join(
+                encode({k: v for k, v in row.items() if v is not None}) + "\n"
+                for row in batch
+            )
+        )
+        count += len(batch)
+    return count
+
+
+def export_csv(
+    results: Iterable[tuple[TestSuite, TestCase | None]],
+    fp: TextIO,
+    outputs: bool = True,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Write a header and a CSV row per test case, return the number of rows.
+
+    Open a file with newline="" for it, like for the csv module.
+    """
+    writer = csv.DictWriter(fp, COLUMNS)
+    writer.writeheader()
+    count = 0
+    for batch in _batches(iter_rows(results, outputs), batch_size):
+        writer.writerows(batch)
+        count += len(batch)
+    return count
+
+
+__all__ = ["COLUMNS", "export_csv", "export_jsonl", "iter_rows", "suite_results"]
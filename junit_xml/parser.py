@@ -0,0 +1,407 @@
+"""
+Streaming parser of JUnit XML documents.
+
+The document is fed to expat in chunks and every test case is handed out as
+soon as its element ends, together with its suite, so documents of any size
+are read in memory bounded by the largest test case:
+
+    with open("report.xml", "rb") as f:
+        for suite, case in iter_results(f):
+            ...
+
+The counters of the testsuite and testsuites elements are not read, they are
+recomputed from the test cases when the suites are written again.
+
+With memory_map, a file is memory-mapped and fed to expat in slices of the
+mapping, without copying it. parse_parallel() parses the top level suites of
+a large file in worker processes, at the byte ranges found by a pre-scan of
+the mapping with suite_ranges(), and rebuilds them from the binary format.
+"""
+
+import mmap
+import os
+import re
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, BinaryIO
+from xml.parsers import expat
+
+from junit_xml import TestCase, TestSuite, binary
+from junit_xml._output import CHUNK_SIZE
+
+if TYPE_CHECKING:
+    from junit_xml._case import ResultInfo, SkippedInfo
+
+_TEXT_ELEMENTS = frozenset(["error", "failure", "skipped", "system-err", "system-out"])
+
+
+class ParsedTestCase(TestCase):
+    """A TestCase read from a document, with the attributes of its element."""
+
+    # as written, also those which aren't fields of a TestCase, set by _case()
+    attributes: dict[str, str]  # pyright: ignore[reportUninitializedInstanceVariable]
+
+
+class ReportParser:
+    """
+    Incremental parser of a JUnit XML document fed in chunks.
+
+    Both a testsuites root and a single testsuite root are accepted. feed()
+    returns the results completed by a chunk: a (suite, case) tuple for every
+    test case, and (suite, None) when the suite ends, once its properties and
+    outputs are known. The test cases are not added to the suite, they are
+    ParsedTestCase objects with the attributes of their elements. An empty
+    failure or error element gets its tag as the message, to be counted.
+    """
+
+    def __init__(self) -> None:
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.buffer_size = CHUNK_SIZE
+        parser.StartElementHandler = self._start
+        parser.EndElementHandler = self._end
+        parser.CharacterDataHandler = self._data
+        self._parser = parser
+        self._results: list[tuple[TestSuite, TestCase | None]] = []
+        self._suites: list[TestSuite] = []
+        self._case: TestCase | None = None
+        self._depth = 0
+        self._text: list[str] | None = None
+        self._text_attributes: dict[str, str] = {}
+
+    def feed(self, data: bytes | memoryview) -> list[tuple[TestSuite, TestCase | None]]:
+        """Parse a chunk of the document, return the completed results."""
+        self._parser.Parse(data, False)  # noqa: FBT003
+        return self._take_results()
+
+    def close(self) -> list[tuple[TestSuite, TestCase | None]]:
+        """Finish the document, return the last completed results."""
+        self._parser.Parse(b"", True)  # noqa: FBT003
+        return self._take_results()
+
+    def _take_results(self) -> list[tuple[TestSuite, TestCase | None]]:
+        results = self._results
+        self._results = []
+        return results
+
+    def _start(self, tag: str, attributes: dict[str, str]) -> None:
+        self._depth += 1
+        if self._depth == 1 and tag not in ("testsuite", "testsuites"):
+            error_message = f"unexpected root element <{tag}>"
+            raise ValueError(error_message)
+        if tag == "testsuite":
+            self._suites.append(_suite(attributes))
+        elif tag == "testcase" and self._suites:
+            try:
+                self._case = _case(attributes)
+            except ValueError as e:
+                line = self._parser.CurrentLineNumber
+                error_message = f"line {line}: {e} of <testcase>"
+                raise ValueError(error_message) from e
+        elif tag == "property" and self._suites and self._case is None:
+            suite = self._suites[-1]
+            if suite.properties is None:
+                suite.properties = {}
+            suite.properties[attributes.get("name", "")] = attributes.get("value", "")
+        elif tag in _TEXT_ELEMENTS and self._suites:
+            self._text = []
+            self._text_attributes = attributes
+
+    def _end(self, tag: str) -> None:
+        self._depth -= 1
+        if tag == "testsuite":
+            self._results.append((self._suites.pop(), None))
+        elif tag == "testcase" and self._case is not None:
+            self._results.append((self._suites[-1], self._case))
+            self._case = None
+        elif tag in _TEXT_ELEMENTS and self._text is not None:
+            self._text_element(tag, "".join(self._text) or None)
+            self._text = None
+
+    def _data(self, data: str) -> None:
+        if self._text is not None:
+            self._text.append(data)
+
+    def _text_element(self, tag: str, text: str | None) -> None:
+        attributes = self._text_attributes
+        case = self._case
+        if case is None:
+            suite = self._suites[-1]
+            if tag == "system-out":
+                suite.stdout = text
+            elif tag == "system-err":
+                suite.stderr = text
+        elif tag == "system-out":
+            case.stdout = text
+        elif tag == "system-err":
+            case.stderr = text
+        elif tag == "skipped":
+            skipped: SkippedInfo = {
+                "message": attributes.get("message"),
+                "output": text,
+                "type": attributes.get("type"),
+            }
+            case.skipped.append(skipped)
+        else:
+            # an empty element is still a failure or error, TestCase counts
+            # only those with a message or output
+            info: ResultInfo = {
+                "message": attributes.get("message") or (None if text else tag),
+                "output": text,
+                "type": attributes.get("type"),
+            }
+            (case.failures if tag == "failure" else case.errors).append(info)
+
+
+def _suite(attributes: dict[str, str]) -> TestSuite:
+    return TestSuite(
+        attributes.get("name", ""),
+        hostname=attributes.get("hostname"),
+        id=attributes.get("id"),
+        package=attributes.get("package"),
+        timestamp=attributes.get("timestamp"),
+        file=attributes.get("file"),
+        log=attributes.get("log"),
+        url=attributes.get("url"),
+    )
+
+
+def _case(attributes: dict[str, str]) -> ParsedTestCase:
+    time = attributes.get("time")
+    assertions = attributes.get("assertions")
+    try:
+        elapsed_sec = float(time) if time else None
+    except ValueError:
+        error_message = f"time {time!r} is not a number"
+        raise ValueError(error_message) from None
+    if assertions and not (assertions.isascii() and assertions.isdigit()):
+        error_message = f"assertions {assertions!r} is not a count"
+        raise ValueError(error_message)
+    case = ParsedTestCase(
+        attributes.get("name", ""),
+        classname=attributes.get("classname"),
+        elapsed_sec=elapsed_sec,
+        assertions=int(assertions) if assertions else None,
+        timestamp=attributes.get("timestamp"),
+        status=attributes.get("status"),
+        category=attributes.get("class"),
+        file=attributes.get("file"),
+        line=attributes.get("line"),
+        log=attributes.get("log"),
+        url=attributes.get("url"),
+    )
+    case.attributes = attributes
+    return case
+
+
+def iter_results(
+    source: str | os.PathLike[str] | BinaryIO,
+    chunk_size: int = CHUNK_SIZE,
+    memory_map: bool = False,
+) -> Iterator[tuple[TestSuite, TestCase | None]]:
+    """
+    Yield the results of a JUnit XML document read in chunks.
+
+    A (suite, case) tuple is yielded for every test case and (suite, None)
+    when the suite ends, see ReportParser. With memory_map, a file is read
+    from a memory mapping instead, an empty file or one which can't be
+    mapped, like a pipe, is read in chunks.
+    """
+    if isinstance(source, str | os.PathLike):
+        with open(source, "rb") as f:  # noqa: PTH123
+            yield from iter_results(f, chunk_size, memory_map)
+        return
+    if memory_map and (mapped := _map(source)) is not None:
+        with mapped:
+            yield from _iter_mapped(mapped, chunk_size)
+        return
+    parser = ReportParser()
+    while chunk := source.read(chunk_size):
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def _map(source: BinaryIO) -> mmap.mmap | None:
+    try:
+        return mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+def _iter_mapped(
+    mapped: mmap.mmap,
+    chunk_size: int,
+    start: int = 0,
+    end: int | None = None,
+    prolog: bytes = b"",
+) -> Iterator[tuple[TestSuite, TestCase | None]]:
+    """Yield the results of a mapped document, or of a range after a prolog."""
+    end = len(mapped) if end is None else end
+    parser = ReportParser()
+    if prolog:
+        yield from parser.feed(prolog)
+    view = memoryview(mapped)
+    try:
+        for offset in range(start, end, chunk_size):
+            yield from parser.feed(view[offset : min(offset + chunk_size, end)])
+        yield from parser.close()
+    finally:
+        view.release()
+
+
+def parse(
+    source: str | os.PathLike[str] | BinaryIO, memory_map: bool = False
+) -> list[TestSuite]:
+    """Return the test suites of a JUnit XML document with their test cases."""
+    return _collect(iter_results(source, memory_map=memory_map))
+
+
+def _collect(results: Iterable[tuple[TestSuite, TestCase | None]]) -> list[TestSuite]:
+    """Return the suites of results with their test cases."""
+    test_suites: list[TestSuite] = []
+    for suite, case in results:
+        if case is not None:
+            suite.test_cases.append(case)
+        else:
+            test_suites.append(suite)
+    return test_suites
+
+
+# the markup the pre-scan looks for, comments and CDATA sections are skipped
+_SCAN = re.compile(
+    rb"<(?:(?P<start>testsuite)[\s/>]|(?P<end>/testsuite)\s*>|!--|!\[CDATA\[)"
+)
+_START_TAG_END = re.compile(rb"""(?:[^>"']|"[^"]*"|'[^']*')*>""")
+_DECLARATION = re.compile(rb"\s*<\?xml[^>]*\?>")
+
+
+def suite_ranges(data: bytes | mmap.mmap) -> list[tuple[int, int]]:
+    """
+    Return the byte ranges of the top level testsuite elements of a document.
+
+    The elements are found by a scan of the markup, without parsing the
+    document, a testsuite root is one range. Nested suites are part of the
+    range of their top level suite.
+    """
+    ranges: list[tuple[int, int]] = []
+    depth = 0
+    start = 0
+    position = 0
+    while (match := _SCAN.search(data, position)) is not None:
+        position = match.end()
+        if match["start"]:
+            tag_end = _START_TAG_END.match(data, match.start())
+            if tag_end is None:
+                break
+            position = tag_end.end()
+            self_closing = data[position - 2 : position - 1] == b"/"
+            if depth == 0:
+                start = match.start()
+                if self_closing:
+                    ranges.append((start, position))
+            if not self_closing:
+                depth += 1
+        elif match["end"]:
+            depth -= 1
+            if depth == 0:
+                ranges.append((start, position))
+        else:
+            terminator = b"-->" if match[0] == b"<!--" else b"]]>"
+            end = data.find(terminator, position)
+            if end < 0:
+                break
+            position = end + len(terminator)
+    return ranges
+
+
+def parse_parallel(
+    path: str | os.PathLike[str],
+    max_workers: int | None = None,
+    min_batch_size: int = 16 * CHUNK_SIZE,
+) -> list[TestSuite]:
+    """
+    Parse the top level suites of a file in worker processes.
+
+    Returns the test suites like parse(), with ParsedTestCase objects. The
+    suites are found with suite_ranges() and handed to the workers in batches
+    of at least min_batch_size bytes. The workers map the file and send the
+    parsed suites back in the binary format, with their outputs, and the
+    attributes of the test cases next to it. With a single batch or a single
+    CPU, the file is parsed in this process.
+    """
+    path = os.fspath(path)
+    with open(path, "rb") as f:  # noqa: PTH123
+        mapped = _map(f)
+        if mapped is None:
+            return parse(f)
+        with mapped:
+            declaration = _DECLARATION.match(mapped)
+            prolog = declaration[0] if declaration is not None else b""
+            ranges = suite_ranges(mapped)
+    batches: list[list[tuple[int, int]]] = []
+    size = min_batch_size
+    for suite_range in ranges:
+        if size >= min_batch_size:
+            batches.append([])
+            size = 0
+        batches[-1].append(suite_range)
+        size += suite_range[1] - suite_range[0]
+    if len(batches) <= 1 or (max_workers or os.cpu_count() or 1) <= 1:
+        return parse(path, memory_map=True)
+    test_suites: list[TestSuite] = []
+    with ProcessPoolExecutor(max_workers) as executor:
+        for data, attributes in executor.map(
+            _parse_ranges, [path] * len(batches), [prolog] * len(batches), batches
+        ):
+            case_attributes = iter(attributes)
+            for suite in binary.loads(data):
+                suite.test_cases[:] = [
+                    _parsed_case(case, next(case_attributes))
+                    for case in suite.test_cases
+                ]
+                test_suites.append(suite)
+    return test_suites
+
+
+def _parsed_case(case: TestCase, attributes: dict[str, str]) -> ParsedTestCase:
+    """Return a decoded test case as a ParsedTestCase with its attributes."""
+    parsed = ParsedTestCase.__new__(ParsedTestCase)
+    parsed.__dict__.update(case.__dict__)
+    parsed.attributes = attributes
+    return parsed
+
+
+def _parse_ranges(
+    path: str, prolog: bytes, ranges: list[tuple[int, int]]
+) -> tuple[bytes, list[dict[str, str]]]:
+    """
+    Parse ranges of a file, return the suites in the binary format.
+
+    The attributes of the test cases, which the binary format doesn't keep,
+    are returned next to it in the order of the cases.
+    """
+    test_suites: list[TestSuite] = []
+    with open(path, "rb") as f:  # noqa: PTH123
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with mapped:
+        for start, end in ranges:
+            # the declaration names the encoding of the document
+            results = _iter_mapped(mapped, CHUNK_SIZE, start, end, prolog)
+            test_suites.extend(_collect(results))
+    attributes = [
+        case.attributes
+        for suite in test_suites
+        for case in suite.test_cases
+        if isinstance(case, ParsedTestCase)
+    ]
+    return binary.dumps(test_suites), attributes
+
+
+__all__ = [
+    "ParsedTestCase",
+    "ReportParser",
+    "iter_results",
+    "parse",
+    "parse_parallel",
+    "suite_ranges",
+]
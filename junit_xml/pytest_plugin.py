@@ -0,0 +1,178 @@
+"""
+pytest plugin which streams a JUnit XML report while the tests run.
+
+    pytest --junit-xml-stream=report.xml
+
+Every test case is written to the spool of an XmlReportWriter as soon as its
+teardown has finished, so the results are not kept until the end of the
+session, and the report is only assembled from the spool when the session
+finishes. With pytest-xdist the workers don't write anything, their reports
+are forwarded to the controller, which streams them into the one report.
+
+The test cases are named like the junitxml plugin of pytest names them: the
+classname is the dotted module path with the test class, if any. Failures of
+setup and teardown are errors, expected failures are skipped.
+"""
+
+import socket
+from datetime import UTC, datetime
+from typing import TextIO
+
+import pytest
+
+from junit_xml import TestCase, TestSuite
+from junit_xml._writers import XmlReportWriter
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("junit-xml", "streaming JUnit XML report")
+    group.addoption(
+        "--junit-xml-stream",
+        dest="junit_xml_stream",
+        metavar="path",
+        default=None,
+        help="stream a JUnit XML report to path while the tests run",
+    )
+    group.addoption(
+        "--junit-xml-stream-suite",
+        dest="junit_xml_stream_suite",
+        metavar="name",
+        default="pytest",
+        help="name of the test suite of the report, pytest by default",
+    )
+    group.addoption(
+        "--junit-xml-stream-output",
+        dest="junit_xml_stream_output",
+        action="store_true",
+        default=False,
+        help="write the captured output of the tests to the report",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    path = config.getoption("junit_xml_stream")
+    # xdist workers have workerinput, their results go to the controller, and
+    # the plugin may be loaded twice, by its entry point and by -p
+    if (
+        path
+        and not hasattr(config, "workerinput")
+        and not config.pluginmanager.has_plugin("junit_xml_stream")
+    ):
+        config.pluginmanager.register(
+            StreamingReport(
+                str(path),
+                str(config.getoption("junit_xml_stream_suite")),
+                bool(config.getoption("junit_xml_stream_output")),
+            ),
+            "junit_xml_stream",
+        )
+
+
+class StreamingReport:
+    """
+    The plugin object which writes the report of a session.
+
+    The phases of a test case are collected until its teardown report, test
+    cases of different xdist workers are kept apart by the worker node.
+    """
+
+    def __init__(self, path: str, suite_name: str, output: bool = False) -> None:
+        self.path = path
+        self.output = output
+        self.suite = TestSuite(suite_name, hostname=socket.gethostname())
+        self._file: TextIO | None = None
+        self._writer: XmlReportWriter | None = None
+        self._cases: dict[tuple[str, object], TestCase] = {}
+
+    def pytest_sessionstart(self) -> None:
+        """Open the report and its writer."""
+        self.suite.timestamp = datetime.now(UTC)
+        self._file = open(self.path, "w", encoding="utf-8")  # noqa: PTH123, SIM115
+        self._writer = XmlReportWriter(self._file, encoding="utf-8")
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        """Add a phase of a test case, write the test case after teardown."""
+        key = (report.nodeid, getattr(report, "node", None))
+        case = self._cases.get(key)
+        if case is None:
+            case = self._cases[key] = _test_case(report)
+        case.elapsed_sec = (case.elapsed_sec or 0) + report.duration
+        if report.failed:
+            message = _crash_message(report)
+            if report.when == "call":
+                case.add_failure_info(message, report.longreprtext)
+            else:
+                case.add_error_info(message, report.longreprtext)
+        elif report.skipped:
+            case.add_skipped_info(_skip_message(report))
+        if report.when == "teardown":
+            # the teardown report has the output captured in all the phases
+            if self.output:
+                case.stdout = report.capstdout or None
+                case.stderr = report.capstderr or None
+            del self._cases[key]
+            self._add(case)
+
+    def pytest_collectreport(self, report: pytest.CollectReport) -> None:
+        """Write a failed collection as an error."""
+        if report.failed:
+            case = TestCase(_module(report.nodeid), file=report.fspath)
+            case.add_error_info("collection failure", report.longreprtext)
+            self._add(case)
+
+    def _add(self, case: TestCase) -> None:
+        if self._writer is not None:
+            self._writer.add_test_case(self.suite, case)
+
+    def pytest_sessionfinish(self) -> None:
+        """Write the report from the spool."""
+        # test cases of an interrupted session without their teardown
+        for case in self._cases.values():
+            self._add(case)
+        self._cases.clear()
+        if self._writer is not None:
+            self._writer.write_suite(self.suite)
+            self._writer.close()
+            self._writer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def pytest_terminal_summary(
+        self, terminalreporter: pytest.TerminalReporter
+    ) -> None:
+        """Name the report in the summary."""
+        terminalreporter.write_sep("-", f"generated xml file: {self.path}")
+
+
+def _module(path: str) -> str:
+    return path.removesuffix(".py").replace("/", ".")
+
+
+def _test_case(report: pytest.TestReport) -> TestCase:
+    path, _, names = report.nodeid.partition("::")
+    *classes, name = names.split("::")
+    file, line, _ = report.location
+    return TestCase(
+        name,
+        classname=".".join([_module(path), *classes]),
+        elapsed_sec=0,
+        file=file,
+        line=str(line + 1) if line is not None else None,
+    )
+
+
+def _crash_message(report: pytest.TestReport) -> str:
+    crash = getattr(report.longrepr, "reprcrash", None)
+    if crash is not None:
+        return str(crash.message)
+    return f"{report.when} failed"
+
+
+def _skip_message(report: pytest.TestReport) -> str:
+    if hasattr(report, "wasxfail"):
+        reason = str(report.wasxfail)
+        return f"expected failure: {reason}" if reason else "expected failure"
+    if isinstance(report.longrepr, tuple):
+        return report.longrepr[2].removeprefix("Skipped: ")
+    return "skipped"
@@ -0,0 +1,322 @@
+"""
+Recording of test results from the hot path of a test runner.
+
+Instead of building a TestCase per result, a recorder appends the result to
+compact columns (C arrays for numbers, a string table for the repeated suite
+and class names) and builds the TestSuite and TestCase objects only when the
+report is written.
+"""
+
+import copy
+import itertools
+import math
+import threading
+from array import array
+from collections.abc import Iterable, Iterator
+from enum import IntEnum
+from heapq import merge
+from typing import Protocol, TextIO
+
+from junit_xml import OutputSource, TestCase, TestSuite, to_xml_report_file
+from junit_xml._timestamps import Timestamp
+
+
+class Outcome(IntEnum):
+    """Result of a finished test case."""
+
+    PASSED = 0
+    FAILURE = 1
+    ERROR = 2
+    SKIPPED = 3
+
+
+_OUTCOMES = frozenset(Outcome)
+
+_Details = tuple[
+    str | None, OutputSource | None, OutputSource | None, OutputSource | None
+]
+
+
+class _Buffer:
+    """Columns of the results recorded by one thread."""
+
+    __slots__ = (
+        "classnames",
+        "details",
+        "elapsed",
+        "ids",
+        "names",
+        "outcomes",
+        "sequence",
+        "strings",
+        "suites",
+    )
+
+    def __init__(self) -> None:
+        # string table, index 0 stands for None
+        self.ids: dict[str | None, int] = {None: 0}
+        self.strings: list[str | None] = [None]
+        self.suites = array("I")
+        self.classnames = array("I")
+        self.names: list[str] = []
+        # NaN stands for no elapsed time
+        self.elapsed = array("d")
+        self.outcomes = array("B")
+        # message and outputs, only for the few cases which have any
+        self.details: dict[int, _Details] = {}
+        # global order of the results, used when merging several buffers
+        self.sequence = array("Q")
+
+    def append(
+        self,
+        suite: str,
+        name: str,
+        classname: str | None,
+        elapsed_sec: float | None,
+        outcome: int,
+        message: str | None,
+        output: OutputSource | None,
+        stdout: OutputSource | None,
+        stderr: OutputSource | None,
+        sequence: int | None = None,
+    ) -> None:
+        # converted and checked first, a result which fails leaves no trace
+        # in any of the columns
+        elapsed = math.nan if elapsed_sec is None else float(elapsed_sec)
+        if outcome not in _OUTCOMES:
+            error_message = f"unknown outcome {outcome!r}"
+            raise ValueError(error_message)
+        ids = self.ids
+        suite_id = ids.get(suite)
+        if suite_id is None:
+            suite_id = ids[suite] = len(self.strings)
+            self.strings.append(suite)
+        classname_id = ids.get(classname)
+        if classname_id is None:
+            classname_id = ids[classname] = len(self.strings)
+            self.strings.append(classname)
+        if message is not None or output or stdout or stderr:
+            self.details[len(self.names)] = (message, output, stdout, stderr)
+        self.suites.append(suite_id)
+        self.classnames.append(classname_id)
+        self.names.append(name)
+        self.elapsed.append(elapsed)
+        self.outcomes.append(outcome)
+        if sequence is not None:
+            self.sequence.append(sequence)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def test_case(self, index: int) -> TestCase:
+        """Build the TestCase of the result at index."""
+        elapsed_sec = self.elapsed[index]
+        message, output, stdout, stderr = self.details.get(
+            index, (None, None, None, None)
+        )
+        case = TestCase(
+            name=self.names[index],
+            classname=self.strings[self.classnames[index]],
+            elapsed_sec=None if math.isnan(elapsed_sec) else elapsed_sec,
+            stdout=stdout,
+            stderr=stderr,
+        )
+        outcome = self.outcomes[index]
+        if outcome == Outcome.FAILURE:
+            case.add_failure_info(message, output)
+        elif outcome == Outcome.ERROR:
+            case.add_error_info(message, output)
+        elif outcome == Outcome.SKIPPED:
+            case.add_skipped_info(message, output)
+        return case
+
+    def iter_cases(self) -> Iterator[tuple[str, TestCase]]:
+        """Yield the suite name and TestCase of every result in order."""
+        strings = self.strings
+        for index, suite_id in enumerate(self.suites):
+            suite = strings[suite_id]
+            assert suite is not None
+            yield suite, self.test_case(index)
+
+
+class _RecordsSuites(Protocol):
+    def to_test_suites(self) -> list[TestSuite]: ...
+
+
+class _BaseRecorder:
+    """Suite attributes and report writing shared by the recorders."""
+
+    def __init__(self) -> None:
+        self._suite_templates: dict[str, TestSuite] = {}
+        # only needed by ThreadSafeRecorder, suite_info() is off the hot path
+        self._lock = threading.Lock()
+
+    def suite_info(
+        self,
+        suite: str,
+        hostname: str | None = None,
+        id: int | str | None = None,  # noqa: A002
+        package: str | None = None,
+        timestamp: Timestamp | None = None,
+        properties: dict[str, str] | None = None,
+    ) -> None:
+        """Set the attributes of a suite, it is not needed for every suite."""
+        with self._lock:
+            self._suite_templates[suite] = TestSuite(
+                suite,
+                hostname=hostname,
+                id=id,
+                package=package,
+                timestamp=timestamp,
+                properties=properties,
+            )
+
+    def to_xml_report_file(
+        self: _RecordsSuites,
+        file_descriptor: TextIO,
+        prettyprint: bool = True,
+        encoding: str | None = None,
+    ) -> None:
+        """Write the JUnit XML document of the recorded results to a file."""
+        to_xml_report_file(
+            file_descriptor,
+            self.to_test_suites(),
+            prettyprint=prettyprint,
+            encoding=encoding,
+        )
+
+
+class Recorder(_BaseRecorder):
+    """
+    Collects test results with a low overhead per finished test case.
+
+    Not thread-safe, use ThreadSafeRecorder for parallel test runners.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._buffer = _Buffer()
+
+    def case_finished(
+        self,
+        suite: str,
+        name: str,
+        classname: str | None = None,
+        elapsed_sec: float | None = None,
+        outcome: int = Outcome.PASSED,
+        message: str | None = None,
+        output: OutputSource | None = None,
+        stdout: OutputSource | None = None,
+        stderr: OutputSource | None = None,
+    ) -> None:
+        """Record the result of a finished test case."""
+        self._buffer.append(
+            suite,
+            name,
+            classname,
+            elapsed_sec,
+            outcome,
+            message,
+            output,
+            stdout,
+            stderr,
+        )
+
+    def __len__(self) -> int:
+        """Return the number of recorded results."""
+        return len(self._buffer)
+
+    def to_test_suites(self) -> list[TestSuite]:
+        """Build the test suites in the order their first result was recorded."""
+        return _build_test_suites(self._buffer.iter_cases(), self._suite_templates)
+
+
+class ThreadSafeRecorder(_BaseRecorder):
+    """
+    Recorder which can be called from many threads at once.
+
+    Every thread records into its own buffer, so there is no lock on the hot
+    path. The buffers are merged in the order the results were recorded.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._local = threading.local()
+        self._buffers: list[_Buffer] = []
+        self._sequence = itertools.count()
+
+    def _thread_buffer(self) -> _Buffer:
+        buffer = _Buffer()
+        with self._lock:
+            self._buffers.append(buffer)
+        self._local.buffer = buffer
+        return buffer
+
+    def case_finished(
+        self,
+        suite: str,
+        name: str,
+        classname: str | None = None,
+        elapsed_sec: float | None = None,
+        outcome: int = Outcome.PASSED,
+        message: str | None = None,
+        output: OutputSource | None = None,
+        stdout: OutputSource | None = None,
+        stderr: OutputSource | None = None,
+    ) -> None:
+        """Record the result of a finished test case."""
+        try:
+            buffer: _Buffer = self._local.buffer
+        except AttributeError:
+            buffer = self._thread_buffer()
+        buffer.append(
+            suite,
+            name,
+            classname,
+            elapsed_sec,
+            outcome,
+            message,
+            output,
+            stdout,
+            stderr,
+            next(self._sequence),
+        )
+
+    def __len__(self) -> int:
+        """Return the number of recorded results."""
+        with self._lock:
+            return sum(len(buffer) for buffer in self._buffers)
+
+    def to_test_suites(self) -> list[TestSuite]:
+        """Build the test suites in the order their first result was recorded."""
+        with self._lock:
+            buffers = list(self._buffers)
+        merged = merge(
+            *(
+                zip(buffer.sequence, buffer.iter_cases(), strict=True)
+                for buffer in buffers
+            ),
+            key=lambda item: item[0],
+        )
+        return _build_test_suites(
+            (suite_and_case for _, suite_and_case in merged), self._suite_templates
+        )
+
+
+def _build_test_suites(
+    cases: Iterable[tuple[str, TestCase]], templates: dict[str, TestSuite]
+) -> list[TestSuite]:
+    """Group the cases into test suites, which are ordered by first case."""
+    suites: dict[str, TestSuite] = {}
+    for suite_name, case in cases:
+        suite = suites.get(suite_name)
+        if suite is None:
+            template = templates.get(suite_name)
+            suite = copy.copy(template) if template else TestSuite(suite_name)
+            suite.test_cases = []
+            suites[suite_name] = suite
+        suite.test_cases.append(case)
+    return list(suites.values())
+
+
+__all__ = ["Outcome", "Recorder", "ThreadSafeRecorder"]
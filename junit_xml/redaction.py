@@ -0,0 +1,91 @@
+"""
+Redaction of secrets while a report is written.
+
+A Redactor given to to_xml_report_file(), to_xml_report_string() or the
+incremental writers replaces the secrets in every attribute value and text
+of the document, outputs included, as they are written:
+
+    redactor = Redactor(patterns=[r"ghp_[A-Za-z0-9]{36}"], literals=[api_key])
+    to_xml_report_file(f, test_suites, redactor=redactor)
+
+The patterns and the escaped literals, the longest first, are compiled into
+one pattern together with the characters which are illegal in XML, so the
+secrets are replaced in the same pass that removes those characters. Outputs
+are redacted chunk by chunk, the last max_match characters of a chunk are
+held back until the next one, so a secret split over two chunks is still
+found if its match isn't longer than that.
+"""
+
+import re
+from collections.abc import Iterable, Iterator
+
+from junit_xml._sanitize import illegal_xml_re
+
+
+class Redactor:
+    """Replacement of secrets and removal of illegal XML characters."""
+
+    def __init__(
+        self,
+        patterns: Iterable[str] = (),
+        literals: Iterable[str] = (),
+        replacement: str = "[REDACTED]",
+        max_match: int = 1024,
+    ) -> None:
+        literals = sorted({literal for literal in literals if literal}, key=len)
+        secrets = [
+            *(f"(?:{pattern})" for pattern in patterns),
+            *(re.escape(literal) for literal in reversed(literals)),
+        ]
+        if secrets and re.fullmatch("|".join(secrets), ""):
+            error_message = "the patterns must not match an empty string"
+            raise ValueError(error_message)
+        self.replacement = replacement
+        self.max_match = max_match
+        self.pattern = re.compile(
+            "|".join([*secrets, f"(?P<_illegal>{illegal_xml_re().pattern})"])
+        )
+
+    def _replace(self, match: re.Match[str]) -> str:
+        return "" if match["_illegal"] is not None else self.replacement
+
+    def sub(self, text: str) -> str:
+        """Return the text with its secrets and illegal characters replaced."""
+        return self.pattern.sub(self._replace, text)
+
+    def iter_redacted(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Yield the chunks of a text with its secrets replaced, see sub()."""
+        carry = ""
+        held = False
+        for chunk in chunks:
+            text = carry + chunk
+            cut = len(text) - self.max_match
+            if cut <= 0:
+                carry = text
+                continue
+            parts: list[str] = []
+            position = 0
+            deferred = False
+            for match in self.pattern.finditer(text):
+                start, end = match.span()
+                if start >= cut:
+                    break
+                # a match over the cut may go on in the next chunk, unless it
+                # was held back already
+                if end > cut and not (held and start == 0):
+                    cut = start
+                    deferred = True
+                    break
+                parts.append(text[position:start])
+                parts.append(self._replace(match))
+                position = end
+            cut = max(cut, position)
+            parts.append(text[position:cut])
+            carry = text[cut:]
+            held = deferred
+            yield "".join(parts)
+        if carry:
+            yield self.sub(carry)
+
+
+__all__ = ["Redactor"]
@@ -0,0 +1,170 @@
+"""
+Test suites which keep a bounded number of test cases in memory.
+
+A SpillingTestSuite keeps the test cases added with add_test_case() in memory
+until there are max_cases of them, then encodes them into a temporary file,
+in the compact records of junit_xml.binary. The totals of the suite are kept
+up to date while the cases are added, and when the report is written the
+cases are decoded one at a time from a memory mapping of the file, their
+outputs only in chunks:
+
+    suite = SpillingTestSuite("suite", max_cases=10_000)
+    for result in results:
+        suite.add_test_case(TestCase(result.name, elapsed_sec=result.time))
+    print(suite.counters.failures)
+    to_xml_report_file(f, [suite])
+
+The spilled test cases are read back in the order they were added, the
+classname order of merge_test_cases() sorts test_cases only. The canonical
+form of to_xml_report_file() sorts all of them, which loads them at once.
+"""
+
+import mmap
+import tempfile
+import threading
+from collections.abc import Iterator
+from typing import IO
+
+from junit_xml import OutputSource, TestCase, TestSuite
+from junit_xml._records import RecordDecoder, RecordEncoder
+from junit_xml._suite import suite_counters
+from junit_xml._timestamps import Timestamp
+
+
+class CaseSpill:
+    """
+    Test cases of a suite, all but the last few in a temporary file.
+
+    The case store of a SpillingTestSuite, its counters collect the
+    statistics of the suite if it has them. A relative timestamp of a test
+    case is stored added to the timestamp of the suite when it is spilled,
+    invalid bytes of its outputs are handled by the error policy errors.
+    """
+
+    def __init__(
+        self, suite: TestSuite, max_cases: int, errors: str = "replace"
+    ) -> None:
+        if max_cases < 1:
+            error_message = "max_cases must be at least 1"
+            raise ValueError(error_message)
+        self.suite = suite
+        self.max_cases = max_cases
+        self.counters = suite_counters(suite)
+        self.spilled = 0
+        self._cases: list[TestCase] = []
+        self._lock = threading.Lock()
+        self._encoder = RecordEncoder(errors)
+        self._buffer = bytearray()
+        self._file: IO[bytes] | None = None
+        self._size = 0
+
+    def add(self, test_case: TestCase) -> None:
+        """Store a test case, spill the cases in memory if there are too many."""
+        with self._lock:
+            self.counters.add(test_case)
+            self._cases.append(test_case)
+            if len(self._cases) >= self.max_cases:
+                self._spill()
+
+    def _spill(self) -> None:
+        """Append the cases in memory to the file."""
+        if self._file is None:
+            self._file = tempfile.TemporaryFile()  # noqa: SIM115
+        buffer = self._buffer
+        name = self.suite.name
+        base = self.suite.timestamp
+        for case in self._cases:
+            self._encoder.encode_case(name, case, buffer, base=base)
+        self._file.write(buffer)
+        self._size += len(buffer)
+        self.spilled += len(self._cases)
+        buffer.clear()
+        self._cases.clear()
+
+    def __iter__(self) -> Iterator[TestCase]:
+        """
+        Yield the test cases in the order they were added.
+
+        The cases added while iterating are not yielded.
+        """
+        with self._lock:
+            cases = list(self._cases)
+            size = self._size
+            if self._file is not None:
+                self._file.flush()
+        if size:
+            assert self._file is not None
+            # the outputs stay in the mapping, which lives as long as they do
+            mapped = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+            decoder = RecordDecoder(lazy_outputs=True)
+            for record in decoder.iter_records(mapped):
+                if not isinstance(record, TestSuite):
+                    yield record[1]
+        yield from cases
+
+    def __len__(self) -> int:
+        """Return the number of stored test cases."""
+        return self.counters.tests
+
+    def close(self) -> None:
+        """Remove the temporary file, the spilled cases are lost."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._size = self.spilled = 0
+
+
+class SpillingTestSuite(TestSuite):
+    """
+    A test suite which spills its test cases to disk, max_cases at a time.
+
+    The test cases added with add_test_case() go to a CaseSpill, test_cases
+    holds only those given otherwise. counters are the running totals of the
+    added cases. The outputs of the spilled test cases are decoded when they
+    are spilled, with the error policy errors, pass the one of the report.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_cases: int = 10_000,
+        hostname: str | None = None,
+        id: int | str | None = None,  # noqa: A002
+        package: str | None = None,
+        timestamp: Timestamp | None = None,
+        properties: dict[str, str] | None = None,
+        file: str | None = None,
+        log: str | None = None,
+        url: str | None = None,
+        stdout: OutputSource | None = None,
+        stderr: OutputSource | None = None,
+        statistics: bool = False,
+        slowest: int = 10,
+        errors: str = "replace",
+    ) -> None:
+        super().__init__(
+            name,
+            hostname=hostname,
+            id=id,
+            package=package,
+            timestamp=timestamp,
+            properties=properties,
+            file=file,
+            log=log,
+            url=url,
+            stdout=stdout,
+            stderr=stderr,
+            statistics=statistics,
+            slowest=slowest,
+        )
+        self.spill = CaseSpill(self, max_cases, errors)
+        self.case_store = self.spill
+        self.counters = self.spill.counters
+
+    def close(self) -> None:
+        """Remove the temporary file of the spilled test cases."""
+        self.spill.close()
+
+
+__all__ = ["CaseSpill", "SpillingTestSuite"]
@@ -0,0 +1,191 @@
+"""
+Statistics of the test cases of a suite, for dashboards.
+
+A suite created with statistics=True collects them in the same pass over its
+test cases as the totals of the testsuite element, and they are written as
+properties of the suite:
+
+    statistics.failure_rate  failed test cases / test cases
+    statistics.error_rate    test cases with errors / test cases
+    statistics.time.p50      percentiles of elapsed_sec
+    statistics.time.p90
+    statistics.time.p99
+    statistics.slowest.1     elapsed_sec and classname.name of the slowest
+    statistics.slowest.2     test cases, as many as slowest of the suite
+    ...
+
+TestSuite.summary() returns them as a SuiteSummary. The percentiles are
+estimated from logarithmic buckets with a relative error of at most 1%, so
+memory doesn't grow with the number of test cases, and they don't depend on
+the order of the test cases.
+"""
+
+import heapq
+import math
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from junit_xml._case import TestCase
+
+# relative accuracy of the percentiles, bucket i holds (GAMMA^(i-1), GAMMA^i]
+ACCURACY = 0.01
+_GAMMA = (1 + ACCURACY) / (1 - ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+PERCENTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+_SlowCase = tuple[float, str, str]
+
+
+class SuiteSummary:
+    """Statistics of the test cases of a suite."""
+
+    __slots__ = (
+        "error_rate",
+        "errors",
+        "failure_rate",
+        "failures",
+        "percentiles",
+        "skipped",
+        "slowest",
+        "tests",
+    )
+
+    def __init__(
+        self,
+        tests: int,
+        failures: int,
+        errors: int,
+        skipped: int,
+        percentiles: dict[str, float],
+        slowest: list[tuple[float, str | None, str]],
+    ) -> None:
+        self.tests = tests
+        self.failures = failures
+        self.errors = errors
+        self.skipped = skipped
+        self.failure_rate = failures / tests if tests else 0.0
+        self.error_rate = errors / tests if tests else 0.0
+        # by name, like p50, empty without timed test cases
+        self.percentiles = percentiles
+        # elapsed_sec, classname and name, the slowest first
+        self.slowest = slowest
+
+    def properties(self) -> dict[str, str]:
+        """Return the statistics as properties of the suite."""
+        properties = {
+            "statistics.failure_rate": f"{self.failure_rate:f}",
+            "statistics.error_rate": f"{self.error_rate:f}",
+        }
+        for name, value in self.percentiles.items():
+            properties[f"statistics.time.{name}"] = f"{value:f}"
+        for rank, (elapsed_sec, classname, name) in enumerate(self.slowest, 1):
+            test = f"{classname}.{name}" if classname else name
+            properties[f"statistics.slowest.{rank}"] = f"{elapsed_sec:f} {test}"
+        return properties
+
+
+class SuiteStatistics:
+    """
+    Collector of the elapsed times of the test cases of a suite.
+
+    The times are counted in logarithmic buckets, the slowest test cases are
+    kept in a heap of at most slowest entries. Test cases without a finite
+    elapsed_sec are not timed.
+    """
+
+    __slots__ = ("buckets", "heap", "maximum", "minimum", "slowest", "timed", "zero")
+
+    def __init__(self, slowest: int = 10) -> None:
+        self.slowest = slowest
+        self.timed = 0
+        # times of 0 and below, they have no bucket
+        self.zero = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.buckets: dict[int, int] = {}
+        # the slowest test cases, the fastest of them first
+        self.heap: list[_SlowCase] = []
+
+    def add(self, case: "TestCase") -> None:
+        """Time a test case."""
+        elapsed_sec = case.elapsed_sec
+        if elapsed_sec is None or not math.isfinite(elapsed_sec):
+            return
+        self._add_time(elapsed_sec)
+        if self.slowest:
+            self._add_slow((elapsed_sec, str(case.classname or ""), str(case.name)))
+
+    def _add_time(self, elapsed_sec: float) -> None:
+        self.timed += 1
+        self.minimum = min(self.minimum, elapsed_sec)
+        self.maximum = max(self.maximum, elapsed_sec)
+        if elapsed_sec <= 0:
+            self.zero += 1
+            return
+        bucket = math.ceil(math.log(elapsed_sec) / _LOG_GAMMA)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def _add_slow(self, entry: _SlowCase) -> None:
+        # ties are decided by classname and name, not by the order of adding
+        heap = self.heap
+        if len(heap) < self.slowest:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def add_statistics(self, other: "SuiteStatistics") -> None:
+        """Time the test cases timed by other."""
+        self.timed += other.timed
+        self.zero += other.zero
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        if self.slowest:
+            for entry in other.heap:
+                self._add_slow(entry)
+
+    def percentile(self, q: float) -> float | None:
+        """
+        Return the q quantile of the times, None without timed test cases.
+
+        It is the time of the test case of rank ceil(q * timed), estimated
+        with a relative error of at most ACCURACY.
+        """
+        if not self.timed:
+            return None
+        rank = max(1, math.ceil(q * self.timed))
+        if rank <= self.zero:
+            return max(self.minimum, 0.0)
+        seen = self.zero
+        value = self.maximum
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                value = 2 * _GAMMA**bucket / (_GAMMA + 1)
+                break
+        return min(max(value, self.minimum), self.maximum)
+
+    def slowest_cases(self) -> list[tuple[float, str | None, str]]:
+        """Return elapsed_sec, classname and name of the slowest test cases."""
+        return [
+            (elapsed_sec, classname or None, name)
+            for elapsed_sec, classname, name in sorted(self.heap, reverse=True)
+        ]
+
+    def summary(
+        self, tests: int, failures: int, errors: int, skipped: int
+    ) -> SuiteSummary:
+        """Return the summary of the suite with the given totals."""
+        percentiles: dict[str, float] = {}
+        for name, q in PERCENTILES.items():
+            value = self.percentile(q)
+            if value is not None:
+                percentiles[name] = value
+        return SuiteSummary(
+            tests, failures, errors, skipped, percentiles, self.slowest_cases()
+        )
+
+
+__all__ = ["ACCURACY", "PERCENTILES", "SuiteStatistics", "SuiteSummary"]
@@ -0,0 +1,204 @@
+"""
+Streaming transformation of JUnit XML reports.
+
+A Pipeline applies stages to the results of a report while it is parsed, and
+adds the transformed results to an incremental writer, which recomputes the
+counters of the suites and of the root element from the test cases that are
+left, like to_xml_report_string() does. Memory stays bounded by the largest
+test case, whatever the size of the report:
+
+    pipeline = Pipeline(drop_passed(), redact("token=[0-9a-f]+"))
+    with open("report.xml", "rb") as f, open("failed.xml", "w") as out:
+        pipeline.transform(f, out)
+
+A stage takes the (suite, case) results of junit_xml.parser.iter_results(),
+with (suite, None) at the end of each suite, and yields results in turn, so
+it can drop, change or add test cases and suites. filter_cases(),
+map_cases() and filter_suites() make stages of functions of one result. The
+test cases are changed in place by the stages of this module.
+"""
+
+import os
+from collections.abc import Callable, Iterable, Iterator
+from typing import BinaryIO, TextIO
+
+from junit_xml import TestCase, TestSuite
+from junit_xml._output import OutputSource, decode, iter_output
+from junit_xml._writers import XmlReportWriter
+from junit_xml.converters import ResultWriter, write_results
+from junit_xml.parser import iter_results
+from junit_xml.redaction import Redactor
+
+Result = tuple[TestSuite, TestCase | None]
+Stage = Callable[[Iterable[Result]], Iterator[Result]]
+
+
+def filter_cases(predicate: Callable[[TestSuite, TestCase], bool]) -> Stage:
+    """Return a stage which keeps the test cases the predicate is true for."""
+
+    def stage(results: Iterable[Result]) -> Iterator[Result]:
+        for suite, case in results:
+            if case is None or predicate(suite, case):
+                yield suite, case
+
+    return stage
+
+
+def map_cases(func: Callable[[TestSuite, TestCase], TestCase | None]) -> Stage:
+    """Return a stage which replaces every test case, None drops it."""
+
+    def stage(results: Iterable[Result]) -> Iterator[Result]:
+        for suite, case in results:
+            if case is None:
+                yield suite, None
+            elif (mapped := func(suite, case)) is not None:
+                yield suite, mapped
+
+    return stage
+
+
+def filter_suites(predicate: Callable[[TestSuite], bool]) -> Stage:
+    """
+    Return a stage which keeps the suites the predicate is true for.
+
+    The predicate is called once per suite, with its first result, before
+    its properties and outputs are known.
+    """
+
+    def stage(results: Iterable[Result]) -> Iterator[Result]:
+        kept: dict[int, bool] = {}
+        for suite, case in results:
+            keep = kept.get(id(suite))
+            if keep is None:
+                keep = kept[id(suite)] = predicate(suite)
+            if case is None:
+                del kept[id(suite)]
+            if keep:
+                yield suite, case
+
+    return stage
+
+
+def drop_passed() -> Stage:
+    """Return a stage which drops the test cases which passed."""
+    return filter_cases(lambda _, case: not _passed(case))
+
+
+def strip_passed_outputs() -> Stage:
+    """Return a stage which removes the outputs of the test cases which passed."""
+
+    def strip(_: TestSuite, case: TestCase) -> TestCase:
+        if _passed(case):
+            case.stdout = case.stderr = None
+        return case
+
+    return map_cases(strip)
+
+
+def rename_classnames(rename: Callable[[str | None], str | None]) -> Stage:
+    """Return a stage which renames the classname of every test case."""
+
+    def stage(_: TestSuite, case: TestCase) -> TestCase:
+        case.classname = rename(case.classname)
+        return case
+
+    return map_cases(stage)
+
+
+def redact(pattern: str | Redactor, replacement: str = "[REDACTED]") -> Stage:
+    """
+    Return a stage which replaces the matches of a pattern in the results.
+
+    The pattern can be a Redactor, see junit_xml.redaction, replacement is
+    then ignored. The messages and outputs of the failures, errors and skips
+    are redacted, the outputs of the test cases and suites and the values of
+    the suite properties. Lazy outputs stay lazy, they are redacted chunk by
+    chunk while they are written. The names, classnames and other attributes
+    are left untouched, as are the names of the properties.
+    """
+    redactor = (
+        pattern
+        if isinstance(pattern, Redactor)
+        else Redactor([pattern], replacement=replacement)
+    )
+
+    def stage(results: Iterable[Result]) -> Iterator[Result]:
+        for suite, case in results:
+            if case is None:
+                # the properties and outputs of a suite are only known, and
+                # written, at its end
+                suite.stdout = _redacted(redactor, suite.stdout)
+                suite.stderr = _redacted(redactor, suite.stderr)
+                if suite.properties:
+                    suite.properties = {
+                        key: redactor.sub(decode(value))
+                        for key, value in suite.properties.items()
+                    }
+            else:
+                for info in (*case.failures, *case.errors, *case.skipped):
+                    if info["message"] is not None:
+                        info["message"] = redactor.sub(info["message"])
+                    info["output"] = _redacted(redactor, info["output"])
+                case.stdout = _redacted(redactor, case.stdout)
+                case.stderr = _redacted(redactor, case.stderr)
+            yield suite, case
+
+    return stage
+
+
+def _redacted(redactor: Redactor, output: OutputSource | None) -> OutputSource | None:
+    if output is None:
+        return None
+    if isinstance(output, str):
+        return redactor.sub(output)
+    return lambda: redactor.iter_redacted(iter_output(output))
+
+
+def _passed(case: TestCase) -> bool:
+    return not (case.is_failure() or case.is_error() or case.is_skipped())
+
+
+class Pipeline:
+    """Stages applied in order to the results of reports."""
+
+    def __init__(self, *stages: Stage) -> None:
+        self.stages = list(stages)
+
+    def apply(self, results: Iterable[Result]) -> Iterator[Result]:
+        """Yield the results transformed by all the stages."""
+        for stage in self.stages:
+            results = stage(results)
+        yield from results
+
+    def write(
+        self, source: str | os.PathLike[str] | BinaryIO, writer: ResultWriter
+    ) -> None:
+        """Parse a report and add its transformed results to a writer."""
+        write_results(self.apply(iter_results(source)), writer)
+
+    def transform(
+        self,
+        source: str | os.PathLike[str] | BinaryIO,
+        file_descriptor: TextIO,
+        prettyprint: bool = False,
+        encoding: str | None = None,
+    ) -> None:
+        """Parse a report and write the transformed report to a file."""
+        writer = XmlReportWriter(file_descriptor, prettyprint, encoding)
+        self.write(source, writer)
+        # not written if reading failed, unlike when leaving a with block
+        writer.close()
+
+
+__all__ = [
+    "Pipeline",
+    "Result",
+    "Stage",
+    "drop_passed",
+    "filter_cases",
+    "filter_suites",
+    "map_cases",
+    "redact",
+    "rename_classnames",
+    "strip_passed_outputs",
+]
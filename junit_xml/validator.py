@@ -0,0 +1,314 @@
+"""
+Streaming validation of JUnit XML documents.
+
+Checks the structure Jenkins can parse, as described in the docstring of
+junit_xml: the allowed elements and their attributes, numeric counters and
+times, counters of the testsuite elements which match their test cases and
+totals of the testsuites element which match the suites. The time of a suite
+isn't compared with its test cases, runners like pytest include the setup
+and teardown of the suite in it. Characters which
+are not allowed in XML documents are reported too, also the ones that expat
+accepts.
+
+The document is validated in a single pass over chunks of it, a file with
+validate(), or the output of to_xml_report_file() and XmlReportWriter while
+it is written, with their validate option. That parses the document once
+more, writing takes about 1.5 times as long, so it's meant for debugging and
+tests of the writers rather than for every report.
+"""
+
+import math
+import os
+from typing import BinaryIO
+from xml.parsers import expat
+
+from junit_xml._output import CHUNK_SIZE
+from junit_xml._sanitize import has_illegal_xml_chars
+
+_TEXT_ELEMENTS = frozenset(["error", "failure", "skipped", "system-err", "system-out"])
+
+_CHILDREN: dict[str, frozenset[str]] = {
+    "": frozenset(["testsuite", "testsuites"]),
+    "testsuites": frozenset(["testsuite"]),
+    "testsuite": frozenset(
+        ["properties", "system-err", "system-out", "testcase", "testsuite"]
+    ),
+    "properties": frozenset(["property"]),
+    "property": frozenset(),
+    "testcase": frozenset(
+        ["error", "failure", "properties", "skipped", "system-err", "system-out"]
+    ),
+    **dict.fromkeys(_TEXT_ELEMENTS, frozenset[str]()),
+}
+
+_COUNTERS = ("assertions", "disabled", "errors", "failures", "skipped", "tests")
+
+_ATTRIBUTES: dict[str, frozenset[str]] = {
+    "testsuites": frozenset([*_COUNTERS, "name", "time", "timestamp"]),
+    "testsuite": frozenset(
+        [
+            *_COUNTERS,
+            *["file", "hostname", "id", "log", "name", "package"],
+            *["time", "timestamp", "url"],
+        ]
+    ),
+    "property": frozenset(["name", "value"]),
+    "testcase": frozenset(
+        [
+            *["assertions", "class", "classname", "file", "line", "log", "name"],
+            *["status", "time", "timestamp", "url"],
+        ]
+    ),
+    "failure": frozenset(["message", "type"]),
+    "error": frozenset(["message", "type"]),
+    "skipped": frozenset(["message", "type"]),
+    "system-out": frozenset(),
+    "system-err": frozenset(),
+    "properties": frozenset(),
+}
+
+_REQUIRED: dict[str, tuple[str, ...]] = {
+    "testsuite": ("name",),
+    "testcase": ("name",),
+    "property": ("name", "value"),
+}
+
+# counters of a suite which are checked against its test cases
+_COUNTED = ("errors", "failures", "skipped", "tests")
+_COUNTER_OF = {"error": "errors", "failure": "failures", "skipped": "skipped"}
+
+
+class _Element:
+    """An open element with the counts of its children."""
+
+    __slots__ = ("attributes", "counts", "line", "tag", "time")
+
+    def __init__(self, tag: str, attributes: dict[str, str], line: int) -> None:
+        self.tag = tag
+        self.attributes = attributes
+        self.line = line
+        self.counts: dict[str, int] = dict.fromkeys(_COUNTED, 0)
+        self.time = 0.0
+
+
+class ReportValidator:
+    """
+    Incremental validator of a JUnit XML document fed in chunks.
+
+    The problems are collected with their line numbers, not raised, at most
+    max_problems of them. A document which isn't well-formed ends the
+    validation at the first error.
+    """
+
+    def __init__(self, max_problems: int = 100) -> None:
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.buffer_size = CHUNK_SIZE
+        parser.StartElementHandler = self._start
+        parser.EndElementHandler = self._end
+        parser.CharacterDataHandler = self._data
+        self._parser = parser
+        self.max_problems = max_problems
+        self.problems: list[str] = []
+        self.problem_count = 0
+        self._stack: list[_Element] = []
+        self._failed = False
+        self._pending: list[str] = []
+        self._pending_size = 0
+
+    def feed(self, data: str | bytes) -> None:
+        """Validate a chunk of the document."""
+        if self._failed:
+            return
+        try:
+            self._parser.Parse(data, False)  # noqa: FBT003
+        except expat.ExpatError as e:
+            self._failed = True
+            self._problem(f"{expat.ErrorString(e.code)}", e.lineno)
+
+    def write(self, chunk: str) -> None:
+        """
+        Validate a chunk of the document written by a writer.
+
+        The chunks are buffered and validated together, serializers write
+        many small ones, so this can be the write function of a writer.
+        """
+        self._pending.append(chunk)
+        self._pending_size += len(chunk)
+        if self._pending_size >= CHUNK_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            self.feed("".join(self._pending))
+            self._pending = []
+            self._pending_size = 0
+
+    def close(self) -> list[str]:
+        """Finish the document, return the problems found."""
+        self._flush()
+        if not self._failed:
+            try:
+                self._parser.Parse(b"", True)  # noqa: FBT003
+            except expat.ExpatError as e:
+                self._failed = True
+                self._problem(f"{expat.ErrorString(e.code)}", e.lineno)
+        if self.problem_count > len(self.problems):
+            more = self.problem_count - len(self.problems)
+            return [*self.problems, f"and {more} more problems"]
+        return list(self.problems)
+
+    def check(self) -> None:
+        """Finish the document, raise ValueError if it has problems."""
+        problems = self.close()
+        if problems:
+            error_message = "invalid JUnit XML report:\n" + "\n".join(problems)
+            raise ValueError(error_message)
+
+    def _problem(self, message: str, line: int | None = None) -> None:
+        self.problem_count += 1
+        if len(self.problems) < self.max_problems:
+            if line is None:
+                line = self._parser.CurrentLineNumber
+            self.problems.append(f"line {line}: {message}")
+
+    def _start(self, tag: str, attributes: dict[str, str]) -> None:
+        stack = self._stack
+        parent = stack[-1].tag if stack else ""
+        allowed = _CHILDREN.get(parent)
+        if allowed is not None and tag not in allowed:
+            where = f"in <{parent}>" if parent else "as root element"
+            self._problem(f"unexpected element <{tag}> {where}")
+        element = _Element(tag, attributes, self._parser.CurrentLineNumber)
+        if attributes or tag in _REQUIRED:
+            time = self._check_attributes(tag, attributes)
+            if time is not None and tag == "testcase" and stack:
+                stack[-1].time += time
+        stack.append(element)
+
+    def _check_attributes(self, tag: str, attributes: dict[str, str]) -> float | None:
+        """Report the problems of the attributes of an element, return its time."""
+        known = _ATTRIBUTES.get(tag)
+        if known is not None and not known.issuperset(attributes):
+            for name in attributes.keys() - known:
+                self._problem(f"unexpected attribute {name} of <{tag}>")
+        for name in _REQUIRED.get(tag, ()):
+            if name not in attributes:
+                self._problem(f"missing attribute {name} of <{tag}>")
+        time = None
+        for name, value in attributes.items():
+            if name == "time":
+                time = _number(value)
+                if time is None:
+                    self._problem(f"time of <{tag}> is not a number: {value!r}")
+            elif name in _COUNTERS and not (value.isascii() and value.isdigit()):
+                self._problem(f"{name} of <{tag}> is not a count: {value!r}")
+        if has_illegal_xml_chars("".join(attributes.values())):
+            self._problem(f"illegal character in an attribute of <{tag}>")
+        return time
+
+    def _end(self, tag: str) -> None:
+        stack = self._stack
+        element = stack.pop()
+        parent = stack[-1] if stack else None
+        if tag == "testsuite":
+            self._check_suite(element)
+            if parent is not None:
+                self._add_suite(parent, element)
+        elif tag == "testcase" and parent is not None:
+            counts = parent.counts
+            counts["tests"] += 1
+            for name in _COUNTER_OF.values():
+                counts[name] += element.counts[name]
+        elif tag in _COUNTER_OF and parent is not None:
+            # counted once per test case, however many elements it has
+            parent.counts[_COUNTER_OF[tag]] = 1
+        elif tag == "testsuites":
+            self._check_root(element)
+
+    def _check_suite(self, suite: _Element) -> None:
+        attributes = suite.attributes
+        for name in _COUNTED:
+            value = attributes.get(name)
+            if value is not None and value.isdigit():
+                counted = suite.counts[name]
+                if int(value) != counted:
+                    self._problem(
+                        f"{name} of <testsuite> is {value}, counted {counted}",
+                        suite.line,
+                    )
+
+    @staticmethod
+    def _add_suite(parent: _Element, suite: _Element) -> None:
+        """Add the counters of a suite to the totals of the root element."""
+        attributes = suite.attributes
+        counts = parent.counts
+        for name in (*_COUNTED, "disabled"):
+            value = attributes.get(name)
+            if value is not None and value.isdigit():
+                counts[name] = counts.get(name, 0) + int(value)
+            else:
+                counts[name] = counts.get(name, 0) + suite.counts.get(name, 0)
+        time = _number(attributes.get("time"))
+        parent.time += suite.time if time is None else time
+        counts["suites"] = counts.get("suites", 0) + 1
+
+    def _check_root(self, root: _Element) -> None:
+        attributes = root.attributes
+        for name in (*_COUNTED, "disabled"):
+            value = attributes.get(name)
+            if value is not None and value.isdigit():
+                total = root.counts.get(name, 0)
+                if int(value) != total:
+                    self._problem(
+                        f"{name} of <testsuites> is {value}, the suites have {total}",
+                        root.line,
+                    )
+        time = _number(attributes.get("time"))
+        if time is not None and not _close(
+            time, root.time, root.counts.get("suites", 0)
+        ):
+            self._problem(
+                f"time of <testsuites> is {attributes['time']}, "
+                f"the suites took {root.time:f}",
+                root.line,
+            )
+
+    def _data(self, data: str) -> None:
+        stack = self._stack
+        if stack and stack[-1].tag not in _TEXT_ELEMENTS:
+            if not data.isspace():
+                self._problem(f"unexpected text in <{stack[-1].tag}>")
+        elif has_illegal_xml_chars(data):
+            self._problem("illegal character in the text of an element")
+
+
+def _number(value: str | None) -> float | None:
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _close(declared: float, total: float, count: int) -> bool:
+    """Compare a time with a sum of times written with 6 decimals."""
+    return math.isclose(declared, total, rel_tol=1e-9, abs_tol=1e-6 * (count + 1))
+
+
+def validate(
+    source: str | os.PathLike[str] | BinaryIO, chunk_size: int = CHUNK_SIZE
+) -> list[str]:
+    """Return the problems of a JUnit XML document, which is read in chunks."""
+    if isinstance(source, str | os.PathLike):
+        with open(source, "rb") as f:  # noqa: PTH123
+            return validate(f, chunk_size)
+    validator = ReportValidator()
+    while chunk := source.read(chunk_size):
+        validator.feed(chunk)
+    return validator.close()
+
+
+__all__ = ["ReportValidator", "validate"]
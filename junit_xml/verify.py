@@ -0,0 +1,261 @@
+"""
+Streaming verification of JUnit XML reports, for tests of report writers.
+
+The report is read in a single pass by junit_xml.parser.iter_results(),
+without building a DOM, into an index of its test cases by suite name,
+classname and name. Each indexed test case keeps the attributes of its
+testcase element as written, and its failures, errors, skips and outputs:
+
+    report = ReportIndex("report.xml")
+    report.assert_case(
+        "suite",
+        "test_login",
+        classname="tests.auth",
+        attributes={"time": "1.500000"},
+        failures=[{"message": "denied", "type": "AssertionError"}],
+    )
+
+The assertions raise AssertionError naming the test case and the mismatch.
+Golden reports with many test cases can be indexed for a few of them only,
+with keys, then the others are parsed but not kept.
+"""
+
+import os
+from collections.abc import Collection, Iterator, Mapping, Sequence
+from typing import TYPE_CHECKING, BinaryIO
+
+from junit_xml._output import CHUNK_SIZE
+from junit_xml.parser import ParsedTestCase, iter_results
+
+if TYPE_CHECKING:
+    from junit_xml._case import ResultInfo, SkippedInfo
+
+CaseKey = tuple[str, str | None, str]
+"""Suite name, classname and name of a test case."""
+
+
+class CaseResult:
+    """A test case of a report, as written."""
+
+    __slots__ = (
+        "attributes",
+        "errors",
+        "failures",
+        "skipped",
+        "stderr",
+        "stdout",
+        "suite",
+    )
+
+    @classmethod
+    def from_test_case(cls, suite: str, case: ParsedTestCase) -> "CaseResult":
+        """Return the result of a test case read by junit_xml.parser."""
+        result = cls(suite, case.attributes)
+        result.errors = [_payload(info) for info in case.errors]
+        result.failures = [_payload(info) for info in case.failures]
+        result.skipped = [_payload(info) for info in case.skipped]
+        # the parser keeps the outputs as text
+        result.stdout = case.stdout if isinstance(case.stdout, str) else None
+        result.stderr = case.stderr if isinstance(case.stderr, str) else None
+        return result
+
+    def __init__(self, suite: str, attributes: dict[str, str]) -> None:
+        self.suite = suite
+        self.attributes = attributes
+        # message, output and type of each element, None when absent
+        self.errors: list[dict[str, str | None]] = []
+        self.failures: list[dict[str, str | None]] = []
+        self.skipped: list[dict[str, str | None]] = []
+        self.stdout: str | None = None
+        self.stderr: str | None = None
+
+    @property
+    def key(self) -> CaseKey:
+        """Return the key of the test case in a ReportIndex."""
+        return (
+            self.suite,
+            self.attributes.get("classname"),
+            self.attributes.get("name", ""),
+        )
+
+    def assert_matches(
+        self,
+        attributes: Mapping[str, str] | None = None,
+        errors: Sequence[Mapping[str, str | None]] | None = None,
+        failures: Sequence[Mapping[str, str | None]] | None = None,
+        skipped: Sequence[Mapping[str, str | None]] | None = None,
+        stdout: str | None = None,
+        stderr: str | None = None,
+        exact_attributes: bool = False,
+    ) -> None:
+        """
+        Assert that the test case is as expected.
+
+        Only the given expectations are checked. The attributes must have the
+        expected values, and with exact_attributes there must be no others.
+        errors, failures and skipped list the expected elements in order, an
+        empty list expects none, and only the keys of the expected mappings
+        (message, output and type) are compared, None for an absent value.
+        """
+        if attributes is not None:
+            self._assert_attributes(attributes, exact_attributes)
+        for tag, expected, actual in (
+            ("error", errors, self.errors),
+            ("failure", failures, self.failures),
+            ("skipped", skipped, self.skipped),
+        ):
+            if expected is not None:
+                self._assert_payloads(tag, expected, actual)
+        for tag, expected, actual in (
+            ("system-out", stdout, self.stdout),
+            ("system-err", stderr, self.stderr),
+        ):
+            if expected is not None and actual != expected:
+                error_message = (
+                    f"{self._describe()}: {tag} is {actual!r}, expected {expected!r}"
+                )
+                raise AssertionError(error_message)
+
+    def _assert_attributes(
+        self, expected: Mapping[str, str], exact_attributes: bool
+    ) -> None:
+        for name, value in expected.items():
+            actual = self.attributes.get(name)
+            if actual != value:
+                error_message = (
+                    f"{self._describe()}: attribute {name} is {actual!r}, "
+                    f"expected {value!r}"
+                )
+                raise AssertionError(error_message)
+        if exact_attributes:
+            unexpected = sorted(self.attributes.keys() - expected.keys())
+            if unexpected:
+                error_message = (
+                    f"{self._describe()}: unexpected attributes {', '.join(unexpected)}"
+                )
+                raise AssertionError(error_message)
+
+    def _assert_payloads(
+        self,
+        tag: str,
+        expected: Sequence[Mapping[str, str | None]],
+        actual: list[dict[str, str | None]],
+    ) -> None:
+        if len(actual) != len(expected):
+            error_message = (
+                f"{self._describe()}: {len(actual)} {tag} elements, "
+                f"expected {len(expected)}"
+            )
+            raise AssertionError(error_message)
+        for i, (expected_payload, payload) in enumerate(
+            zip(expected, actual, strict=True)
+        ):
+            for name, value in expected_payload.items():
+                if payload.get(name) != value:
+                    error_message = (
+                        f"{self._describe()}: {name} of {tag} {i} is "
+                        f"{payload.get(name)!r}, expected {value!r}"
+                    )
+                    raise AssertionError(error_message)
+
+    def _describe(self) -> str:
+        suite, classname, name = self.key
+        test = f"{classname}.{name}" if classname else name
+        return f"test case {test} of suite {suite}"
+
+
+def _payload(info: "ResultInfo | SkippedInfo") -> dict[str, str | None]:
+    output = info["output"]
+    return {
+        "message": info["message"],
+        "output": output if isinstance(output, str) else None,
+        "type": info.get("type"),
+    }
+
+
+class ReportIndex:
+    """
+    The test cases of a JUnit XML report by suite name, classname and name.
+
+    source is a path or a binary file. With keys, only those test cases are
+    indexed. A test case is indexed under its innermost suite, test cases
+    with the same key are all kept, in the order of the report.
+    """
+
+    def __init__(
+        self,
+        source: str | os.PathLike[str] | BinaryIO,
+        keys: Collection[CaseKey] | None = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> None:
+        self.cases: dict[CaseKey, list[CaseResult]] = {}
+        wanted = frozenset(keys) if keys is not None else None
+        for suite, case in iter_results(source, chunk_size):
+            if case is None:
+                continue
+            assert isinstance(case, ParsedTestCase)
+            key = (suite.name, case.classname, case.name)
+            if wanted is None or key in wanted:
+                result = CaseResult.from_test_case(suite.name, case)
+                self.cases.setdefault(key, []).append(result)
+
+    def __len__(self) -> int:
+        """Return the number of indexed test cases."""
+        return sum(len(cases) for cases in self.cases.values())
+
+    def __iter__(self) -> Iterator[CaseResult]:
+        """Yield the indexed test cases."""
+        for cases in self.cases.values():
+            yield from cases
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether a test case with the key was indexed."""
+        return key in self.cases
+
+    def case(self, suite: str, name: str, classname: str | None = None) -> CaseResult:
+        """
+        Return the test case with the given key.
+
+        Raise AssertionError unless there is exactly one such test case.
+        """
+        cases = self.cases.get((suite, classname, name), [])
+        if len(cases) != 1:
+            test = f"{classname}.{name}" if classname else name
+            found = "no test case" if not cases else f"{len(cases)} test cases"
+            error_message = f"{found} {test} in suite {suite}"
+            raise AssertionError(error_message)
+        return cases[0]
+
+    def assert_case(
+        self,
+        suite: str,
+        name: str,
+        classname: str | None = None,
+        attributes: Mapping[str, str] | None = None,
+        errors: Sequence[Mapping[str, str | None]] | None = None,
+        failures: Sequence[Mapping[str, str | None]] | None = None,
+        skipped: Sequence[Mapping[str, str | None]] | None = None,
+        stdout: str | None = None,
+        stderr: str | None = None,
+        exact_attributes: bool = False,
+    ) -> CaseResult:
+        """
+        Assert that the test case exists once and is as expected.
+
+        See CaseResult.assert_matches() for the expectations. Return the
+        test case.
+        """
+        case = self.case(suite, name, classname)
+        case.assert_matches(
+            attributes,
+            errors=errors,
+            failures=failures,
+            skipped=skipped,
+            stdout=stdout,
+            stderr=stderr,
+            exact_attributes=exact_attributes,
+        )
+        return case
+
+
+__all__ = ["CaseKey", "CaseResult", "ReportIndex"]
@@ -0,0 +1,58 @@
+import io
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import XmlReportWriter, to_xml_report_file, to_xml_report_path
+from junit_xml.atomic import atomic_file
+
+
+def _test_suites() -> list[Suite]:
+    return [Suite("suite", [Case("Test1", stdout="out äöü"), Case("Test2")])]
+
+
+@pytest.mark.parametrize("fsync", ["never", "file", "full"])
+def test_to_xml_report_path(tmp_path: Path, fsync: str) -> None:
+    path = tmp_path / "report.xml"
+    assert to_xml_report_path(path, _test_suites(), encoding="utf-8", fsync=fsync)
+    expected = io.StringIO()
+    to_xml_report_file(expected, _test_suites(), encoding="utf-8")
+    assert path.read_text(encoding="utf-8") == expected.getvalue()
+    assert [p.name for p in tmp_path.iterdir()] == ["report.xml"]
+
+
+def test_failed_write_keeps_file(tmp_path: Path) -> None:
+    path = tmp_path / "report.xml"
+    path.write_text("previous", encoding="utf-8")
+
+    def stdout() -> Iterator[str]:
+        yield "out"
+        error_message = "runner killed"
+        raise RuntimeError(error_message)
+
+    test_suites = [Suite("suite", [Case("Test1", stdout=stdout)])]
+    with pytest.raises(RuntimeError, match="runner killed"):
+        to_xml_report_path(path, test_suites, buffer_size=16)
+    assert path.read_text(encoding="utf-8") == "previous"
+    assert [p.name for p in tmp_path.iterdir()] == ["report.xml"]
+
+
+def test_atomic_file(tmp_path: Path) -> None:
+    path = tmp_path / "report.xml"
+    with atomic_file(path) as f, XmlReportWriter(f) as writer:
+        writer.write_suite(_test_suites()[0])
+        assert not path.exists()
+    assert "<system-out>out" in path.read_text(encoding="utf-8")
+    if os.name == "posix":
+        umask = os.umask(0)
+        os.umask(umask)
+        assert path.stat().st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_unknown_fsync_policy(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="unknown fsync policy 'sometimes'"):
+        to_xml_report_path(tmp_path / "report.xml", [], fsync="sometimes")
@@ -0,0 +1,113 @@
+from io import BytesIO, StringIO
+from pathlib import Path
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import binary, to_xml_report_string
+
+
+def _test_suites() -> list[Suite]:
+    tc1 = Case("Test1", classname="some.class", elapsed_sec=1.5, stdout="out äöü")
+    tc1.add_failure_info("Failed", "failure output " * 10000, "AssertionError")
+    tc2 = Case("Test2", classname="some.class")
+    tc2.add_skipped_info("Skipped")
+    return [
+        Suite("suite1", [tc1, tc2], hostname="localhost", properties={"a": "b"}),
+        Suite("suite2", stderr="suite error"),
+        Suite("suite3", [Case("Test3", assertions=1)]),
+    ]
+
+
+def test_dumps_loads() -> None:
+    test_suites = _test_suites()
+    data = binary.dumps(test_suites)
+    assert to_xml_report_string(binary.loads(data)) == to_xml_report_string(test_suites)
+
+
+def test_dump_load_file_object() -> None:
+    test_suites = _test_suites()
+    f = BytesIO()
+    binary.dump(test_suites, f)
+    assert f.getvalue() == binary.dumps(test_suites)
+    f.seek(0)
+    assert to_xml_report_string(binary.load(f)) == to_xml_report_string(test_suites)
+
+
+def test_load_path_to_xml_report_file(tmp_path: Path) -> None:
+    test_suites = _test_suites()
+    path = tmp_path / "report.bin"
+    with path.open("wb") as f:
+        binary.dump(test_suites, f)
+
+    loaded = binary.load(path)
+    # outputs stay in the memory-mapped file
+    assert callable(loaded[0].test_cases[0].stdout)
+    out = StringIO()
+    binary.to_xml_report_file(out, path, prettyprint=False)
+    assert out.getvalue() == to_xml_report_string(test_suites, prettyprint=False)
+
+
+def test_binary_writer() -> None:
+    test_suites = _test_suites()
+    suite1, suite2, suite3 = test_suites
+    f = BytesIO()
+    with binary.BinaryWriter(f, spool_size=10) as writer:
+        # test cases of the suites interleaved
+        writer.add_test_case(suite1, suite1.test_cases[0])
+        writer.add_test_case(suite3, suite3.test_cases[0])
+        writer.add_test_case(suite1, suite1.test_cases[1])
+        writer.write_suite(suite2)
+    loaded = binary.loads(f.getvalue())
+    assert to_xml_report_string(loaded) == to_xml_report_string(
+        [suite1, suite3, suite2]
+    )
+
+
+def test_text_timestamps() -> None:
+    test_suites = [
+        Suite("suite", [Case("Test1", timestamp=1)], timestamp="2012-11-15T01:02:29")
+    ]
+    loaded = binary.loads(binary.dumps(test_suites))
+    assert loaded[0].timestamp == "2012-11-15T01:02:29"
+    assert loaded[0].test_cases[0].timestamp == 1
+
+
+def test_loads_invalid() -> None:
+    with pytest.raises(ValueError, match="not a binary junit_xml document"):
+        binary.loads(b"<testsuites/>")
+    with pytest.raises(ValueError, match="truncated binary junit_xml document"):
+        binary.loads(binary.dumps(_test_suites())[:-5])
+
+
+def test_iter_results(tmp_path: Path) -> None:
+    path = tmp_path / "report.juxb"
+    data = binary.dumps(_test_suites())
+    path.write_bytes(data)
+    expected = to_xml_report_string(_test_suites())
+    for results in (
+        binary.iter_results(path),
+        binary.iter_results(BytesIO(data)),
+        # the magic read already
+        binary.iter_results(BytesIO(data[3:]), data[:3]),
+    ):
+        suites: list[Suite] = []
+        for suite, case in results:
+            if case is None:
+                suites.append(suite)
+            else:
+                suite.test_cases.append(case)
+        assert to_xml_report_string(suites) == expected
+    with pytest.raises(ValueError, match="truncated binary junit_xml document"):
+        list(binary.iter_results(BytesIO(data[:-5])))
+    with pytest.raises(ValueError, match="not a binary junit_xml document"):
+        list(binary.iter_results(BytesIO(b"<testsuites/>")))
+
+
+def test_dumps_error_policy() -> None:
+    suites = [Suite("suite", [Case("Test1", stdout=b"bad \xff byte")])]
+    [suite] = binary.loads(binary.dumps(suites, errors="backslashreplace"))
+    assert suite.test_cases[0].stdout == r"bad \xff byte"
+    with pytest.raises(ValueError, match="unknown error policy"):
+        binary.dumps(suites, errors="unknown")
@@ -0,0 +1,99 @@
+import io
+import itertools
+from collections.abc import Iterator
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import to_xml_report_file
+from junit_xml.budget import TRUNCATED_PROPERTY, Budget
+from junit_xml.parser import parse
+from junit_xml.validator import validate
+
+
+def _test_suites() -> list[Suite]:
+    cases = [Case(f"Test{i}", elapsed_sec=1.5, stdout="out") for i in range(4)]
+    cases[1].add_failure_info("Failed")
+    return [
+        Suite("suite1", cases[:3], properties={"key": "value"}),
+        Suite("suite2", cases[3:]),
+        Suite("suite3", [Case("Test4")]),
+    ]
+
+
+def _write(budget: Budget | None, prettyprint: bool = False) -> tuple[bool, str]:
+    out = io.StringIO()
+    complete = to_xml_report_file(
+        out, _test_suites(), prettyprint=prettyprint, budget=budget
+    )
+    return complete, out.getvalue()
+
+
+@pytest.mark.parametrize("prettyprint", [True, False])
+def test_complete(prettyprint: bool) -> None:
+    complete, xml = _write(Budget(seconds=60), prettyprint)
+    assert complete
+    assert xml == _write(None, prettyprint)[1]
+
+
+def test_deadline() -> None:
+    # the clock advances by one on every check, the first is at Budget()
+    ticks = itertools.count()
+    complete, xml = _write(Budget(seconds=3, clock=lambda: next(ticks)))
+    assert not complete
+    assert validate(io.BytesIO(xml.encode("utf-8"))) == []
+    suites = parse(io.BytesIO(xml.encode("utf-8")))
+    assert [suite.name for suite in suites] == ["suite1"]
+    assert [case.name for case in suites[0].test_cases] == ["Test0"]
+    assert suites[0].properties == {
+        "key": "value",
+        TRUNCATED_PROPERTY: "deadline exceeded",
+    }
+    assert xml.startswith('<testsuites disabled="0" errors="0" failures="0" tests="1"')
+
+
+def test_cancelled_between_suites() -> None:
+    budget = Budget()
+    test_suites = _test_suites()
+
+    # cancelled while the last test case of the first suite is written
+    def stdout() -> Iterator[str]:
+        budget.cancel()
+        yield "out"
+
+    test_suites[0].test_cases[2].stdout = stdout
+    out = io.StringIO()
+    assert not to_xml_report_file(out, test_suites, budget=budget)
+    suites = parse(io.BytesIO(out.getvalue().encode("utf-8")))
+    # no empty suite for the marker
+    assert [suite.name for suite in suites] == ["suite1"]
+    assert len(suites[0].test_cases) == 3  # noqa: PLR2004
+    assert suites[0].properties == {"key": "value", TRUNCATED_PROPERTY: "cancelled"}
+
+
+def test_cancelled_before_first_suite() -> None:
+    budget = Budget()
+    budget.cancel()
+    out = io.StringIO()
+    assert not to_xml_report_file(out, _test_suites(), budget=budget)
+    suites = parse(io.BytesIO(out.getvalue().encode("utf-8")))
+    assert [suite.name for suite in suites] == ["suite1"]
+    assert suites[0].test_cases == []
+    assert suites[0].properties == {"key": "value", TRUNCATED_PROPERTY: "cancelled"}
+
+
+def test_reserve() -> None:
+    budget = Budget(seconds=10, clock=lambda: 0)
+    assert budget.exceeded(9) is None
+    assert budget.exceeded(10) == "deadline exceeded"
+
+
+def test_budget_arguments() -> None:
+    with pytest.raises(ValueError, match="either seconds or deadline"):
+        Budget(seconds=1, deadline=2)
+    budget = Budget(deadline=float("inf"))
+    assert budget.exceeded() is None
+    budget.cancel()
+    assert budget.cancelled
+    assert budget.exceeded() == "cancelled"
@@ -0,0 +1,110 @@
+import hashlib
+import io
+import random
+from io import BytesIO
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import XmlReportWriter, to_xml_report_file, to_xml_report_string
+from junit_xml.validator import validate
+
+
+def _test_suites(seed: int) -> list[Suite]:
+    """Return the same results, in an order which depends on the seed."""
+    rng = random.Random(seed)  # noqa: S311
+    cases: list[Case] = []
+    for i in range(20):
+        case = Case(f"Test{i}", classname=f"class{i % 3}", elapsed_sec=0.1 * (i + 1))
+        if i % 5 == 0:
+            case.add_failure_info("Failed", f"output {i}")
+        cases.append(case)
+    properties = [("b", "2"), ("a", "1"), ("c", "3")]
+    rng.shuffle(properties)
+    suites = [
+        Suite("suite1", cases[:12], properties=dict(properties)),
+        Suite("suite2", cases[12:]),
+        Suite("suite0"),
+    ]
+    for suite in suites:
+        rng.shuffle(suite.test_cases)
+    rng.shuffle(suites)
+    return suites
+
+
+def _writer_report(seed: int, prettyprint: bool) -> str:
+    """Write the results with cases of the suites interleaved randomly."""
+    rng = random.Random(seed)  # noqa: S311
+    out = io.StringIO()
+    suites = _test_suites(seed)
+    results = [(suite, case) for suite in suites for case in suite.test_cases]
+    rng.shuffle(results)
+    with XmlReportWriter(
+        out, prettyprint=prettyprint, spool_size=100, canonical=True
+    ) as writer:
+        for suite in suites:
+            suite.test_cases = []
+            writer.write_suite(suite)
+        for suite, case in results:
+            writer.add_test_case(suite, case)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("prettyprint", [True, False])
+def test_canonical_order(prettyprint: bool) -> None:
+    reports = {
+        to_xml_report_string(_test_suites(seed), prettyprint, canonical=True)
+        for seed in range(5)
+    }
+    assert len(reports) == 1
+    (report,) = reports
+    assert validate(BytesIO(report.encode("utf-8"))) == []
+    assert report.index('name="suite0"') < report.index('name="suite1"')
+    assert report.index('name="a"') < report.index('name="b"')
+    # by classname, then by name
+    assert report.index('"Test3"') < report.index('"Test10"') < report.index('"Test4"')
+
+    out = io.StringIO()
+    to_xml_report_file(out, _test_suites(5), prettyprint, canonical=True)
+    assert out.getvalue() == report
+    for seed in range(5):
+        assert _writer_report(seed, prettyprint) == report
+
+
+def test_canonical_times() -> None:
+    # 0.1 + 0.2 + 0.3 and 0.3 + 0.2 + 0.1 are different floats
+    cases = [Case(f"Test{i}", elapsed_sec=0.1 * i) for i in (1, 2, 3)]
+    report = to_xml_report_string(
+        [Suite("suite1", cases), Suite("suite2", cases[::-1])],
+        prettyprint=False,
+        canonical=True,
+    )
+    assert '<testsuites disabled="0" errors="0" failures="0" tests="6"' in report
+    assert ' time="1.200000">' in report
+    assert report.count('tests="3" time="0.600000">') == 2  # noqa: PLR2004
+
+
+def test_hasher() -> None:
+    test_suites = _test_suites(0)
+    sha256 = hashlib.sha256()
+    out = io.StringIO()
+    to_xml_report_file(out, test_suites, canonical=True, hasher=sha256)
+    assert sha256.hexdigest() == hashlib.sha256(out.getvalue().encode()).hexdigest()
+
+    digests: set[str] = set()
+    for seed in range(3):
+        sha256 = hashlib.sha256()
+        with XmlReportWriter(io.StringIO(), canonical=True, hasher=sha256) as writer:
+            for suite in _test_suites(seed):
+                writer.write_suite(suite)
+        digests.add(sha256.hexdigest())
+    assert len(digests) == 1
+
+    # hashed as written into a file of the encoding
+    sha256 = hashlib.sha256()
+    test_suites = [Suite("süite", [Case("Test1", stdout="äöü €")])]
+    out = io.StringIO()
+    to_xml_report_file(out, test_suites, encoding="iso-8859-1", hasher=sha256)
+    data = out.getvalue().encode("iso-8859-1")
+    assert sha256.hexdigest() == hashlib.sha256(data).hexdigest()
@@ -0,0 +1,102 @@
+import multiprocessing
+from io import StringIO
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import XmlReportWriter, to_xml_report_string
+from junit_xml._records import RecordDecoder, RecordEncoder
+from junit_xml.channel import ResultChannel, WorkerChannel
+
+
+def _test_suite() -> Suite:
+    tc1 = Case(
+        "Test1",
+        classname="some.class",
+        elapsed_sec=1.5,
+        stdout="out äöü",
+        stderr="err",
+        assertions=3,
+        timestamp=1398382805,
+        status="run",
+        category="cat",
+        file="test.py",
+        line="12",
+        log="log",
+        url="url",
+    )
+    tc1.add_failure_info("Failed", "failure output", "AssertionError")
+    tc2 = Case("Test2", allow_multiple_subelements=True)
+    tc2.add_error_info("Error 1", "output 1")
+    tc2.add_error_info("Error 2")
+    tc2.add_skipped_info("Skipped", "skipped output")
+    tc2.is_enabled = False
+    return Suite(
+        "suite",
+        [tc1, tc2],
+        hostname="localhost",
+        id=1,
+        package="pkg",
+        timestamp=1398382805,
+        properties={"foo": "bar"},
+        stdout="suite out",
+    )
+
+
+def test_records_round_trip() -> None:
+    suite = _test_suite()
+    encoder = RecordEncoder()
+    data = bytearray()
+    encoder.encode_suite(suite, data)
+    for case in suite.test_cases:
+        encoder.encode_case(suite.name, case, data)
+    encoder.encode_end(data)
+
+    decoder = RecordDecoder()
+    records = list(decoder.iter_records(data))
+    assert decoder.ended
+    decoded_suite = records[0]
+    assert isinstance(decoded_suite, Suite)
+    for record in records[1:]:
+        assert isinstance(record, tuple)
+        assert record[0] == "suite"
+        decoded_suite.test_cases.append(record[1])
+    assert to_xml_report_string([decoded_suite]) == to_xml_report_string([suite])
+
+
+def _run_worker(channel: WorkerChannel, worker: int) -> None:
+    with channel:
+        suite = Suite("suite", hostname="localhost")
+        for i in range(100):
+            case = Case(f"Test{worker}-{i}", classname="some.class", elapsed_sec=0.5)
+            if i % 10 == 0:
+                case.add_failure_info("Failed", "x" * 1000)
+            channel.add_test_case(suite, case)
+        channel.add_test_case(f"other{worker}", Case("Test"))
+
+
+def test_result_channel() -> None:
+    channel = ResultChannel()
+    processes: list[multiprocessing.Process] = []
+    for worker in range(3):
+        worker_channel = channel.worker(buffer_size=4096)
+        process = multiprocessing.Process(
+            target=_run_worker, args=(worker_channel, worker)
+        )
+        process.start()
+        worker_channel.release()
+        processes.append(process)
+
+    f = StringIO()
+    with XmlReportWriter(f) as writer:
+        channel.drain(writer)
+    for process in processes:
+        process.join()
+
+    xml_string = f.getvalue()
+    assert xml_string.startswith(
+        '<testsuites disabled="0" errors="0" failures="30" tests="303" time="150.0">'
+    )
+    assert xml_string.count("<testsuite ") == 4  # noqa: PLR2004
+    assert 'name="suite" skipped="0" tests="300" time="150.0" hostname="localhost"' in (
+        xml_string
+    )
@@ -0,0 +1,170 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import binary, to_xml_report_string
+from junit_xml.cli import main
+
+
+def _write_report(path: Path, test_suites: list[Suite], prettyprint: bool) -> None:
+    path.write_text(
+        to_xml_report_string(test_suites, prettyprint, encoding="utf-8"),
+        encoding="utf-8",
+    )
+
+
+def _test_suites() -> list[Suite]:
+    tc1 = Case("Test1", classname="some.class", elapsed_sec=1.5, stdout="out äöü")
+    tc1.add_failure_info("Failed", "failure output")
+    tc2 = Case("Test2", classname="some.class", elapsed_sec=0.5)
+    tc2.add_skipped_info("Skipped")
+    return [
+        Suite("suite1", [tc1, tc2], properties={"foo": "bar"}),
+        Suite("suite2", [Case(f"Test{i}") for i in range(10)]),
+        Suite("suite3"),
+    ]
+
+
+def test_merge(tmp_path: Path) -> None:
+    test_suites = _test_suites()
+    _write_report(tmp_path / "a.xml", test_suites[:1], prettyprint=True)
+    _write_report(tmp_path / "b.xml", test_suites[1:], prettyprint=False)
+    inputs = [str(tmp_path / "a.xml"), str(tmp_path / "b.xml")]
+    output = tmp_path / "merged.xml"
+
+    assert main(["merge", *inputs, "-o", str(output)]) == 0
+    assert output.read_text(encoding="utf-8") == to_xml_report_string(
+        test_suites, prettyprint=False, encoding="utf-8"
+    )
+
+
+@pytest.mark.parametrize("command", ["prettify", "minify"])
+def test_prettify_minify(tmp_path: Path, command: str) -> None:
+    test_suites = _test_suites()
+    prettyprint = command == "prettify"
+    _write_report(tmp_path / "report.xml", test_suites, prettyprint=not prettyprint)
+    output = tmp_path / "output.xml"
+
+    assert main([command, str(tmp_path / "report.xml"), "-o", str(output)]) == 0
+    assert output.read_text(encoding="utf-8") == to_xml_report_string(
+        test_suites, prettyprint, encoding="utf-8"
+    )
+
+
+def test_dialect(tmp_path: Path) -> None:
+    test_suites = _test_suites()
+    _write_report(tmp_path / "report.xml", test_suites, prettyprint=True)
+    output = tmp_path / "output.xml"
+
+    argv = ["minify", "--dialect", "gitlab", str(tmp_path / "report.xml")]
+    assert main([*argv, "-o", str(output)]) == 0
+    assert output.read_text(encoding="utf-8") == to_xml_report_string(
+        test_suites, prettyprint=False, encoding="utf-8", dialect="gitlab"
+    )
+
+
+def test_canonical(tmp_path: Path) -> None:
+    test_suites = _test_suites()
+    _write_report(tmp_path / "a.xml", test_suites[1:], prettyprint=True)
+    _write_report(tmp_path / "b.xml", test_suites[:1], prettyprint=True)
+    inputs = [str(tmp_path / "a.xml"), str(tmp_path / "b.xml")]
+    output = tmp_path / "merged.xml"
+
+    assert main(["merge", "--canonical", *inputs, "-o", str(output)]) == 0
+    assert output.read_text(encoding="utf-8") == to_xml_report_string(
+        test_suites, prettyprint=False, encoding="utf-8", canonical=True
+    )
+
+
+def test_convert(tmp_path: Path) -> None:
+    test_suites = _test_suites()
+    report = tmp_path / "report.xml"
+    _write_report(report, test_suites, prettyprint=False)
+    converted = tmp_path / "report.bin"
+    output = tmp_path / "output.xml"
+
+    assert main(["convert", "--to", "binary", str(report), "-o", str(converted)]) == 0
+    assert to_xml_report_string(binary.load(converted)) == to_xml_report_string(
+        test_suites
+    )
+    assert main(["convert", "--to", "xml", str(converted), "-o", str(output)]) == 0
+    assert output.read_text(encoding="utf-8") == to_xml_report_string(
+        test_suites, prettyprint=False, encoding="utf-8"
+    )
+
+
+def test_split(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    report = tmp_path / "report.xml"
+    _write_report(report, _test_suites(), prettyprint=False)
+    template = str(tmp_path / "part-{index}.xml")
+
+    assert main(["split", "--max-cases", "5", "-o", template, str(report)]) == 0
+    paths = capsys.readouterr().out.split()
+    assert paths == [template.format(index=i) for i in range(1, 4)]
+
+
+def test_summarize(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    _write_report(tmp_path / "report.xml", _test_suites(), prettyprint=True)
+
+    assert main(["summarize", str(tmp_path / "report.xml")]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "suite1: 2 tests, 1 failures, 0 errors, 1 skipped in 2.000 s",
+        "suite2: 10 tests, 0 failures, 0 errors, 0 skipped in 0.000 s",
+        "suite3: 0 tests, 0 failures, 0 errors, 0 skipped in 0.000 s",
+        "total: 12 tests, 1 failures, 0 errors, 1 skipped in 2.000 s",
+    ]
+
+
+def test_validate(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    _write_report(tmp_path / "report.xml", _test_suites(), prettyprint=True)
+    (tmp_path / "broken.xml").write_text("<testsuites><testsuite>")
+
+    assert main(["validate", str(tmp_path / "report.xml")]) == 0
+    assert main(["validate", str(tmp_path / "broken.xml")]) == 1
+    assert "broken.xml: line 1: no element found" in capsys.readouterr().err
+
+
+def test_stdin_stdout() -> None:
+    xml = to_xml_report_string(_test_suites(), prettyprint=False, encoding="utf-8")
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-m", "junit_xml", "prettify"],
+        input=xml.encode("utf-8"),
+        capture_output=True,
+        check=True,
+    )
+    assert result.stdout.decode("utf-8") == to_xml_report_string(
+        _test_suites(), prettyprint=True, encoding="utf-8"
+    )
+
+
+def test_validate_binary_stdin() -> None:
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-m", "junit_xml", "validate"],
+        input=binary.dumps(_test_suites()),
+        capture_output=True,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.decode("utf-8") == "-: ok\n"
+
+
+def test_minify_normalizes(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    (tmp_path / "report.xml").write_text(
+        '<testsuites name="pytest"><testsuite name="s">'
+        '<testcase name="a" time="0.1" extra="e"><properties>'
+        '<property name="k" value="v"/></properties></testcase>'
+        "</testsuite></testsuites>",
+        encoding="utf-8",
+    )
+    assert main(["minify", str(tmp_path / "report.xml")]) == 0
+    # rewritten like merge, not only without whitespace
+    assert capsys.readouterr().out == (
+        '<testsuites disabled="0" errors="0" failures="0" tests="1" time="0.1">'
+        '<testsuite disabled="0" errors="0" failures="0" name="s" skipped="0" '
+        'tests="1" time="0.1"><testcase name="a" time="0.100000" />'
+        "</testsuite></testsuites>"
+    )
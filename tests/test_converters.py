@@ -0,0 +1,158 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import XmlReportWriter, to_xml_report_string
+from junit_xml.cli import main
+from junit_xml.converters import iter_jsonl, iter_tap, write_results
+from junit_xml.validator import validate
+
+TAP = """\
+TAP version 13
+1..7
+ok 1 - first
+not ok 2 - second
+  ---
+  message: 'values differ'
+  duration_ms: 1500
+  ...
+# diagnostic of second
+ok 3 - skipped # SKIP no network
+not ok 4 - todo # TODO not implemented
+ok 5
+# Subtest: nested
+    ok 1 - inner
+    1..1
+ok 6 - nested
+"""
+
+
+def _write(results: list[tuple[Suite, Case | None]]) -> str:
+    out = io.StringIO()
+    with XmlReportWriter(out) as writer:
+        write_results(results, writer)
+    return out.getvalue()
+
+
+def test_tap() -> None:
+    results = list(iter_tap(io.StringIO(TAP), "suite", classname="tap"))
+    suite = results[0][0]
+    cases = [case for _, case in results if case is not None]
+    assert results[-1] == (suite, None)
+    assert [case.name for case in cases] == [
+        "first",
+        "second",
+        "skipped",
+        "todo",
+        "test 5",
+        "nested",
+        "plan",
+    ]
+    first, second, skipped, todo, _, _, plan = cases
+    assert first.classname == "tap"
+    assert not first.is_failure()
+    assert second.failures[0]["message"] == "values differ"
+    assert second.failures[0]["output"] == (
+        "  message: 'values differ'\n  duration_ms: 1500\n# diagnostic of second"
+    )
+    assert second.elapsed_sec == 1.5  # noqa: PLR2004
+    assert skipped.skipped[0]["message"] == "no network"
+    assert todo.skipped[0]["message"] == "TODO not implemented"
+    assert plan.errors[0]["message"] == "planned 7 tests, 6 ran"
+
+    # counted like to_xml_report_string()
+    xml = _write(results)
+    assert xml == to_xml_report_string([Suite("suite", cases)], prettyprint=False)
+    assert validate(io.BytesIO(xml.encode("utf-8"))) == []
+
+
+def test_tap_bail_out() -> None:
+    results = list(iter_tap(["1..3\n", "ok 1\n", "Bail out! no database\n"]))
+    cases = [case for _, case in results if case is not None]
+    assert [case.name for case in cases] == ["test 1", "Bail out!"]
+    assert cases[1].errors[0]["message"] == "no database"
+
+
+def test_tap_failures_without_message() -> None:
+    lines = ["1..3\n", "ok 1 - a\n", "not ok 2 - b\n", "Bail out!\n"]
+    cases = [case for _, case in iter_tap(lines) if case is not None]
+    assert [case.name for case in cases] == ["a", "b", "Bail out!"]
+    assert cases[1].failures[0]["message"] == "not ok"
+    assert cases[1].is_failure()
+    assert cases[2].errors[0]["message"] == "Bail out!"
+    assert cases[2].is_error()
+    xml = _write(list(iter_tap(lines)))
+    assert xml.startswith('<testsuites disabled="0" errors="1" failures="1"')
+
+
+def test_jsonl_failure_without_message() -> None:
+    results = list(iter_jsonl(['{"name": "x", "outcome": "failed"}']))
+    case = results[0][1]
+    assert case is not None
+    assert case.is_failure()
+    assert case.failures[0]["message"] == "failed"
+
+
+def test_jsonl() -> None:
+    records = [
+        {"name": "Test1", "classname": "cls", "elapsed_sec": 1.5},
+        {
+            "suite": "other",
+            "name": "Test2",
+            "outcome": "failed",
+            "message": "failed",
+            "output": "output",
+            "type": "AssertionError",
+        },
+        {"name": "Test3", "outcome": "error", "stdout": "out", "line": 12},
+        {"name": "Test4", "outcome": "skipped", "message": "later"},
+    ]
+    lines = [json.dumps(record).encode() for record in records]
+    results = list(iter_jsonl([*lines[:2], b"\n", *lines[2:]], "suite"))
+    suites = [suite for suite, case in results if case is None]
+    assert [suite.name for suite in suites] == ["suite", "other"]
+    cases = [case for _, case in results if case is not None]
+    assert cases[0].elapsed_sec == 1.5  # noqa: PLR2004
+    assert cases[1].failures == [
+        {"message": "failed", "output": "output", "type": "AssertionError"}
+    ]
+    assert cases[1].is_failure()
+    assert cases[2].line == "12"
+    assert cases[2].errors[0]["message"] == "error"
+    assert cases[2].is_error()
+    assert cases[3].skipped[0]["message"] == "later"
+
+    expected = to_xml_report_string(
+        [Suite("suite", [cases[0], *cases[2:]]), Suite("other", [cases[1]])],
+        prettyprint=False,
+    )
+    assert _write(results) == expected
+    assert 'errors="1" failures="1"' in expected
+
+
+@pytest.mark.parametrize(
+    ("line", "message"),
+    [
+        ("{", "line 1: Expecting"),
+        ("[]", "line 1: not a JSON object"),
+        ('{"classname": "cls"}', "line 1: a test case needs a name"),
+        ('{"name": "a", "outcome": "broken"}', "line 1: unknown outcome broken"),
+        ('{"name": "a", "elapsed_sec": "1"}', "line 1: elapsed_sec is not a number"),
+    ],
+)
+def test_jsonl_invalid(line: str, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        list(iter_jsonl([line]))
+
+
+def test_cli_convert(tmp_path: Path) -> None:
+    (tmp_path / "results.tap").write_text(TAP, encoding="utf-8")
+    output = tmp_path / "report.xml"
+    args = ["convert", "--from", "tap", "--to", "xml", str(tmp_path / "results.tap")]
+    assert main([*args, "-o", str(output)]) == 0
+    expected = _write(list(iter_tap(io.StringIO(TAP))))
+    assert output.read_text(encoding="utf-8") == expected
@@ -0,0 +1,138 @@
+import io
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import (
+    XmlReportWriter,
+    to_xml_report_file,
+    to_xml_report_files,
+    to_xml_report_string,
+)
+from junit_xml.dialects import DIALECTS, Dialect, get_dialect
+from junit_xml.validator import validate
+
+
+def _test_suites() -> list[Suite]:
+    tc1 = Case(
+        "Test1",
+        classname="some.class",
+        elapsed_sec=1.5,
+        stdout="out",
+        assertions=2,
+        status="run",
+        category="category",
+        file="test.py",
+        line="12",
+        url="http://ci/1",
+    )
+    tc1.add_failure_info("Failed", "failure output", "AssertionError")
+    tc2 = Case("Test2", category="category", elapsed_sec=0.5)
+    tc2.add_skipped_info("Skipped")
+    return [
+        Suite(
+            "suite1",
+            [tc1, tc2],
+            hostname="localhost",
+            id=1,
+            timestamp="2012-11-15T01:02:29",
+            properties={"foo": "bar"},
+            stdout="suite out",
+        ),
+        Suite("suite2", properties={"foo": "bar"}),
+    ]
+
+
+def test_full_dialect_is_the_default() -> None:
+    assert to_xml_report_string(_test_suites(), dialect="full") == (
+        to_xml_report_string(_test_suites())
+    )
+
+
+def test_gitlab() -> None:
+    assert to_xml_report_string(
+        _test_suites(), prettyprint=False, dialect="gitlab"
+    ) == (
+        '<testsuites errors="0" failures="1" skipped="1" tests="2" time="2.0">'
+        '<testsuite errors="0" failures="1" name="suite1" skipped="1" tests="2"'
+        ' time="2.0">'
+        '<testcase name="Test1" time="1.500000" classname="some.class"'
+        ' file="test.py">'
+        '<failure type="AssertionError" message="Failed">failure output</failure>'
+        "<system-out>out</system-out>"
+        "</testcase>"
+        '<testcase name="Test2" time="0.500000">'
+        '<skipped type="skipped" message="Skipped" />'
+        "</testcase>"
+        "</testsuite>"
+        '<testsuite errors="0" failures="0" name="suite2" skipped="0" tests="0"'
+        ' time="0" />'
+        "</testsuites>"
+    )
+
+
+def test_jenkins_class_fallback() -> None:
+    xml = to_xml_report_string(_test_suites(), prettyprint=False, dialect="jenkins")
+    assert '<testcase name="Test2" time="0.500000" class="category">' in xml
+    assert "<properties>" in xml
+    assert "<system-out>suite out</system-out>" in xml
+    assert 'file="' not in xml
+    assert 'disabled="' not in xml
+
+
+@pytest.mark.parametrize("dialect", list(DIALECTS))
+@pytest.mark.parametrize("prettyprint", [True, False])
+def test_writers(tmp_path: Path, dialect: str, prettyprint: bool) -> None:
+    expected = to_xml_report_string(
+        _test_suites(), prettyprint=prettyprint, dialect=dialect
+    )
+    assert validate(BytesIO(expected.encode("utf-8"))) == []
+
+    out = io.StringIO()
+    to_xml_report_file(out, _test_suites(), prettyprint=prettyprint, dialect=dialect)
+    assert out.getvalue() == expected
+
+    out = io.StringIO()
+    with XmlReportWriter(out, prettyprint=prettyprint, dialect=dialect) as writer:
+        for suite in _test_suites():
+            writer.write_suite(suite)
+    assert out.getvalue() == expected
+
+    (path,) = to_xml_report_files(
+        str(tmp_path / "report-{index}.xml"),
+        _test_suites(),
+        prettyprint=prettyprint,
+        dialect=dialect,
+    )
+    assert Path(path).read_text(encoding="utf-8") == expected
+
+
+def test_custom_dialect() -> None:
+    dialect = Dialect("minimal", ["tests"], ["name", "tests"], [], properties=False)
+    assert get_dialect(dialect) is dialect
+    assert to_xml_report_string(
+        _test_suites()[:1], prettyprint=False, dialect=dialect
+    ) == (
+        '<testsuites tests="2">'
+        '<testsuite name="suite1" tests="2">'
+        "<system-out>suite out</system-out>"
+        '<testcase name="Test1">'
+        '<failure type="AssertionError" message="Failed">failure output</failure>'
+        "<system-out>out</system-out>"
+        "</testcase>"
+        '<testcase name="Test2"><skipped type="skipped" message="Skipped" /></testcase>'
+        "</testsuite>"
+        "</testsuites>"
+    )
+
+
+def test_unknown_dialect() -> None:
+    with pytest.raises(ValueError, match="unknown dialect 'teamcity'"):
+        to_xml_report_string(_test_suites(), dialect="teamcity")
+    with pytest.raises(ValueError, match="unknown testcase attributes: owner"):
+        Dialect("custom", ["tests"], case_fields=["owner"])
+    with pytest.raises(ValueError, match="unknown testsuites attributes: name"):
+        Dialect("custom", ["name"])
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import to_xml_report_string
+from junit_xml.cli import main
+from junit_xml.converters import iter_jsonl
+from junit_xml.export import COLUMNS, export_csv, export_jsonl, suite_results
+from junit_xml.parser import iter_results
+
+
+def _test_suites() -> list[Suite]:
+    tc1 = Case(
+        "Test1",
+        classname="some.class",
+        elapsed_sec=1.5,
+        stdout="out äöü",
+        timestamp=timedelta(seconds=1),
+        line="12",
+    )
+    tc1.add_failure_info("Failed", "failure\noutput", "AssertionError")
+    tc2 = Case("Test2", allow_multiple_subelements=True)
+    tc2.add_error_info("Error1", "output1", "ValueError")
+    tc2.add_failure_info("Failed")
+    tc3 = Case("Test3")
+    tc3.add_skipped_info("Skipped", "skipped output")
+    return [
+        Suite(
+            "suite1",
+            [tc1, tc2, tc3],
+            hostname="localhost",
+            id=1,
+            timestamp="2012-11-15T01:02:29",
+        ),
+        Suite("suite2", [Case("Test4", assertions=3)]),
+        Suite("suite3"),
+    ]
+
+
+def test_jsonl() -> None:
+    out = io.StringIO()
+    assert export_jsonl(suite_results(_test_suites()), out, batch_size=2) == 4  # noqa: PLR2004
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert rows[0] == {
+        "suite": "suite1",
+        "suite_id": "1",
+        "suite_hostname": "localhost",
+        "suite_timestamp": "2012-11-15T01:02:29",
+        "classname": "some.class",
+        "name": "Test1",
+        "elapsed_sec": 1.5,
+        "outcome": "failure",
+        "message": "Failed",
+        "type": "AssertionError",
+        "output": "failure\noutput",
+        "stdout": "out äöü",
+        "timestamp": "2012-11-15T01:02:30",
+        "line": "12",
+    }
+    assert [row["outcome"] for row in rows] == ["failure", "error", "skipped", "passed"]
+    assert rows[1]["message"] == "Error1"
+    assert rows[2]["output"] == "skipped output"
+    assert rows[3] == {
+        "suite": "suite2",
+        "name": "Test4",
+        "outcome": "passed",
+        "assertions": 3,
+    }
+
+    # read back by the converter
+    cases = [case for _, case in iter_jsonl(out.getvalue().splitlines()) if case]
+    assert [case.name for case in cases] == ["Test1", "Test2", "Test3", "Test4"]
+    assert cases[0].failures[0]["output"] == "failure\noutput"
+
+
+def test_csv_from_report() -> None:
+    xml = to_xml_report_string(_test_suites(), encoding="utf-8")
+    out = io.StringIO(newline="")
+    results = iter_results(io.BytesIO(xml.encode("utf-8")))
+    assert export_csv(results, out, outputs=False) == 4  # noqa: PLR2004
+    rows = list(csv.DictReader(io.StringIO(out.getvalue(), newline="")))
+    assert list(rows[0]) == list(COLUMNS)
+    assert rows[0]["elapsed_sec"] == "1.5"
+    assert rows[0]["message"] == "Failed"
+    assert rows[0]["output"] == rows[0]["stdout"] == ""
+    assert rows[3]["suite"] == "suite2"
+    assert rows[3]["assertions"] == "3"
+
+
+def test_cli_export(tmp_path: Path) -> None:
+    report = tmp_path / "report.xml"
+    report.write_text(
+        to_xml_report_string(_test_suites(), encoding="utf-8"), encoding="utf-8"
+    )
+    output = tmp_path / "cases.jsonl"
+    assert main(["export", "--format", "jsonl", str(report), "-o", str(output)]) == 0
+    expected = io.StringIO()
+    export_jsonl(iter_results(report), expected)
+    assert output.read_text(encoding="utf-8") == expected.getvalue()
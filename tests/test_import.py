@@ -0,0 +1,28 @@
+import subprocess
+import sys
+
+import pytest
+
+import junit_xml
+
+
+def test_import_is_lazy() -> None:
+    code = (
+        "import sys, junit_xml\n"
+        "lazy = ['tempfile', 'xml.dom.minidom', 'xml.etree.ElementTree']\n"
+        "print(' '.join(name for name in lazy if name in sys.modules))"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_attributes() -> None:
+    from junit_xml import ShardedReportWriter, XmlReportWriter  # noqa: PLC0415
+
+    assert junit_xml.XmlReportWriter is XmlReportWriter
+    assert junit_xml.ShardedReportWriter is ShardedReportWriter
+    assert callable(junit_xml.to_xml_report_files)
+    with pytest.raises(AttributeError, match="no_such_name"):
+        _ = junit_xml.no_such_name
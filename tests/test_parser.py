@@ -0,0 +1,202 @@
+from io import BytesIO
+from pathlib import Path
+from xml.parsers import expat
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import to_xml_report_string
+from junit_xml.parser import (
+    ParsedTestCase,
+    ReportParser,
+    iter_results,
+    parse,
+    parse_parallel,
+    suite_ranges,
+)
+
+
+def _test_suites() -> list[Suite]:
+    tc1 = Case(
+        "Test1",
+        classname="some.class",
+        elapsed_sec=1.5,
+        stdout="out äöü <&>",
+        assertions=2,
+        timestamp="2012-11-15T01:02:29",
+        category="category",
+        file="test.py",
+        line="12",
+    )
+    tc1.add_failure_info("Failed", "failure\noutput", "AssertionError")
+    tc2 = Case("Test2", classname="some.class", allow_multiple_subelements=True)
+    tc2.add_error_info("Error1", "output1")
+    tc2.add_error_info("Error2")
+    tc3 = Case("Test3", stderr="err")
+    tc3.add_skipped_info("Skipped", "skipped output")
+    return [
+        Suite(
+            "suite1",
+            [tc1, tc2, tc3],
+            hostname="localhost",
+            id=1,
+            properties={"foo": "bar"},
+            stdout="suite out",
+            stderr="suite err",
+        ),
+        Suite("suite2"),
+    ]
+
+
+@pytest.mark.parametrize("prettyprint", [True, False])
+def test_parse_round_trip(prettyprint: bool) -> None:
+    xml = to_xml_report_string(_test_suites(), prettyprint=prettyprint)
+    parsed = parse(BytesIO(xml.encode("utf-8")))
+    assert [suite.name for suite in parsed] == ["suite1", "suite2"]
+    assert to_xml_report_string(parsed, prettyprint=prettyprint) == xml
+
+
+def test_iter_results_in_small_chunks(tmp_path: Path) -> None:
+    path = tmp_path / "report.xml"
+    path.write_text(to_xml_report_string(_test_suites()), encoding="utf-8")
+    results = [
+        (suite.name, case.name if case else None)
+        for suite, case in iter_results(path, chunk_size=7)
+    ]
+    assert results == [
+        ("suite1", "Test1"),
+        ("suite1", "Test2"),
+        ("suite1", "Test3"),
+        ("suite1", None),
+        ("suite2", None),
+    ]
+
+
+def test_parse_testsuite_root() -> None:
+    xml = b"""<?xml version="1.0" encoding="UTF-8"?>
+<testsuite name="suite" tests="2" failures="1">
+  <testcase name="Test1" classname="some.class" time="0.5"/>
+  <testcase name="Test2" classname="some.class" time="0.25">
+    <failure message="expected" type="AssertionError">trace</failure>
+  </testcase>
+  <system-out>suite output after the test cases</system-out>
+</testsuite>
+"""
+    parser = ReportParser()
+    results = parser.feed(xml) + parser.close()
+    suite, case = results[1]
+    assert case is not None
+    assert case.elapsed_sec == 0.25  # noqa: PLR2004
+    assert case.failures == [
+        {"message": "expected", "output": "trace", "type": "AssertionError"}
+    ]
+    # the suite's own children are complete once it ends
+    assert results[2] == (suite, None)
+    assert suite.stdout == "suite output after the test cases"
+
+
+def test_empty_failure_and_error() -> None:
+    xml = (
+        b'<testsuite name="s"><testcase name="a"><failure/></testcase>'
+        b'<testcase name="b"><error type="E"/></testcase></testsuite>'
+    )
+    [suite] = parse(BytesIO(xml))
+    a, b = suite.test_cases
+    assert a.failures == [{"message": "failure", "output": None, "type": None}]
+    assert a.is_failure()
+    assert b.errors == [{"message": "error", "output": None, "type": "E"}]
+    assert b.is_error()
+    written = to_xml_report_string([suite], prettyprint=False)
+    assert '<testsuite disabled="0" errors="1" failures="1"' in written
+
+
+def test_parse_invalid() -> None:
+    with pytest.raises(ValueError, match="unexpected root element <html>"):
+        parse(BytesIO(b"<html></html>"))
+    with pytest.raises(expat.ExpatError):
+        parse(BytesIO(b"<testsuites><testsuite>"))
+    xml = b'<testsuite name="s">\n<testcase name="t" time="fast"/></testsuite>'
+    with pytest.raises(ValueError, match="line 2: time 'fast' is not a number"):
+        parse(BytesIO(xml))
+    xml = b'<testsuite name="s"><testcase name="t" assertions="-1"/></testsuite>'
+    with pytest.raises(
+        ValueError, match="assertions '-1' is not a count of <testcase>"
+    ):
+        parse(BytesIO(xml))
+
+
+@pytest.mark.parametrize("prettyprint", [True, False])
+def test_memory_map(tmp_path: Path, prettyprint: bool) -> None:
+    path = tmp_path / "report.xml"
+    xml = to_xml_report_string(_test_suites(), prettyprint=prettyprint)
+    path.write_text(xml, encoding="utf-8")
+    for chunk_size in (7, 65536):
+        results = list(iter_results(path, chunk_size=chunk_size, memory_map=True))
+        assert [case.name if case else None for _, case in results] == [
+            "Test1",
+            "Test2",
+            "Test3",
+            None,
+            None,
+        ]
+    with path.open("rb") as f:
+        assert to_xml_report_string(parse(f, memory_map=True), prettyprint) == xml
+    # an empty file can't be mapped, it is read
+    (tmp_path / "empty.xml").write_bytes(b"")
+    with pytest.raises(expat.ExpatError):
+        parse(tmp_path / "empty.xml", memory_map=True)
+
+
+def test_suite_ranges() -> None:
+    data = (
+        b'<?xml version="1.0"?><testsuites><testsuite name="a">'
+        b"<system-out><![CDATA[</testsuite>]]></system-out>"
+        b'<testsuite name="nested" /></testsuite><!-- <testsuite> -->'
+        b'<testsuite name="b" hostname="x>y"/>'
+        b'<testsuite name="c"><testcase name="t"/></testsuite >'
+        b"</testsuites>"
+    )
+    ranges = suite_ranges(data)
+    assert [data[start:end][:21] for start, end in ranges] == [
+        b'<testsuite name="a"><',
+        b'<testsuite name="b" h',
+        b'<testsuite name="c"><',
+    ]
+    assert data[ranges[0][1] - 13 : ranges[0][1]] == b"></testsuite>"
+    assert data[slice(*ranges[1])] == b'<testsuite name="b" hostname="x>y"/>'
+    assert data[ranges[2][1] - 13 : ranges[2][1]] == b"</testsuite >"
+    root = b'<testsuite name="root"><testcase name="t"/></testsuite>'
+    assert suite_ranges(root) == [(0, len(root))]
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "iso-8859-1"])
+def test_parse_parallel(tmp_path: Path, encoding: str) -> None:
+    test_suites = [
+        Suite(f"suite{i}", [Case(f"Test{j}", stdout="äöü") for j in range(i)])
+        for i in range(20)
+    ]
+    test_suites += _test_suites()
+    xml = to_xml_report_string(test_suites, prettyprint=True, encoding=encoding)
+    path = tmp_path / "report.xml"
+    path.write_bytes(xml.encode(encoding))
+    for min_batch_size in (1, 1 << 20):
+        parsed = parse_parallel(path, max_workers=2, min_batch_size=min_batch_size)
+        assert to_xml_report_string(parsed, prettyprint=True, encoding=encoding) == xml
+        # the attributes of the elements are kept, like by parse()
+        cases = [
+            case
+            for suite in parsed
+            for case in suite.test_cases
+            if isinstance(case, ParsedTestCase)
+        ]
+        expected = [
+            case
+            for suite in parse(path)
+            for case in suite.test_cases
+            if isinstance(case, ParsedTestCase)
+        ]
+        assert len(cases) == sum(len(suite.test_cases) for suite in parsed)
+        assert [case.attributes for case in cases] == [
+            case.attributes for case in expected
+        ]
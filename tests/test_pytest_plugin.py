@@ -0,0 +1,121 @@
+from importlib.metadata import entry_points
+
+import pytest
+
+from junit_xml.verify import ReportIndex
+
+pytest_plugins = ["pytester"]
+
+# an installed package loads the plugin by its entry point, loading it by
+# its module too would register it twice
+PLUGIN_ARGS = (
+    []
+    if entry_points(group="pytest11", name="junit_xml")
+    else ["-p", "junit_xml.pytest_plugin"]
+)
+
+TESTS = """
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def broken():
+    raise RuntimeError("no fixture")
+
+
+def test_passed():
+    print("out")
+    print("err", file=sys.stderr)
+
+
+def test_failed():
+    assert 1 == 2, "numbers"
+
+
+def test_error(broken):
+    pass
+
+
+@pytest.mark.skip(reason="not today")
+def test_skipped():
+    pass
+
+
+@pytest.mark.xfail(reason="known bug")
+def test_xfail():
+    assert False
+
+
+class TestClass:
+    @pytest.mark.parametrize("x", [1, 2])
+    def test_method(self, x):
+        pass
+"""
+
+
+def test_report(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_module=TESTS)
+    report_path = pytester.path / "report.xml"
+    result = pytester.runpytest(
+        *PLUGIN_ARGS,
+        f"--junit-xml-stream={report_path}",
+        "--junit-xml-stream-suite=suite",
+        "--junit-xml-stream-output",
+    )
+    result.assert_outcomes(passed=3, failed=1, errors=1, skipped=1, xfailed=1)
+    result.stdout.fnmatch_lines(["*generated xml file: *report.xml*"])
+
+    report = ReportIndex(report_path)
+    assert len(report) == 7  # noqa: PLR2004
+    report.assert_case(
+        "suite",
+        "test_passed",
+        classname="test_module",
+        attributes={"file": "test_module.py", "line": "11"},
+        errors=[],
+        failures=[],
+        skipped=[],
+        stdout="out\n",
+        stderr="err\n",
+    )
+    failed = report.assert_case("suite", "test_failed", classname="test_module")
+    assert failed.failures[0]["message"] == "AssertionError: numbers\nassert 1 == 2"
+    assert "numbers" in (failed.failures[0]["output"] or "")
+    error = report.assert_case(
+        "suite", "test_error", classname="test_module", failures=[]
+    )
+    assert error.errors[0]["message"] == "RuntimeError: no fixture"
+    report.assert_case(
+        "suite",
+        "test_skipped",
+        classname="test_module",
+        skipped=[{"message": "not today"}],
+    )
+    report.assert_case(
+        "suite",
+        "test_xfail",
+        classname="test_module",
+        skipped=[{"message": "expected failure: known bug"}],
+    )
+    for x in (1, 2):
+        report.assert_case(
+            "suite", f"test_method[{x}]", classname="test_module.TestClass"
+        )
+
+
+def test_collection_error(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_broken="import does_not_exist")
+    report_path = pytester.path / "report.xml"
+    pytester.runpytest(*PLUGIN_ARGS, f"--junit-xml-stream={report_path}")
+    report = ReportIndex(report_path)
+    case = report.assert_case("pytest", "test_broken")
+    assert case.errors[0]["message"] == "collection failure"
+
+
+def test_without_option(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_module="def test_passed(): pass")
+    result = pytester.runpytest(*PLUGIN_ARGS)
+    result.assert_outcomes(passed=1)
+    assert not list(pytester.path.glob("*.xml"))
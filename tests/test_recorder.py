@@ -0,0 +1,100 @@
+import threading
+from io import StringIO
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import to_xml_report_string
+from junit_xml.recorder import Outcome, Recorder, ThreadSafeRecorder
+
+from .asserts import verify_test_case
+from .serializer import serialize_and_read
+
+
+def test_recorder_to_test_suites() -> None:
+    recorder = Recorder()
+    recorder.suite_info("suite1", hostname="localhost")
+    recorder.case_finished("suite1", "Test1", classname="some.class", elapsed_sec=1.5)
+    recorder.case_finished("suite2", "Test2")
+    recorder.case_finished(
+        "suite1", "Test3", outcome=Outcome.FAILURE, message="Failed", output="out"
+    )
+    recorder.case_finished("suite2", "Test4", outcome=Outcome.ERROR, message="Error")
+    recorder.case_finished(
+        "suite2", "Test5", outcome=Outcome.SKIPPED, message="Skipped", stdout="so"
+    )
+    assert len(recorder) == 5  # noqa: PLR2004
+
+    suites = serialize_and_read(recorder.to_test_suites())
+    assert [ts.attributes["name"].value for ts, _ in suites] == ["suite1", "suite2"]
+    (ts1, tcs1), (ts2, tcs2) = suites
+    assert ts1.attributes["hostname"].value == "localhost"
+    assert ts1.attributes["failures"].value == "1"
+    assert ts2.attributes["errors"].value == "1"
+    assert ts2.attributes["skipped"].value == "1"
+    verify_test_case(
+        tcs1[0], {"name": "Test1", "classname": "some.class", "time": f"{1.5:f}"}
+    )
+    verify_test_case(
+        tcs1[1], {"name": "Test3"}, failure_message="Failed", failure_output="out"
+    )
+    verify_test_case(tcs2[0], {"name": "Test2"})
+    verify_test_case(tcs2[1], {"name": "Test4"}, error_message="Error")
+    verify_test_case(tcs2[2], {"name": "Test5"}, skipped_message="Skipped", stdout="so")
+
+
+def test_recorder_matches_test_cases() -> None:
+    recorder = Recorder()
+    recorder.case_finished("suite", "Test1", classname="c", elapsed_sec=0.25)
+    recorder.case_finished("suite", "Test2", outcome=Outcome.FAILURE, message="m")
+    case1 = Case("Test1", classname="c", elapsed_sec=0.25)
+    case2 = Case("Test2")
+    case2.add_failure_info("m")
+
+    assert to_xml_report_string(recorder.to_test_suites()) == to_xml_report_string(
+        [Suite("suite", [case1, case2])]
+    )
+    f = StringIO()
+    recorder.to_xml_report_file(f)
+    assert f.getvalue() == to_xml_report_string([Suite("suite", [case1, case2])])
+
+
+def test_thread_safe_recorder() -> None:
+    recorder = ThreadSafeRecorder()
+    cases_per_thread = 1000
+
+    def record(thread: int) -> None:
+        for i in range(cases_per_thread):
+            recorder.case_finished(f"suite{thread % 2}", f"Test{thread}-{i}")
+
+    threads = [threading.Thread(target=record, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(recorder) == 4 * cases_per_thread
+    suites = recorder.to_test_suites()
+    assert sorted(ts.name for ts in suites) == ["suite0", "suite1"]
+    for ts in suites:
+        assert len(ts.test_cases) == 2 * cases_per_thread
+        names = [tc.name for tc in ts.test_cases]
+        # the results of each thread keep their order
+        for thread in range(4):
+            own = [n for n in names if n.startswith(f"Test{thread}-")]
+            assert own == sorted(own, key=lambda n: int(n.split("-")[1]))
+
+
+def test_invalid_result_is_not_recorded() -> None:
+    recorder = ThreadSafeRecorder()
+    recorder.case_finished("suite", "Test1")
+    with pytest.raises(TypeError):
+        recorder.case_finished("suite", "Test2", elapsed_sec=[1.5])  # pyright: ignore[reportArgumentType]
+    with pytest.raises(ValueError, match="unknown outcome 7"):
+        recorder.case_finished("suite", "Test3", outcome=7)
+    recorder.case_finished("suite", "Test4", outcome=Outcome.FAILURE, message="Failed")
+    assert len(recorder) == 2  # noqa: PLR2004
+    [suite] = recorder.to_test_suites()
+    assert [case.name for case in suite.test_cases] == ["Test1", "Test4"]
+    assert suite.test_cases[1].is_failure()
@@ -0,0 +1,59 @@
+import io
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import XmlReportWriter, to_xml_report_file, to_xml_report_string
+from junit_xml.redaction import Redactor
+
+
+def test_sub() -> None:
+    redactor = Redactor(
+        patterns=["token=[0-9a-f]+"], literals=["secret", "secret-key"], replacement="*"
+    )
+    assert redactor.sub("a\x00 token=abc1 secret-key secret\x1b") == "a * * *"
+    # nothing to redact, only the illegal characters are removed
+    assert Redactor().sub("a\x00b") == "ab"
+
+
+def test_empty_match() -> None:
+    with pytest.raises(ValueError, match="must not match an empty string"):
+        Redactor(patterns=["a*"])
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64, 100])
+def test_iter_redacted(size: int) -> None:
+    redactor = Redactor(patterns=["token=[0-9a-f]+"], literals=["secret"], max_match=32)
+    text = "token=abc0 secret\x00 xsecretx token=0123456789abcdef end"
+    chunks = [text[i : i + size] for i in range(0, len(text), size)]
+    assert "".join(redactor.iter_redacted(chunks)) == redactor.sub(text)
+
+
+def test_report() -> None:
+    case = Case(
+        "Test1",
+        classname="cls",
+        stdout=io.StringIO("password hunter2\x00 " * 1000),
+        stderr=b"key: hunter2",
+    )
+    case.add_failure_info("wrong hunter2", "hunter2 <here>")
+    suite = Suite("suite", [case], properties={"pwd": "hunter2"})
+    redactor = Redactor(literals=["hunter2"])
+
+    xml = to_xml_report_string([suite], prettyprint=False, redactor=redactor)
+    assert "hunter2" not in xml
+    assert xml.count("[REDACTED]") == 1004  # noqa: PLR2004
+    assert "[REDACTED] &lt;here&gt;" in xml
+
+    # the same, streamed chunk by chunk
+    case.stdout = io.StringIO("password hunter2\x00 " * 1000)
+    out = io.StringIO()
+    to_xml_report_file(out, [suite], prettyprint=False, redactor=redactor)
+    assert out.getvalue() == xml
+
+    out = io.StringIO()
+    with XmlReportWriter(out, redactor=redactor) as writer:
+        case.stdout = io.StringIO("password hunter2\x00 " * 1000)
+        writer.write_suite(suite)
+    assert out.getvalue() == xml
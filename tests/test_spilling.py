@@ -0,0 +1,125 @@
+import io
+import threading
+from datetime import timedelta
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import XmlReportWriter, binary, to_xml_report_file, to_xml_report_string
+from junit_xml.spilling import SpillingTestSuite
+
+
+def _test_cases() -> list[Case]:
+    cases: list[Case] = []
+    for i in range(25):
+        case = Case(
+            f"Test{i}",
+            classname=f"class{i % 3}",
+            elapsed_sec=i / 7,
+            stdout=f"out {i} äöü <&>" if i % 2 else None,
+            assertions=i if i % 5 == 0 else None,
+            timestamp=timedelta(seconds=i),
+        )
+        if i % 4 == 1:
+            case.add_failure_info(f"failure {i}", "output", "AssertionError")
+        if i % 6 == 2:  # noqa: PLR2004
+            case.add_error_info("error", f"error output {i}")
+        if i % 8 == 3:  # noqa: PLR2004
+            case.add_skipped_info("skipped")
+        cases.append(case)
+    return cases
+
+
+def _suites(max_cases: int) -> tuple[Suite, SpillingTestSuite]:
+    suite = Suite(
+        "suite",
+        _test_cases(),
+        hostname="localhost",
+        timestamp="2012-11-15T01:02:29",
+        properties={"foo": "bar"},
+        stdout="suite out",
+    )
+    spilling = SpillingTestSuite(
+        "suite",
+        max_cases,
+        hostname="localhost",
+        timestamp="2012-11-15T01:02:29",
+        properties={"foo": "bar"},
+        stdout="suite out",
+    )
+    for case in _test_cases():
+        spilling.add_test_case(case)
+    return suite, spilling
+
+
+@pytest.mark.parametrize("max_cases", [1, 10, 100])
+def test_same_report(max_cases: int) -> None:
+    suite, spilling = _suites(max_cases)
+    for prettyprint in (True, False):
+        assert to_xml_report_string(
+            [spilling], prettyprint=prettyprint
+        ) == to_xml_report_string([suite], prettyprint=prettyprint)
+    for canonical, dialect in [(False, None), (True, None), (False, "gitlab")]:
+        expected, out = io.StringIO(), io.StringIO()
+        to_xml_report_file(expected, [suite], dialect=dialect, canonical=canonical)
+        to_xml_report_file(
+            out, [spilling], validate=True, dialect=dialect, canonical=canonical
+        )
+        assert out.getvalue() == expected.getvalue()
+
+    expected, out = io.StringIO(), io.StringIO()
+    with XmlReportWriter(expected) as writer:
+        writer.write_suite(suite)
+    with XmlReportWriter(out) as writer:
+        writer.write_suite(spilling)
+    assert out.getvalue() == expected.getvalue()
+    assert binary.dumps([spilling]) == binary.dumps([suite])
+    spilling.close()
+
+
+def test_running_totals() -> None:
+    _, spilling = _suites(10)
+    assert spilling.spill.spilled == 20  # noqa: PLR2004
+    assert spilling.test_cases == []
+    counters = spilling.counters
+    assert (counters.tests, counters.failures, counters.errors, counters.skipped) == (
+        25,
+        6,
+        4,
+        3,
+    )
+    assert counters.elapsed_sec == sum(case.elapsed_sec or 0 for case in _test_cases())
+
+
+def test_threads() -> None:
+    spilling = SpillingTestSuite("suite", max_cases=16)
+
+    def add(thread: int) -> None:
+        for i in range(250):
+            spilling.add_test_case(Case(f"Test{thread}-{i}", elapsed_sec=0.5))
+
+    threads = [threading.Thread(target=add, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    names = [case.name for case in spilling.iter_test_cases()]
+    assert len(names) == len(set(names)) == len(spilling.spill) == 1000  # noqa: PLR2004
+    assert spilling.counters.elapsed_sec == 500  # noqa: PLR2004
+
+
+def test_invalid_max_cases() -> None:
+    with pytest.raises(ValueError, match="max_cases must be at least 1"):
+        SpillingTestSuite("suite", max_cases=0)
+
+
+def test_error_policy() -> None:
+    suite = SpillingTestSuite("suite", max_cases=1, errors="backslashreplace")
+    suite.add_test_case(Case("Test1", stdout=b"bad \xff byte"))
+    assert suite.spill.spilled == 1
+    assert r"bad \xff byte" in to_xml_report_string([suite], prettyprint=False)
+
+    suite = SpillingTestSuite("suite", max_cases=1, errors="strict")
+    with pytest.raises(UnicodeDecodeError):
+        suite.add_test_case(Case("Test1", stdout=io.BytesIO(b"bad \xff byte")))
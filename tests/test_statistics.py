@@ -0,0 +1,105 @@
+import io
+import math
+import random
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import XmlReportWriter, to_xml_report_file, to_xml_report_string
+from junit_xml.parser import parse
+from junit_xml.spilling import SpillingTestSuite
+from junit_xml.statistics import ACCURACY, PERCENTILES
+from junit_xml.validator import validate
+
+
+def _test_cases(seed: int = 0) -> list[Case]:
+    rng = random.Random(seed)  # noqa: S311
+    cases: list[Case] = []
+    for i in range(1000):
+        case = Case(f"Test{i}", classname="cls", elapsed_sec=rng.lognormvariate(0, 2))
+        if i % 10 == 0:
+            case.add_failure_info("failed")
+        if i % 25 == 0:
+            case.add_error_info("error")
+        cases.append(case)
+    cases.append(Case("Untimed"))
+    cases.append(Case("Instant", elapsed_sec=0))
+    return cases
+
+
+def test_summary() -> None:
+    cases = _test_cases()
+    summary = Suite("suite", cases).summary()
+    assert (summary.tests, summary.failures, summary.errors) == (1002, 100, 40)
+    assert summary.failure_rate == 100 / 1002
+    assert summary.error_rate == 40 / 1002
+
+    times = sorted(case.elapsed_sec for case in cases if case.elapsed_sec is not None)
+    for name, q in PERCENTILES.items():
+        exact = times[math.ceil(q * len(times)) - 1]
+        assert summary.percentiles[name] == pytest.approx(exact, rel=ACCURACY)
+
+    slowest = sorted(cases, key=lambda case: case.elapsed_sec or 0, reverse=True)
+    assert summary.slowest == [
+        (case.elapsed_sec, "cls", case.name) for case in slowest[:10]
+    ]
+
+
+def test_order_independent() -> None:
+    cases = [
+        Case("b", elapsed_sec=2),
+        Case("a", elapsed_sec=2),
+        Case("c", elapsed_sec=1),
+    ]
+    summary = Suite("suite", cases, slowest=2).summary()
+    assert summary.percentiles["p50"] == pytest.approx(2, rel=ACCURACY)
+    assert summary.slowest == [(2, None, "b"), (2, None, "a")]
+    expected = summary.properties()
+    assert expected["statistics.slowest.1"] == "2.000000 b"
+    cases.reverse()
+    assert Suite("suite", cases, slowest=2).summary().properties() == expected
+
+
+def test_empty_suite() -> None:
+    summary = Suite("suite").summary()
+    assert summary.failure_rate == 0
+    assert summary.percentiles == {}
+    assert summary.slowest == []
+
+
+def test_written_as_properties() -> None:
+    cases = _test_cases()
+    suite = Suite("suite", cases, properties={"foo": "bar"}, statistics=True)
+    expected = {"foo": "bar", **suite.summary().properties()}
+
+    xml = to_xml_report_string([suite])
+    assert parse(io.BytesIO(xml.encode("utf-8")))[0].properties == expected
+    assert validate(io.BytesIO(xml.encode("utf-8"))) == []
+    for prettyprint in (True, False):
+        out = io.StringIO()
+        to_xml_report_file(out, [suite], prettyprint=prettyprint)
+        with XmlReportWriter(writer_out := io.StringIO(), prettyprint) as writer:
+            for case in cases:
+                writer.add_test_case(suite, case)
+        assert writer_out.getvalue() == out.getvalue()
+    assert parse(io.BytesIO(out.getvalue().encode("utf-8")))[0].properties == expected
+
+    # not written by dialects without properties
+    out = io.StringIO()
+    to_xml_report_file(out, [suite], dialect="gitlab")
+    assert "statistics" not in out.getvalue()
+
+
+def test_spilling_suite() -> None:
+    cases = _test_cases()
+    spilling = SpillingTestSuite("suite", max_cases=100, statistics=True)
+    for case in cases:
+        spilling.add_test_case(case)
+    assert spilling.counters.statistics is not None
+    expected = Suite("suite", cases).summary().properties()
+    assert spilling.summary().properties() == expected
+    out = io.StringIO()
+    to_xml_report_file(out, [spilling])
+    assert parse(io.BytesIO(out.getvalue().encode("utf-8")))[0].properties == expected
+    spilling.close()
@@ -1,6 +1,20 @@
+import pickle
+from collections.abc import Iterator
+from io import BytesIO, StringIO
+from pathlib import Path
+
+import pytest
+
+from junit_xml import (
+    CaseTemplate,
+    EncodedOutput,
+    decode,
+    to_xml_report_file,
+    to_xml_report_string,
+)
 from junit_xml import TestCase as Case
 from junit_xml import TestSuite as Suite
-from junit_xml import decode
+from junit_xml._output import CHUNK_SIZE
 
 from .asserts import verify_test_case
 from .serializer import serialize_and_read
@@ -404,3 +418,145 @@ def test_multiple_skipped() -> None:
             {"message": "Second skipped", "output": "Second skipped message"},
         ],
     )
+
+
+def test_lazy_outputs(tmp_path: Path) -> None:
+    stdout_path = tmp_path / "stdout.txt"
+    stdout_path.write_text("I am <stdout>!\x02", encoding="utf-8")
+    stderr_file = StringIO("I am stderr & more!")
+
+    tc = Case(name="Test1", stdout=stdout_path, stderr=stderr_file)
+    tc.add_failure_info(message="Failed", output=lambda: iter(["fail ", "output"]))
+    _, tcs = serialize_and_read(Suite("test", [tc]), to_file=True)[0]
+    verify_test_case(
+        tcs[0],
+        {"name": "Test1"},
+        stdout="I am <stdout>!",
+        stderr="I am stderr & more!",
+        failure_message="Failed",
+        failure_output="fail output",
+    )
+
+
+def test_lazy_output_is_read_while_writing() -> None:
+    read: list[str] = []
+
+    def chunks() -> Iterator[str]:
+        for chunk in ["first ", "second ", "third"]:
+            read.append(chunk)
+            yield chunk
+
+    tc = Case(name="Test1", stdout=chunks)
+    assert not read
+    f = StringIO()
+    to_xml_report_file(f, [Suite("test", [tc])], prettyprint=False)
+    assert read == ["first ", "second ", "third"]
+    assert "<system-out>first second third</system-out>" in f.getvalue()
+
+
+def test_empty_lazy_output() -> None:
+    tc = Case(name="Test1", stdout=StringIO(""))
+    f = StringIO()
+    to_xml_report_file(f, [Suite("test", [tc])], prettyprint=False)
+    assert '<testcase name="Test1"><system-out /></testcase>' in f.getvalue()
+
+
+def _system_out(tc: Case, errors: str = "replace") -> str:
+    f = StringIO()
+    to_xml_report_file(
+        f, [Suite("test", [tc])], prettyprint=False, encoding="utf-8", errors=errors
+    )
+    xml = f.getvalue()
+    return xml[xml.index("<system-out>") + 12 : xml.index("</system-out>")]
+
+
+def test_bytes_outputs(tmp_path: Path) -> None:
+    # a character split between two chunks is decoded as a whole
+    data = b"x" * (CHUNK_SIZE - 1) + "ä".encode() + b" <&>"
+    expected = "x" * (CHUNK_SIZE - 1) + "ä &lt;&amp;&gt;"
+    assert _system_out(Case("Test1", stdout=data)) == expected
+    assert _system_out(Case("Test1", stdout=BytesIO(data))) == expected
+    path = tmp_path / "stdout.txt"
+    path.write_bytes(data)
+    assert _system_out(Case("Test1", stdout=path)) == expected
+
+    def chunks() -> Iterator[bytes]:
+        yield data[:CHUNK_SIZE]
+        yield data[CHUNK_SIZE:]
+
+    assert _system_out(Case("Test1", stdout=chunks)) == expected
+
+
+def test_bytes_error_policies() -> None:
+    tc = Case("Test1", stdout=b"bad \xff\xfe byte")
+    assert _system_out(tc) == "bad \ufffd\ufffd byte"
+    assert _system_out(tc, "backslashreplace") == "bad \\xff\\xfe byte"
+    assert _system_out(tc, "ignore") == "bad  byte"
+    with pytest.raises(ValueError, match="unknown error policy 'drop'"):
+        to_xml_report_string([Suite("test", [tc])], errors="drop")
+
+
+def test_encoded_output() -> None:
+    text = "Größe: 10 €"
+    tc = Case("Test1", stdout=EncodedOutput(text.encode("cp1252"), "cp1252"))
+    assert _system_out(tc) == text
+    tc = Case("Test1", stdout=EncodedOutput(BytesIO(b"a\x81b"), "cp1252", "ignore"))
+    assert _system_out(tc) == "ab"
+
+
+def test_decode_bytes() -> None:
+    assert decode("äöü".encode()) == "äöü"
+    suite = Suite("test", [Case("Test1", stdout="out", stderr=b"err")])
+    assert "<system-err>err</system-err>" in to_xml_report_string([suite])
+
+
+def test_template() -> None:
+    template = CaseTemplate(classname="some.class", file="a&b.py", url="http://x")
+    tc1 = template.case("Test1", elapsed_sec=1.5, stdout="out")
+    tc2 = template.case("Test2")
+    tc2.url = "http://y"
+    tc2.add_failure_info("Failed")
+    assert isinstance(tc1, Case)
+    assert tc1.template is template
+    assert tc1.url == "http://x"
+    assert not tc1.failures
+
+    expected = [
+        Case("Test1", "some.class", 1.5, "out", file="a&b.py", url="http://x"),
+        Case("Test2", "some.class", file="a&b.py", url="http://y"),
+    ]
+    expected[1].add_failure_info("Failed")
+    for prettyprint in (True, False):
+        assert to_xml_report_string(
+            [Suite("test", [tc1, tc2])], prettyprint=prettyprint
+        ) == to_xml_report_string([Suite("test", expected)], prettyprint=prettyprint)
+
+
+def test_template_from_case() -> None:
+    tc = Case(
+        "Test1", classname="some.class", log="log", allow_multiple_subelements=True
+    )
+    clone = CaseTemplate.from_case(tc).case("Test2")
+    assert (clone.classname, clone.log) == ("some.class", "log")
+    assert clone.allow_multiple_subelements
+    clone.log = None
+    assert tc.log == "log"
+
+
+def test_template_pickle() -> None:
+    template = CaseTemplate(classname="some.class", file="test.py")
+    tc1 = template.case("Test1", elapsed_sec=1.5)
+    tc2 = template.case("Test2")
+    tc2.add_failure_info("Failed")
+    tc2.url = "http://y"
+    clone1, clone2 = pickle.loads(pickle.dumps([tc1, tc2]))  # noqa: S301
+    # one template for the cases of a pickle
+    assert clone1.template is clone2.template
+    assert clone1.template is not template
+    assert clone1.template.fields == template.fields
+    assert (clone1.name, clone1.elapsed_sec, clone1.file) == ("Test1", 1.5, "test.py")
+    assert clone2.is_failure()
+    assert clone2.url == "http://y"
+    assert to_xml_report_string([Suite("test", [clone1, clone2])]) == (
+        to_xml_report_string([Suite("test", [tc1, tc2])])
+    )
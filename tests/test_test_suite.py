@@ -1,12 +1,21 @@
 import textwrap
+import threading
 import warnings
 from io import StringIO
+from pathlib import Path
+from xml.dom import minidom
 
 import pytest
 
 from junit_xml import TestCase as Case
 from junit_xml import TestSuite as Suite
-from junit_xml import decode, to_xml_report_string
+from junit_xml import (
+    XmlReportWriter,
+    decode,
+    to_xml_report_file,
+    to_xml_report_files,
+    to_xml_report_string,
+)
 
 from .asserts import verify_test_case
 from .serializer import serialize_and_read
@@ -119,6 +128,26 @@ def test_single_suite_to_file_no_prettyprint() -> None:
     verify_test_case(tcs[0], {"name": "Test1"})
 
 
+def test_attribute_whitespace() -> None:
+    suites = [Suite("suite", [Case("a\nb\tc\rd")])]
+    compact = to_xml_report_string(suites, prettyprint=False)
+    assert '<testcase name="a&#10;b&#09;cd" />' in compact
+    # the carriage return is removed, minidom would keep it
+    pretty = to_xml_report_string(suites)
+    assert "\r" not in pretty
+    assert "&#13;" not in pretty
+
+
+@pytest.mark.parametrize("prettyprint", [True, False])
+def test_attribute_whitespace_file_like_string(prettyprint: bool) -> None:
+    case = Case("a\nb\tc", classname="x\ny")
+    case.add_failure_info("first\nsecond", "output")
+    suites = [Suite("suite", [case], properties={"key": "multi\nline"})]
+    f = StringIO()
+    to_xml_report_file(f, suites, prettyprint=prettyprint)
+    assert f.getvalue() == to_xml_report_string(suites, prettyprint=prettyprint)
+
+
 def test_multiple_suites_to_file() -> None:
     tss = [Suite("suite1", [Case("Test1")]), Suite("suite2", [Case("Test2")])]
     suites = serialize_and_read(tss, to_file=True)
@@ -262,3 +291,181 @@ def test_deprecated_to_file() -> None:
         assert len(w) == 1
         assert issubclass(w[0].category, DeprecationWarning)
         assert "Testsuite.to_file is deprecated" in str(w[0].message)
+
+
+def test_to_xml_report_file_matches_string() -> None:
+    tc = Case(name="Test1", classname="some.class", elapsed_sec=1.5, stdout="out")
+    tc.add_failure_info(message="Failed", output="failure <output>")
+    test_suites = [
+        Suite(name="suite1", test_cases=[tc], properties={"foo": "bar"}),
+        Suite(name="suite2", test_cases=[Case(name="Test2")]),
+        Suite(name="suite3"),
+    ]
+    for prettyprint in (True, False):
+        f = StringIO()
+        to_xml_report_file(f, test_suites, prettyprint=prettyprint)
+        assert f.getvalue() == to_xml_report_string(
+            test_suites, prettyprint=prettyprint
+        )
+
+
+def test_add_test_case_from_threads() -> None:
+    suite = Suite("suite")
+    cases_per_thread = 500
+
+    def add(thread: int) -> None:
+        for i in range(cases_per_thread):
+            suite.add_test_case(Case(f"Test{thread}-{i}", classname=f"c{thread}"))
+
+    threads = [threading.Thread(target=add, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    suites = serialize_and_read(suite)
+    assert suites[0][0].attributes["tests"].value == str(4 * cases_per_thread)
+    names = [tc.attributes["name"].value for tc in suites[0][1]]
+    for thread in range(4):
+        own = [n for n in names if n.startswith(f"Test{thread}-")]
+        assert own == [f"Test{thread}-{i}" for i in range(cases_per_thread)]
+
+
+def test_test_case_order_classname() -> None:
+    suite = Suite("suite", test_case_order="classname")
+    suite.add_test_case(Case("b", classname="z"))
+    suite.add_test_case(Case("b", classname="a"))
+    suite.add_test_case(Case("a", classname="a"))
+    suite.add_test_case(Case("c"))
+
+    _, tcs = serialize_and_read(suite)[0]
+    assert [
+        (tc.getAttribute("classname"), tc.attributes["name"].value) for tc in tcs
+    ] == [("", "c"), ("a", "a"), ("a", "b"), ("z", "b")]
+
+
+def test_xml_report_writer() -> None:
+    tc1 = Case(name="Test1", classname="some.class", elapsed_sec=1.5, stdout="out")
+    tc1.add_failure_info(message="Failed", output="failure <output>")
+    tc2 = Case(name="Test2", assertions=2)
+    tc3 = Case(name="Test3")
+    suite1 = Suite(name="suite1", test_cases=[tc1, tc3], properties={"foo": "bar"})
+    suite2 = Suite(name="suite2", test_cases=[tc2])
+    suite3 = Suite(name="suite3", stdout="suite output")
+    for prettyprint in (True, False):
+        f = StringIO()
+        with XmlReportWriter(f, prettyprint=prettyprint, spool_size=10) as writer:
+            # test cases of the suites interleaved
+            writer.add_test_case(suite1, tc1)
+            writer.add_test_case(suite2, tc2)
+            writer.add_test_case(suite1, tc3)
+            writer.write_suite(suite3)
+            writer.write_suite(Suite(name="suite4"))
+        assert f.getvalue() == to_xml_report_string(
+            [suite1, suite2, suite3, Suite(name="suite4")], prettyprint=prettyprint
+        )
+
+
+def test_xml_report_writer_late_suite_outputs() -> None:
+    suite = Suite(name="suite")
+    f = StringIO()
+    with XmlReportWriter(f) as writer:
+        writer.add_test_case(suite, Case(name="Test1"))
+        # like the system-out of Ant reports, after the test cases
+        suite.properties = {"foo": "bar"}
+        suite.stdout = "suite output"
+    suite.test_cases = [Case(name="Test1")]
+    assert f.getvalue() == to_xml_report_string([suite], prettyprint=False)
+
+
+def test_to_xml_report_files(tmp_path: Path) -> None:
+    test_suites: list[Suite] = []
+    for s in range(5):
+        cases: list[Case] = []
+        for i in range(20):
+            case = Case(f"Test{i}", classname=f"some.class{s}", elapsed_sec=0.5)
+            if i % 4 == 0:
+                case.add_failure_info("Failed", f"failure output äöü {i}")
+            cases.append(case)
+        test_suites.append(
+            Suite(f"suite{s}", cases, properties={"foo": "bar"}, stdout="suite out")
+        )
+    test_suites.append(Suite("empty"))
+
+    max_bytes = 3000
+    paths = to_xml_report_files(
+        str(tmp_path / "report-{index:02d}.xml"),
+        test_suites,
+        prettyprint=False,
+        encoding="utf-8",
+        max_bytes=max_bytes,
+    )
+    assert len(paths) > 1
+    assert paths[0] == str(tmp_path / "report-01.xml")
+
+    names: list[tuple[str, str]] = []
+    stdouts: list[str] = []
+    for path in paths:
+        assert Path(path).stat().st_size <= max_bytes
+        root = minidom.parse(path).documentElement
+        assert root is not None
+        suites = root.getElementsByTagName("testsuite")
+        for key in ["tests", "failures"]:
+            assert int(root.getAttribute(key)) == sum(
+                int(ts.getAttribute(key)) for ts in suites
+            )
+        for ts in suites:
+            tcs = ts.getElementsByTagName("testcase")
+            assert int(ts.getAttribute("tests")) == len(tcs)
+            if ts.getAttribute("name") != "empty":
+                assert ts.getElementsByTagName("property")
+            stdouts.extend(
+                ts.getAttribute("name") for _ in ts.getElementsByTagName("system-out")
+            )
+            names.extend(
+                (ts.getAttribute("name"), tc.getAttribute("name")) for tc in tcs
+            )
+
+    assert names == [(ts.name, tc.name) for ts in test_suites for tc in ts.test_cases]
+    # the suite outputs are written with the first part of a suite only
+    assert stdouts == [f"suite{s}" for s in range(5)]
+
+
+def test_to_xml_report_files_max_cases(tmp_path: Path) -> None:
+    test_suites = [Suite("suite", [Case(f"Test{i}") for i in range(25)])]
+    paths = to_xml_report_files(
+        str(tmp_path / "report-{index}.xml"), test_suites, max_cases=10
+    )
+    assert len(paths) == 3  # noqa: PLR2004
+    counts = [
+        len(minidom.parse(path).getElementsByTagName("testcase")) for path in paths
+    ]
+    assert counts == [10, 10, 5]
+
+
+def test_to_xml_report_files_path_template() -> None:
+    with pytest.raises(ValueError, match="index"):
+        to_xml_report_files("report.xml", [], max_cases=10)
+
+
+def test_to_xml_report_files_statistics(tmp_path: Path) -> None:
+    cases = [Case(f"Test{i}", elapsed_sec=i / 10) for i in range(30)]
+    suite = Suite("suite", cases, properties={"foo": "bar"}, statistics=True)
+    max_bytes = 2000
+    paths = to_xml_report_files(
+        str(tmp_path / "report-{index}.xml"), [suite], max_bytes=max_bytes
+    )
+    assert len(paths) > 1
+    # no temporary files are left
+    assert sorted(map(str, tmp_path.iterdir())) == sorted(paths)
+    for path in paths:
+        assert Path(path).stat().st_size <= max_bytes
+        ts = minidom.parse(path).getElementsByTagName("testsuite")[0]
+        properties = {
+            p.getAttribute("name"): p.getAttribute("value")
+            for p in ts.getElementsByTagName("property")
+        }
+        # the statistics of the test cases of each file
+        slowest = ts.getElementsByTagName("testcase")[-1].getAttribute("name")
+        assert properties["foo"] == "bar"
+        assert properties["statistics.slowest.1"].endswith(f" {slowest}")
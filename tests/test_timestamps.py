@@ -0,0 +1,78 @@
+import io
+from datetime import UTC, datetime, timedelta, timezone
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import XmlReportWriter, binary, to_xml_report_file, to_xml_report_string
+from junit_xml.dialects import Dialect
+from junit_xml.parser import parse
+
+# 2012-11-15T01:02:29 UTC
+EPOCH_SECONDS = 1352941349
+
+
+def _timestamps(xml: str) -> list[object]:
+    suite = parse(io.BytesIO(xml.encode("utf-8")))[0]
+    return [suite.timestamp, *(case.timestamp for case in suite.test_cases)]
+
+
+@pytest.mark.parametrize(
+    "timestamp",
+    [
+        datetime(2012, 11, 15, 1, 2, 29, 750000),  # noqa: DTZ001
+        datetime(2012, 11, 15, 3, 2, 29, tzinfo=timezone(timedelta(hours=2))),
+        EPOCH_SECONDS + 0.75,
+    ],
+)
+def test_iso_8601(timestamp: float | datetime) -> None:
+    suite = Suite("suite", [Case("Test1", timestamp=timestamp)], timestamp=timestamp)
+    for prettyprint in (True, False):
+        xml = to_xml_report_string([suite], prettyprint=prettyprint)
+        assert _timestamps(xml) == ["2012-11-15T01:02:29"] * 2
+
+
+def test_compatible_timestamps() -> None:
+    suite = Suite("suite", [Case("Test1", timestamp="yesterday")], timestamp=1)
+    xml = to_xml_report_string([suite], prettyprint=False)
+    assert _timestamps(xml) == ["1", "yesterday"]
+
+
+@pytest.mark.parametrize(
+    "base",
+    [
+        EPOCH_SECONDS,
+        EPOCH_SECONDS + 0.5,
+        datetime.fromtimestamp(EPOCH_SECONDS, UTC),
+        "2012-11-15T01:02:29",
+    ],
+)
+def test_relative_timestamps(base: float | str | datetime) -> None:
+    cases = [
+        Case("Test1", timestamp=timedelta()),
+        Case("Test2", timestamp=timedelta(seconds=0.4)),
+        Case("Test3", timestamp=timedelta(minutes=1, seconds=1)),
+    ]
+    suite = Suite("suite", cases, timestamp=base)
+    expected = ["2012-11-15T01:02:29", "2012-11-15T01:02:29", "2012-11-15T01:03:30"]
+
+    xml = to_xml_report_string([suite], prettyprint=False)
+    assert _timestamps(xml)[1:] == expected
+    out = io.StringIO()
+    to_xml_report_file(out, [suite], dialect=Dialect("time", [], [], ["timestamp"]))
+    assert _timestamps(out.getvalue())[1:] == expected
+    with XmlReportWriter(out := io.StringIO()) as writer:
+        for case in cases:
+            writer.add_test_case(suite, case)
+    assert _timestamps(out.getvalue())[1:] == expected
+
+    # stored resolved in the binary format
+    loaded = binary.loads(binary.dumps([suite]))
+    assert [case.timestamp for case in loaded[0].test_cases] == expected
+
+
+def test_relative_timestamp_without_suite_timestamp() -> None:
+    suite = Suite("suite", [Case("Test1", timestamp=timedelta(seconds=1))])
+    with pytest.raises(ValueError, match="needs a timestamp of its suite"):
+        to_xml_report_string([suite])
@@ -0,0 +1,124 @@
+import io
+from pathlib import Path
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import to_xml_report_string
+from junit_xml._output import read_output
+from junit_xml.cli import main
+from junit_xml.parser import iter_results
+from junit_xml.redaction import Redactor
+from junit_xml.transform import (
+    Pipeline,
+    drop_passed,
+    filter_suites,
+    map_cases,
+    redact,
+    rename_classnames,
+    strip_passed_outputs,
+)
+
+
+def _test_suites() -> list[Suite]:
+    tc1 = Case("Test1", classname="old.cls", elapsed_sec=1.5, stdout="passed out")
+    tc2 = Case("Test2", classname="old.cls", elapsed_sec=2.5, stdout="token=abc12")
+    tc2.add_failure_info("failed with token=ff00", "output token=1234")
+    tc3 = Case("Test3", classname="other", stderr="err")
+    tc3.add_skipped_info("Skipped")
+    return [
+        Suite("suite1", [tc1, tc2, tc3], properties={"foo": "bar"}),
+        Suite("suite2", [Case("Test4")]),
+        Suite("suite3"),
+    ]
+
+
+def _report() -> io.BytesIO:
+    xml = to_xml_report_string(_test_suites(), encoding="utf-8")
+    return io.BytesIO(xml.encode("utf-8"))
+
+
+def _transform(pipeline: Pipeline) -> str:
+    out = io.StringIO()
+    pipeline.transform(_report(), out)
+    return out.getvalue()
+
+
+def test_drop_passed() -> None:
+    suite1, suite2, suite3 = _test_suites()
+    suite1.test_cases = suite1.test_cases[1:]
+    suite2.test_cases = []
+    expected = to_xml_report_string([suite1, suite2, suite3], prettyprint=False)
+    assert _transform(Pipeline(drop_passed())) == expected
+
+
+def test_rewrite() -> None:
+    pipeline = Pipeline(
+        strip_passed_outputs(),
+        rename_classnames(lambda classname: (classname or "").replace("old", "new")),
+        redact("token=[0-9a-f]+", "token=***"),
+        filter_suites(lambda suite: suite.name != "suite2"),
+    )
+    suite1, _, suite3 = _test_suites()
+    tc1, tc2, tc3 = suite1.test_cases
+    tc1.stdout = None
+    tc1.classname = tc2.classname = "new.cls"
+    tc2.stdout = "token=***"
+    tc2.failures[0]["message"] = "failed with token=***"
+    tc2.failures[0]["output"] = "output token=***"
+    tc3.classname = "other"
+    expected = to_xml_report_string([suite1, suite3], prettyprint=False)
+    assert _transform(pipeline) == expected
+
+
+def test_redact_suites() -> None:
+    suite = Suite(
+        "suite", [Case("Test1")], properties={"token": "token=ff00"}, stdout="token=12"
+    )
+    suite.stderr = b"log token=34"
+    xml = to_xml_report_string([suite], encoding="utf-8")
+    pipeline = Pipeline(redact("token=[0-9a-f]+"))
+    out = io.StringIO()
+    pipeline.transform(io.BytesIO(xml.encode("utf-8")), out)
+    suite.properties = {"token": "[REDACTED]"}
+    suite.stdout = "[REDACTED]"
+    suite.stderr = "log [REDACTED]"
+    assert out.getvalue() == to_xml_report_string([suite], prettyprint=False)
+
+
+def test_redact_lazy_output() -> None:
+    case = Case("Test1", stdout=io.BytesIO(b"a secret and b secret"))
+    case.add_error_info("error", lambda: ["sec", "ret"])
+    stage = redact(Redactor(literals=["secret"], replacement="***", max_match=6))
+    ((_, redacted),) = stage([(Suite("suite"), case)])
+    assert redacted is not None
+    assert redacted.stdout is not None
+    assert read_output(redacted.stdout) == "a *** and b ***"
+    assert read_output(redacted.errors[0]["output"] or "") == "***"
+
+
+def test_stages_compose() -> None:
+    def rename(_: Suite, case: Case) -> Case | None:
+        case.name = case.name.lower()
+        return case if case.name != "test4" else None
+
+    pipeline = Pipeline(map_cases(rename))
+    results = list(pipeline.apply(iter_results(_report())))
+    names = [case.name for _, case in results if case is not None]
+    assert names == ["test1", "test2", "test3"]
+    assert [suite.name for suite, case in results if case is None] == [
+        "suite1",
+        "suite2",
+        "suite3",
+    ]
+
+
+def test_cli_transform(tmp_path: Path) -> None:
+    report = tmp_path / "report.xml"
+    report.write_bytes(_report().getvalue())
+    output = tmp_path / "transformed.xml"
+    args = ["--drop-passed", "--rename-classname", "old=new", "--redact", "token=\\w+"]
+    assert main(["transform", *args, str(report), "-o", str(output)]) == 0
+    xml = output.read_text(encoding="utf-8")
+    assert 'classname="new.cls"' in xml
+    assert "token=" not in xml
+    assert "Test1" not in xml
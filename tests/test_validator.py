@@ -0,0 +1,159 @@
+import io
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import XmlReportWriter, to_xml_report_file, to_xml_report_string
+from junit_xml.validator import ReportValidator, validate
+
+
+def _test_suites() -> list[Suite]:
+    tc1 = Case(
+        "Test1",
+        classname="some.class",
+        elapsed_sec=1.5,
+        stdout="out äöü <&>",
+        assertions=2,
+        timestamp="2012-11-15T01:02:29",
+    )
+    tc1.add_failure_info("Failed", "failure\noutput", "AssertionError")
+    tc2 = Case("Test2", elapsed_sec=0.1, allow_multiple_subelements=True)
+    tc2.add_error_info("Error1", "output1")
+    tc2.add_error_info("Error2")
+    tc3 = Case("Test3", stderr="err")
+    tc3.add_skipped_info("Skipped", "skipped output")
+    tc4 = Case("Test4", elapsed_sec=0.2)
+    tc4.is_enabled = False
+    return [
+        Suite(
+            "suite1",
+            [tc1, tc2, tc3, tc4],
+            hostname="localhost",
+            properties={"foo": "bar"},
+            stdout="suite out",
+        ),
+        Suite("suite2"),
+    ]
+
+
+def _problems(xml: str) -> list[str]:
+    return validate(BytesIO(xml.encode("utf-8")))
+
+
+@pytest.mark.parametrize("prettyprint", [True, False])
+def test_valid_report(tmp_path: Path, prettyprint: bool) -> None:
+    path = tmp_path / "report.xml"
+    path.write_text(
+        to_xml_report_string(_test_suites(), prettyprint=prettyprint), encoding="utf-8"
+    )
+    assert validate(path, chunk_size=7) == []
+
+
+def test_single_suite_root() -> None:
+    xml = '<testsuite name="s" tests="1"><testcase name="t"/></testsuite>'
+    assert _problems(xml) == []
+
+
+def test_counters() -> None:
+    xml = (
+        '<testsuites tests="3" failures="0">\n'
+        '<testsuite name="s" tests="2" failures="1" errors="x" time="0.5">\n'
+        '<testcase name="t" time="1"><failure/><failure/></testcase>\n'
+        "</testsuite>\n"
+        "</testsuites>"
+    )
+    assert _problems(xml) == [
+        "line 2: errors of <testsuite> is not a count: 'x'",
+        "line 2: tests of <testsuite> is 2, counted 1",
+        "line 1: failures of <testsuites> is 0, the suites have 1",
+        "line 1: tests of <testsuites> is 3, the suites have 2",
+    ]
+
+
+def test_pytest_report() -> None:
+    # the suite time of pytest includes the setup, Jenkins accepts it
+    xml = (
+        '<testsuites><testsuite name="pytest" errors="0" failures="0" skipped="0"'
+        ' tests="1" time="0.047" timestamp="2024-01-01T00:00:00.000000">'
+        '<testcase classname="test_a" name="test_b" time="0.011">'
+        '<properties><property name="key" value="value"/></properties>'
+        "</testcase></testsuite></testsuites>"
+    )
+    assert _problems(xml) == []
+
+
+def test_structure() -> None:
+    xml = (
+        '<testsuites color="red">\n'
+        '<testsuite name="s"><testcase time="fast"><pass/></testcase>\n'
+        "text</testsuite>\n"
+        "</testsuites>"
+    )
+    assert _problems(xml) == [
+        "line 1: unexpected attribute color of <testsuites>",
+        "line 2: missing attribute name of <testcase>",
+        "line 2: time of <testcase> is not a number: 'fast'",
+        "line 2: unexpected element <pass> in <testcase>",
+        "line 3: unexpected text in <testsuite>",
+    ]
+    assert _problems("<report/>") == [
+        "line 1: unexpected element <report> as root element"
+    ]
+
+
+def test_illegal_characters() -> None:
+    # accepted by expat, but discouraged by XML 1.0 and rejected by Jenkins
+    xml = (
+        '<testsuite name="s\x7f">'
+        '<testcase name="t"><system-out>a&#xfdd0;b</system-out></testcase>'
+        "</testsuite>"
+    )
+    assert _problems(xml) == [
+        "line 1: illegal character in an attribute of <testsuite>",
+        "line 1: illegal character in the text of an element",
+    ]
+
+
+def test_malformed() -> None:
+    assert _problems("<testsuites>\n<testsuite name='s'>") == [
+        "line 2: no element found"
+    ]
+    assert _problems("<testsuites>\n</testsuite>") == ["line 2: mismatched tag"]
+
+
+def test_max_problems() -> None:
+    validator = ReportValidator(max_problems=2)
+    validator.feed("<testsuites>" + "<testsuite/>" * 5 + "</testsuites>")
+    problems = validator.close()
+    assert problems == [
+        "line 1: missing attribute name of <testsuite>",
+        "line 1: missing attribute name of <testsuite>",
+        "and 3 more problems",
+    ]
+
+
+def test_inline_validation() -> None:
+    out = io.StringIO()
+    to_xml_report_file(out, _test_suites(), validate=True)
+    assert validate(BytesIO(out.getvalue().encode("utf-8"))) == []
+
+    # a time which Jenkins can't parse
+    suite = Suite("suite", [Case("Test1", elapsed_sec=float("nan"))])
+    with pytest.raises(ValueError, match="time of <testcase> is not a number"):
+        to_xml_report_file(io.StringIO(), [suite], validate=True)
+
+
+def test_xml_report_writer_validation() -> None:
+    out = io.StringIO()
+    with XmlReportWriter(out, prettyprint=True, validate=True) as writer:
+        for suite in _test_suites():
+            writer.write_suite(suite)
+    assert validate(BytesIO(out.getvalue().encode("utf-8"))) == []
+
+    writer = XmlReportWriter(io.StringIO(), validate=True)
+    writer.add_test_case(Suite("suite"), Case("Test1", elapsed_sec=float("inf")))
+    with pytest.raises(ValueError, match="time of <testcase> is not a number"):
+        writer.close()
@@ -0,0 +1,96 @@
+import io
+
+import pytest
+
+from junit_xml import TestCase as Case
+from junit_xml import TestSuite as Suite
+from junit_xml import to_xml_report_string
+from junit_xml.verify import ReportIndex
+
+
+def _report(prettyprint: bool = True) -> io.BytesIO:
+    tc1 = Case(
+        "Test1",
+        classname="some.class",
+        elapsed_sec=1.5,
+        stdout="out äöü <&>",
+        stderr="err",
+    )
+    tc1.add_failure_info("Failed", "failure\noutput", "AssertionError")
+    tc2 = Case("Test2", allow_multiple_subelements=True)
+    tc2.add_error_info("Error1", "output1")
+    tc2.add_error_info("Error2")
+    tc3 = Case("Test3")
+    tc3.add_skipped_info("Skipped", "skipped output")
+    suites = [Suite("suite1", [tc1, tc2]), Suite("suite2", [tc3, Case("Test3")])]
+    xml = to_xml_report_string(suites, prettyprint=prettyprint, encoding="utf-8")
+    return io.BytesIO(xml.encode("utf-8"))
+
+
+@pytest.mark.parametrize("prettyprint", [True, False])
+def test_assert_case(prettyprint: bool) -> None:
+    report = ReportIndex(_report(prettyprint), chunk_size=16)
+    assert len(report) == 4  # noqa: PLR2004
+    assert ("suite1", "some.class", "Test1") in report
+    report.assert_case(
+        "suite1",
+        "Test1",
+        classname="some.class",
+        attributes={"name": "Test1", "classname": "some.class", "time": "1.500000"},
+        failures=[
+            {"message": "Failed", "output": "failure\noutput", "type": "AssertionError"}
+        ],
+        errors=[],
+        skipped=[],
+        stdout="out äöü <&>",
+        stderr="err",
+        exact_attributes=True,
+    )
+    case = report.assert_case(
+        "suite1",
+        "Test2",
+        errors=[{"message": "Error1", "output": "output1"}, {"output": None}],
+    )
+    assert case.failures == []
+    assert case.stdout is None
+
+
+def test_mismatches() -> None:
+    report = ReportIndex(_report())
+    case = report.case("suite1", "Test1", "some.class")
+    with pytest.raises(AssertionError, match=r"attribute time is '1\.500000'"):
+        case.assert_matches({"time": "1.5"})
+    with pytest.raises(AssertionError, match="unexpected attributes classname, time"):
+        case.assert_matches({"name": "Test1"}, exact_attributes=True)
+    with pytest.raises(AssertionError, match="1 failure elements, expected 0"):
+        case.assert_matches(failures=[])
+    with pytest.raises(AssertionError, match="type of failure 0 is 'AssertionError'"):
+        case.assert_matches(failures=[{"type": "ValueError"}])
+    with pytest.raises(AssertionError, match="system-err is 'err', expected 'out'"):
+        case.assert_matches(stderr="out")
+    with pytest.raises(AssertionError, match="no test case Test1 in suite suite2"):
+        report.case("suite2", "Test1")
+    with pytest.raises(AssertionError, match="2 test cases Test3 in suite suite2"):
+        report.case("suite2", "Test3")
+
+
+def test_keys() -> None:
+    report = ReportIndex(_report(), keys=[("suite2", None, "Test3")])
+    assert len(report) == 2  # noqa: PLR2004
+    assert [case.skipped for case in report] == [
+        [{"message": "Skipped", "output": "skipped output", "type": "skipped"}],
+        [],
+    ]
+    with pytest.raises(AssertionError, match="no test case"):
+        report.case("suite1", "Test2")
+
+
+def test_nested_suites() -> None:
+    xml = (
+        b'<testsuite name="outer"><testsuite name="inner">'
+        b'<testcase name="a"/></testsuite><testcase name="b"><system-out>x'
+        b"</system-out></testcase></testsuite>"
+    )
+    report = ReportIndex(io.BytesIO(xml))
+    assert report.case("inner", "a").stdout is None
+    report.assert_case("outer", "b", stdout="x")